@@ -0,0 +1,43 @@
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.dependencies import session_manager
+
+# Ключи advisory-блокировок PostgreSQL
+OUTBOX_LOCK = 72001
+NOTIFICATION_RETENTION_LOCK = 72002
+POSITION_FLUSH_LOCK = 72003
+
+
+async def try_advisory_xact_lock(session: AsyncSession, key: int) -> bool:
+    # Блокировка до конца текущей транзакции; False, если ее держит другой процесс
+    return bool((await session.execute(select(func.pg_try_advisory_xact_lock(key)))).scalar())
+
+
+@asynccontextmanager
+async def advisory_lock_session(key: int) -> AsyncIterator[AsyncSession | None]:
+    """
+    Сессия на выделенном соединении под сессионной advisory-блокировкой. В отличие от xact-блокировки
+    она держится и после COMMIT, до выхода из контекста. None, если блокировку держит другой процесс.
+    """
+    async with session_manager.engine.connect() as connection:
+        locked = bool((await connection.execute(select(func.pg_try_advisory_lock(key)))).scalar())
+        await connection.commit()
+        if not locked:
+            yield None
+            return
+        try:
+            async with AsyncSession(bind=connection, autoflush=False, expire_on_commit=False) as session:
+                yield session
+        finally:
+            try:
+                await connection.rollback()
+                await connection.execute(select(func.pg_advisory_unlock(key)))
+                await connection.commit()
+            except Exception:
+                # Соединение с неснятой блокировкой не должно вернуться в пул
+                await connection.invalidate()
+                raise
@@ -1,19 +1,22 @@
 from .base import Base
 
 from .user import User
-from .notification import Notification
+from .notification import Notification, NotificationReceipt
 from .patient import Patient
 from .call import Call
 from .car import Car
 from .team import Team
+from .outbox import Outbox
 
 
 __all__ = [
     "Base",
     "User",
     "Notification",
+    "NotificationReceipt",
     "Car",
     "Call",
     "Team",
     "Patient",
+    "Outbox",
 ]
@@ -3,7 +3,7 @@ from datetime import datetime
 from typing import TYPE_CHECKING
 
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import String, ForeignKey, Enum, Float, DateTime
+from sqlalchemy import String, ForeignKey, Enum, Float, DateTime, Index, text
 
 from app.db.models.base import Base
 
@@ -26,6 +26,13 @@ class CallType(StrEnum):
 
 
 class Call(Base):
+    __table_args__ = (
+        Index("ix_call_status_actual", "status", "type", "date_time",
+              postgresql_where=text("status IN ('NEW', 'ACCEPTED')")),
+        Index("ix_call_team_id_status", "team_id", "status"),
+        Index("ix_call_date_time_id", "date_time", "id"),
+    )
+
     status: Mapped[CallStatus] = mapped_column(Enum(CallStatus, name="call_status"), nullable=False)
     type: Mapped[CallType] = mapped_column(Enum(CallType, name="call_type"), nullable=False)
     reason: Mapped[str] = mapped_column(String(100), nullable=False)
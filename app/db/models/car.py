@@ -1,6 +1,6 @@
 from typing import TYPE_CHECKING
 
-from sqlalchemy import text
+from sqlalchemy import Index, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.models.base import Base
@@ -10,6 +10,10 @@ if TYPE_CHECKING:
 
 
 class Car(Base):
+    __table_args__ = (
+        Index("ix_car_number_active", "number", postgresql_where=text("is_deleted = false")),
+    )
+
     number: Mapped[str] = mapped_column(nullable=False)
     status: Mapped[bool] = mapped_column(default=True, nullable=False)
     is_deleted: Mapped[bool] = mapped_column(default=False, server_default=text("false"), nullable=False)
@@ -1,10 +1,12 @@
+from datetime import datetime
 from enum import StrEnum
 from typing import TYPE_CHECKING
 
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import Enum, ForeignKey
+from sqlalchemy import Enum, ForeignKey, Index, CheckConstraint, UniqueConstraint, text
 
 from app.db.models.base import Base
+from app.db.models.user import UserRole
 
 if TYPE_CHECKING:
     from app.db.models.user import User
@@ -17,12 +19,44 @@ class NotificationType(StrEnum):
 
 
 class Notification(Base):
+    # Адресат - пользователь, роль или бригада: рассылка хранится одной строкой, а не строкой на получателя.
+    # Таблица секционирована по месяцам created_at, секции создает и удаляет NotificationRetentionService
+    __table_args__ = (
+        CheckConstraint("num_nonnulls(user_id, target_role, target_team_id) = 1",
+                        name="ck_notification_single_target"),
+        Index("ix_notification_user_id_created_at", "user_id", "created_at"),
+        Index("ix_notification_target_role_created_at", "target_role", "created_at",
+              postgresql_where=text("target_role IS NOT NULL")),
+        Index("ix_notification_target_team_id_created_at", "target_team_id", "created_at",
+              postgresql_where=text("target_team_id IS NOT NULL")),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+    # Ключ секционирования входит в первичный ключ
+    created_at: Mapped[datetime] = mapped_column(primary_key=True, default=datetime.utcnow, nullable=False)
+
     notification_type: Mapped[NotificationType] = mapped_column(Enum(NotificationType, name="notification_type"),
                                                                 nullable=False)
     text: Mapped[str] = mapped_column(nullable=False)
-    user_id: Mapped[int] = mapped_column(ForeignKey("user.id", ondelete="CASCADE"), nullable=False)
+    user_id: Mapped[int | None] = mapped_column(ForeignKey("user.id", ondelete="CASCADE"), nullable=True)
+    target_role: Mapped[UserRole | None] = mapped_column(Enum(UserRole, name="user_role"), nullable=True)
+    target_team_id: Mapped[int | None] = mapped_column(ForeignKey("team.id", ondelete="CASCADE"), nullable=True)
 
     user: Mapped["User"] = relationship("User",
                                         back_populates="notifications",
                                         uselist=False,
                                         lazy="joined")
+
+
+class NotificationReceipt(Base):
+    # Отметки пользователя о прочтении и скрытии уведомления. Внешнего ключа на секционированную таблицу
+    # нет: отметки удаляются вместе с уведомлением и при удалении устаревших секций
+    __table_args__ = (
+        UniqueConstraint("notification_id", "user_id", name="uq_notificationreceipt_notification_id_user_id"),
+        Index("ix_notificationreceipt_user_id", "user_id"),
+    )
+
+    notification_id: Mapped[int] = mapped_column(nullable=False)
+    user_id: Mapped[int] = mapped_column(ForeignKey("user.id", ondelete="CASCADE"), nullable=False)
+    is_read: Mapped[bool] = mapped_column(default=False, server_default=text("false"), nullable=False)
+    is_dismissed: Mapped[bool] = mapped_column(default=False, server_default=text("false"), nullable=False)
@@ -0,0 +1,9 @@
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.models.base import Base
+
+
+class Outbox(Base):
+    # Побочные эффекты изменения вызова, записанные в той же транзакции; выполняются OutboxService
+    payload: Mapped[dict] = mapped_column(JSONB, nullable=False)
@@ -1,7 +1,7 @@
 from typing import TYPE_CHECKING
 
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import ForeignKey, Float, text
+from sqlalchemy import ForeignKey, Float, Index, text
 
 from app.db.models.base import Base
 
@@ -12,6 +12,12 @@ if TYPE_CHECKING:
 
 
 class Team(Base):
+    __table_args__ = (
+        Index("ix_team_worker1_id_active", "worker1_id", postgresql_where=text("is_deleted = false")),
+        Index("ix_team_worker2_id_active", "worker2_id", postgresql_where=text("is_deleted = false")),
+        Index("ix_team_worker3_id_active", "worker3_id", postgresql_where=text("is_deleted = false")),
+    )
+
     worker1_id: Mapped[int] = mapped_column(ForeignKey("user.id", ondelete="CASCADE"), nullable=False)
     worker2_id: Mapped[int] = mapped_column(ForeignKey("user.id", ondelete="CASCADE"), nullable=False)
     worker3_id: Mapped[int] = mapped_column(ForeignKey("user.id", ondelete="CASCADE"), nullable=False)
@@ -2,7 +2,7 @@ from enum import StrEnum
 from typing import TYPE_CHECKING
 
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import Enum, text
+from sqlalchemy import Enum, Index, text
 
 from app.db.models.base import Base
 
@@ -18,6 +18,10 @@ class UserRole(StrEnum):
 
 
 class User(Base):
+    __table_args__ = (
+        Index("ix_user_role", "role"),
+    )
+
     login: Mapped[str] = mapped_column(nullable=False, unique=True)
     password: Mapped[str] = mapped_column(nullable=False)
     role: Mapped[UserRole] = mapped_column(Enum(UserRole, name="user_role"), nullable=False)
@@ -1,8 +1,10 @@
 import time
 from typing import Generic, TypeVar, Type
 
-from sqlalchemy import Result, select, delete, update
+from sqlalchemy import Result, select, delete, update, insert, tuple_, union_all, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 
 T = TypeVar('T')
 
@@ -29,10 +31,24 @@ class Repository(Generic[T]):
                          conditions: list = None,
                          order_by: list = None,
                          limit: int = None,
-                         offset: int = None):
+                         offset: int = None,
+                         options: list = None,
+                         keyset: list = None,
+                         keyset_after: tuple = None,
+                         keyset_desc: bool = True,
+                         for_update: bool = False,
+                         skip_locked: bool = False):
         stmt = select(self.model)
+        if options: stmt = stmt.options(*options)
+        if for_update: stmt = stmt.with_for_update(of=self.model, skip_locked=skip_locked)
         if filters: stmt = stmt.filter_by(**filters)
         if conditions: stmt = stmt.where(*conditions)
+        if keyset:
+            # Keyset-пагинация: строки строго после курсора в порядке ключа
+            if keyset_after:
+                stmt = stmt.where(tuple_(*keyset) < tuple_(*keyset_after) if keyset_desc
+                                  else tuple_(*keyset) > tuple_(*keyset_after))
+            stmt = stmt.order_by(*(c.desc() if keyset_desc else c.asc() for c in keyset))
         if order_by: stmt = stmt.order_by(*order_by)
         if limit: stmt = stmt.limit(limit)
         if offset: stmt = stmt.offset(offset)
@@ -40,11 +56,46 @@ class Repository(Generic[T]):
         res: Result = await session.execute(stmt)
         return res.unique().scalars().all()
 
+    async def get_union(self,
+                        session: AsyncSession,
+                        branches: list[list],
+                        keyset: list,
+                        limit: int,
+                        keyset_after: tuple = None,
+                        options: list = None):
+        """
+        Первые limit строк по убыванию keyset из объединения нескольких выборок. Каждая ветка
+        читает свой индекс с тем же порядком и limit, вместо сортировки всех строк условия OR.
+        """
+        after = [tuple_(*keyset) < tuple_(*keyset_after)] if keyset_after else []
+        parts = [select(self.model).where(*conditions, *after).order_by(*(c.desc() for c in keyset)).limit(limit)
+                 for conditions in branches]
+        subquery = union_all(*parts).subquery()
+        entity = aliased(self.model, subquery)
+        stmt = select(entity).order_by(*(getattr(entity, c.key).desc() for c in keyset)).limit(limit)
+        if options: stmt = stmt.options(*options)
+
+        res: Result = await session.execute(stmt)
+        return res.unique().scalars().all()
+
+    async def count(self, session: AsyncSession, *conditions) -> int:
+        res: Result = await session.execute(select(func.count()).select_from(self.model).where(*conditions))
+        return res.scalar_one()
+
     async def get_by_id(self, session: AsyncSession, id: int) -> T:
         res: Result = await session.execute(select(self.model).filter_by(id=id))
         return res.scalars().first()
 
-    async def create(self, session: AsyncSession, new: T) -> T:
+    async def get_ids(self, session: AsyncSession, *conditions) -> list[int]:
+        res: Result = await session.execute(select(self.model.id).where(*conditions))
+        return list(res.scalars().all())
+
+    async def create(self, session: AsyncSession, new: T, commit: bool = True) -> T:
+        if not commit:
+            # Изменение остается в транзакции вызывающего и фиксируется им вместе с другими
+            session.add(new)
+            await session.flush()
+            return new
         async with session:
             try:
                 session.add(new)
@@ -55,7 +106,50 @@ class Repository(Generic[T]):
                 await session.rollback()
                 raise e
 
-    async def update(self, session: AsyncSession, update_id: int, **new_values):
+    async def create_many(self, session: AsyncSession, rows: list[dict], commit: bool = True) -> list[T]:
+        # Один многострочный INSERT ... RETURNING в одной транзакции
+        if not rows:
+            return []
+        if not commit:
+            res: Result = await session.execute(insert(self.model).returning(self.model), rows)
+            return list(res.scalars().all())
+        async with session:
+            try:
+                res: Result = await session.execute(insert(self.model).returning(self.model), rows)
+                created = list(res.scalars().all())
+                await session.commit()
+                return created
+            except Exception as e:
+                await session.rollback()
+                raise e
+
+    async def upsert(self,
+                     session: AsyncSession,
+                     values: dict,
+                     index_elements: list[str],
+                     update_values: dict,
+                     where=None) -> T | None:
+        """
+        INSERT ... ON CONFLICT DO UPDATE по уникальному ключу index_elements. Возвращает строку,
+        если она вставлена или изменена, и None, если существующая строка не прошла условие where.
+        """
+        stmt = (pg_insert(self.model).values(**values)
+                .on_conflict_do_update(index_elements=index_elements, set_=update_values, where=where)
+                .returning(self.model))
+        async with session:
+            try:
+                res: Result = await session.execute(stmt)
+                row = res.scalars().first()
+                await session.commit()
+                return row
+            except Exception as e:
+                await session.rollback()
+                raise e
+
+    async def update(self, session: AsyncSession, update_id: int, commit: bool = True, **new_values):
+        if not commit:
+            await session.execute(update(self.model).where(self.model.id == update_id).values(**new_values))
+            return
         async with session:
             try:
                 await session.execute(update(self.model).where(self.model.id == update_id).values(**new_values))
@@ -64,6 +158,19 @@ class Repository(Generic[T]):
                 await session.rollback()
                 raise e
 
+    async def update_many(self, session: AsyncSession, rows: list[dict], commit: bool = True):
+        # Массовое обновление по первичному ключу: каждый словарь содержит id и новые значения
+        if not commit:
+            await session.execute(update(self.model), rows)
+            return
+        async with session:
+            try:
+                await session.execute(update(self.model), rows)
+                await session.commit()
+            except Exception as e:
+                await session.rollback()
+                raise e
+
     async def delete(self, session: AsyncSession, del_id: int):
         async with session:
             try:
@@ -72,3 +179,15 @@ class Repository(Generic[T]):
             except Exception as e:
                 await session.rollback()
                 raise e
+
+    async def delete_many(self, session: AsyncSession, del_ids: list[int], commit: bool = True):
+        if not commit:
+            await session.execute(delete(self.model).where(self.model.id.in_(del_ids)))
+            return
+        async with session:
+            try:
+                await session.execute(delete(self.model).where(self.model.id.in_(del_ids)))
+                await session.commit()
+            except Exception as e:
+                await session.rollback()
+                raise e
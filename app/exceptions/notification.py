@@ -0,0 +1,6 @@
+from app.exceptions.base import BaseCustomException
+
+
+class NotificationNotFoundException(BaseCustomException):
+    def __init__(self):
+        super().__init__(404, "Уведомление не найдено")
@@ -0,0 +1,6 @@
+from app.exceptions.base import BaseCustomException
+
+
+class InvalidCursorException(BaseCustomException):
+    def __init__(self):
+        super().__init__(400, "Некорректный курсор")
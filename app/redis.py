@@ -1,31 +1,313 @@
+import asyncio
 import json
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from typing import Any
 
 from redis.asyncio import Redis
+from redis.exceptions import RedisError
 
 from app.schemas.base import BaseSchema
 from app.settings import settings
+from app.utils.local_cache import CacheStats, LocalCache
+
+from logger import logger
+
+INVALIDATION_CHANNEL = "cache:invalidate"
+
+# Блокировка снимается только владельцем: по истечении срока ее мог взять другой процесс
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# Значение загрузки записывается, только если ключ не удаляли с ее начала (поколение не изменилось)
+SET_IF_GENERATION_SCRIPT = """
+if (redis.call('GET', KEYS[2]) or '') ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+return 1
+"""
+
+# Поле хеша удаляется, только если его значение не изменилось (ARGV - пары поле, значение)
+HDEL_IF_EQUAL_SCRIPT = """
+local deleted = 0
+for i = 1, #ARGV, 2 do
+    if redis.call('HGET', KEYS[1], ARGV[i]) == ARGV[i + 1] then
+        deleted = deleted + redis.call('HDEL', KEYS[1], ARGV[i])
+    end
+end
+return deleted
+"""
+
+# Счетчики меняются только если уже существуют: отсутствующий счетчик заново считается по БД,
+# а не начинается с нуля. Значение не опускается ниже нуля, срок жизни продлевается
+INCR_EXISTING_SCRIPT = """
+local result = {}
+for i, key in ipairs(KEYS) do
+    if redis.call('EXISTS', key) == 1 then
+        local value = redis.call('INCRBY', key, ARGV[i + 1])
+        if value < 0 then
+            value = 0
+            redis.call('SET', key, 0)
+        end
+        redis.call('EXPIRE', key, ARGV[1])
+        result[i] = value
+    else
+        result[i] = -1
+    end
+end
+return result
+"""
 
 
 class RedisService:
+    """
+    Кэш в два уровня: LRU в памяти процесса перед Redis. Удаление ключа публикуется в канал
+    cache:invalidate, и каждый процесс убирает свою локальную копию. Пока подписка не активна
+    (запуск, обрыв связи с Redis), локальный уровень не используется.
+    """
+
     def __init__(self):
         self.redis_client = Redis(host=settings.REDIS_HOST,
                                   port=settings.REDIS_PORT,
                                   password=settings.REDIS_PASSWORD,
                                   max_connections=100,
                                   decode_responses=True)
+        self.incr_existing_script = self.redis_client.register_script(INCR_EXISTING_SCRIPT)
+        self.release_lock_script = self.redis_client.register_script(RELEASE_LOCK_SCRIPT)
+        self.set_if_generation_script = self.redis_client.register_script(SET_IF_GENERATION_SCRIPT)
+        self.hdel_if_equal_script = self.redis_client.register_script(HDEL_IF_EQUAL_SCRIPT)
+        self.inflight: dict[str, asyncio.Task] = {}
+
+        self.local: LocalCache = LocalCache(settings.LOCAL_CACHE_MAX_BYTES)
+        self.local_enabled: bool = False
+        self.stats: CacheStats = CacheStats()
+        self.task: asyncio.Task | None = None
 
-    async def set_cache(self, key: str, value: BaseSchema, ex: int) -> None:
+    async def start(self) -> None:
+        if self.task is None and settings.LOCAL_CACHE_MAX_BYTES > 0:
+            pubsub = self.redis_client.pubsub()
+            await pubsub.subscribe(INVALIDATION_CHANNEL)
+            self.task = asyncio.create_task(self._listen(pubsub))
+
+    async def stop(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        self.local_enabled = False
+        self.local.clear()
+
+    async def _listen(self, pubsub) -> None:
+        try:
+            while True:
+                try:
+                    async for message in pubsub.listen():
+                        if message["type"] == "subscribe":
+                            # Подписка (в том числе после переподключения) активна: удаления больше не теряются
+                            self.local_enabled = True
+                        elif message["type"] == "message":
+                            for key in json.loads(message["data"]):
+                                self.local.delete(key)
+                                # Новые промахи не ждут загрузку, начатую до удаления
+                                self.inflight.pop(key, None)
+                except RedisError as e:
+                    # Удаления за время обрыва могли быть пропущены
+                    self.local_enabled = False
+                    self.local.clear()
+                    logger.error(f"CACHE INVALIDATION ERROR {e!r}")
+                    await asyncio.sleep(1)
+        finally:
+            await pubsub.aclose()
+
+    async def set_cache(self, key: str, value: BaseSchema, ex: int, local: bool = True) -> None:
         json_value = json.dumps(value, default=lambda v: v.model_dump(mode="json"))
         await self.redis_client.set(f"cache:{key}", json_value, ex=ex)
+        if local and self.local_enabled:
+            self.local.set(key, json.loads(json_value), len(json_value), min(ex, settings.LOCAL_CACHE_TTL))
+
+    async def get_cache(self, key: str, local: bool = True):
+        # Локальное значение общее для всех вызывающих и не должно изменяться
+        local = local and self.local_enabled
+        if local:
+            cached = self.local.get(key)
+            if cached is not None:
+                self.stats.local_hits += 1
+                return cached
+            self.stats.local_misses += 1
 
-    async def get_cache(self, key: str):
+        epoch = self.local.epoch
         value = await self.redis_client.get(f"cache:{key}")
         if value:
-            return json.loads(value)
+            self.stats.redis_hits += 1
+            result = json.loads(value)
+            # Пока шел запрос, ключ мог быть удален: такое значение в локальный кэш не попадает
+            if local and self.local_enabled and epoch == self.local.epoch:
+                self.local.set(key, result, len(value), settings.LOCAL_CACHE_TTL)
+            return result
+        self.stats.redis_misses += 1
         return None
 
     async def del_cache(self, key: str) -> None:
-        await self.redis_client.delete(f"cache:{key}")
+        await self.del_cache_many([key])
+
+    async def del_cache_many(self, keys: list[str]) -> None:
+        # Один DEL на все ключи и одно сообщение об удалении для остальных процессов
+        if not keys:
+            return
+        for key in keys:
+            self.local.delete(key)
+            self.inflight.pop(key, None)
+        self.stats.invalidations += len(keys)
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            pipe.delete(*(f"cache:{key}" for key in keys))
+            # Поколение ключа: загрузка, начатая до удаления, не запишет старое значение
+            for key in keys:
+                pipe.incr(f"gen:cache:{key}")
+                pipe.expire(f"gen:cache:{key}", settings.CACHE_GENERATION_TTL)
+            pipe.publish(INVALIDATION_CHANNEL, json.dumps(keys))
+            await pipe.execute()
+
+    async def get_or_compute(self,
+                             key: str,
+                             loader: Callable[[], Awaitable[Any]],
+                             ttl: int,
+                             stale_ttl: int = 0) -> Any:
+        """
+        Значение из кэша или результат loader. Одновременные промахи в процессе ждут одну загрузку,
+        между процессами - короткую блокировку в Redis. Еще stale_ttl секунд после ttl отдается старое
+        значение, пока один запрос обновляет его в фоне. Возвращаются JSON-данные или результат loader,
+        поэтому вызывающий приводит их к схеме через model_validate.
+        loader открывает свою сессию: загрузку ждут другие запросы, а обновление идет после ответа.
+        """
+        envelope = await self.get_cache(key)
+        if envelope is not None:
+            if envelope["expires_at"] > time.time():
+                return envelope["value"]
+            self.stats.stale_served += 1
+            if key not in self.inflight:
+                self._start_compute(key, loader, ttl, stale_ttl)
+            return envelope["value"]
+
+        task = self.inflight.get(key)
+        if task is not None:
+            self.stats.coalesced += 1
+        else:
+            task = self._start_compute(key, loader, ttl, stale_ttl)
+        # Отмена одного ожидающего запроса не прерывает загрузку для остальных
+        return await asyncio.shield(task)
+
+    def _start_compute(self,
+                       key: str,
+                       loader: Callable[[], Awaitable[Any]],
+                       ttl: int,
+                       stale_ttl: int) -> asyncio.Task:
+        task = asyncio.create_task(self._compute(key, loader, ttl, stale_ttl))
+        self.inflight[key] = task
+        task.add_done_callback(lambda t: self._compute_done(key, t))
+        return task
+
+    def _compute_done(self, key: str, task: asyncio.Task) -> None:
+        if self.inflight.get(key) is task:
+            del self.inflight[key]
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"CACHE COMPUTE ERROR {key} {task.exception()!r}")
+
+    async def _compute(self, key: str, loader: Callable[[], Awaitable[Any]], ttl: int, stale_ttl: int) -> Any:
+        lock_key = f"lock:cache:{key}"
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + settings.CACHE_LOCK_WAIT
+        while True:
+            if await self.redis_client.set(lock_key, token, px=settings.CACHE_LOCK_TTL_MS, nx=True):
+                try:
+                    generation = await self.redis_client.get(f"gen:cache:{key}") or ""
+                    epoch = self.local.epoch
+                    value = await loader()
+                    self.stats.computes += 1
+                    await self._store_computed(key, value, ttl, stale_ttl, generation, epoch)
+                    return value
+                finally:
+                    await self.release_lock_script(keys=[lock_key], args=[token])
+
+            # Значение загружает другой процесс: ждем его результат, а не повторяем запрос к БД
+            if time.monotonic() >= deadline:
+                logger.info(f"CACHE LOCK TIMEOUT {key}")
+                self.stats.computes += 1
+                return await loader()
+            await asyncio.sleep(settings.CACHE_LOCK_POLL_INTERVAL)
+            envelope = await self.get_cache(key, local=False)
+            if envelope is not None and envelope["expires_at"] > time.time():
+                self.stats.coalesced += 1
+                return envelope["value"]
+
+    async def _store_computed(self,
+                              key: str,
+                              value: Any,
+                              ttl: int,
+                              stale_ttl: int,
+                              generation: str,
+                              epoch: int) -> None:
+        json_value = json.dumps({"value": value, "expires_at": time.time() + ttl},
+                                default=lambda v: v.model_dump(mode="json"))
+        stored = await self.set_if_generation_script(keys=[f"cache:{key}", f"gen:cache:{key}"],
+                                                     args=[generation, json_value, ttl + stale_ttl])
+        if not stored:
+            self.stats.stale_discarded += 1
+            return
+        if self.local_enabled and epoch == self.local.epoch:
+            self.local.set(key, json.loads(json_value), len(json_value), min(ttl + stale_ttl, settings.LOCAL_CACHE_TTL))
+
+    async def get_counter(self, key: str) -> int | None:
+        value = await self.redis_client.get(f"counter:{key}")
+        return int(value) if value is not None else None
+
+    async def init_counter(self, key: str, value: int, ex: int) -> int:
+        # Значение, записанное параллельным запросом, не перезаписывается
+        if await self.redis_client.set(f"counter:{key}", value, ex=ex, nx=True):
+            return value
+        return await self.get_counter(key) or 0
+
+    async def incr_counters(self, deltas: dict[str, int], ex: int) -> dict[str, int]:
+        """Изменяет существующие счетчики одним вызовом и возвращает их новые значения."""
+        if not deltas:
+            return {}
+        keys = list(deltas)
+        values = await self.incr_existing_script(keys=[f"counter:{key}" for key in keys],
+                                                 args=[ex, *(deltas[key] for key in keys)])
+        return {key: value for key, value in zip(keys, values) if value >= 0}
+
+    async def del_counter(self, key: str) -> None:
+        await self.redis_client.delete(f"counter:{key}")
+
+    async def del_counters(self, prefix: str) -> None:
+        keys = [key async for key in self.redis_client.scan_iter(match=f"counter:{prefix}*", count=1000)]
+        if keys:
+            await self.redis_client.delete(*keys)
+
+    async def set_hash(self, key: str, mapping: dict) -> None:
+        await self.redis_client.hset(key, mapping=mapping)
+
+    async def get_hash(self, key: str) -> dict[str, str]:
+        return await self.redis_client.hgetall(key)
+
+    async def get_hash_fields(self, key: str, fields: list[str]) -> list[str | None]:
+        return await self.redis_client.hmget(key, fields)
+
+    async def del_hash_fields(self, key: str, fields: list[str]) -> None:
+        await self.redis_client.hdel(key, *fields)
+
+    async def del_hash_fields_if_equal(self, key: str, mapping: dict[str, str]) -> int:
+        if not mapping:
+            return 0
+        return await self.hdel_if_equal_script(keys=[key], args=[v for item in mapping.items() for v in item])
 
 
 redisService = RedisService()
@@ -1,11 +1,15 @@
-from fastapi import APIRouter, Depends
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.dependencies import get_session
 from app.db.models import User
 from app.db.models.user import UserRole
-from app.schemas.call import CallCreateSchema, CallModelSchema, CallFullInfoSchema
-from app.schemas.team import CoordinatesSchema
+from app.db.models.call import CallStatus, CallType
+from app.schemas.call import CallCreateSchema, CallModelSchema, CallFullInfoSchema, CallPageSchema, \
+    CallAssignmentSchema
+from app.schemas.team import CoordinatesSchema, TeamCandidateSchema
 from app.services.call_service import CallService, TroubleType
 from app.utils.auth_utils import require_role, required_roles
 
@@ -14,11 +18,17 @@ service = CallService()
 
 
 @router.get(path="/",
-            summary="Получить все вызовы",
-            response_model=list[CallModelSchema])
-async def get_calls(session: AsyncSession = Depends(get_session),
+            summary="Получить вызовы (постранично)",
+            response_model=CallPageSchema)
+async def get_calls(status: CallStatus | None = None,
+                    type: CallType | None = None,
+                    date_from: datetime | None = None,
+                    date_to: datetime | None = None,
+                    cursor: str | None = None,
+                    limit: int = Query(default=50, ge=1, le=200),
+                    session: AsyncSession = Depends(get_session),
                     user: User = Depends(require_role(UserRole.DISPATCHER))):
-    return await service.get_calls(session)
+    return await service.get_calls(session, status, type, date_from, date_to, cursor, limit)
 
 
 @router.get(path="/new",
@@ -46,6 +56,16 @@ async def get_call_by_id(call_id: int,
     return await service.get_call_by_id(call_id, session)
 
 
+@router.get(path="/{call_id}/candidates",
+            summary="Получить ближайшие свободные бригады для вызова",
+            response_model=list[TeamCandidateSchema])
+async def get_call_candidates(call_id: int,
+                              limit: int = Query(default=5, ge=1, le=50),
+                              session: AsyncSession = Depends(get_session),
+                              user: User = Depends(require_role(UserRole.DISPATCHER))):
+    return await service.get_call_candidates(call_id, limit, session)
+
+
 @router.get(path="/by_teamId/{team_id}",
             summary="Получить вызов по id бригады",
             response_model=CallModelSchema)
@@ -82,6 +102,14 @@ async def accept_call(call_id: int,
     return await service.accept_call(call_id, team_id, session)
 
 
+@router.post(path="/dispatch/batch",
+             summary="Назначить свободные бригады на новые вызовы",
+             response_model=list[CallAssignmentSchema])
+async def batch_dispatch(session: AsyncSession = Depends(get_session),
+                         user: User = Depends(require_role(UserRole.DISPATCHER))):
+    return await service.batch_dispatch(session)
+
+
 @router.patch(path="/reject/{call_id}",
               summary="Отклонить вызов",
               response_model=CallModelSchema)
@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Depends
+
+from app.db.models import User
+from app.db.models.user import UserRole
+from app.redis import redisService
+from app.schemas.metrics import CacheMetricsSchema, RoutingMetricsSchema, WebSocketMetricsSchema
+from app.services.connection_service import connection_service
+from app.utils.auth_utils import require_role
+from app.utils.route_cache import route_cache
+from app.utils.routing import route_http_client
+from app.utils.ws_connection import ws_stats
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+
+@router.get(path="/routing",
+            summary="Получить метрики сервиса маршрутизации",
+            response_model=RoutingMetricsSchema)
+async def get_routing_metrics(user: User = Depends(require_role(UserRole.ADMIN))):
+    return RoutingMetricsSchema(http=route_http_client.stats.snapshot(),
+                                cache=route_cache.stats())
+
+
+@router.get(path="/websocket",
+            summary="Получить метрики WebSocket-рассылки",
+            response_model=WebSocketMetricsSchema)
+async def get_websocket_metrics(user: User = Depends(require_role(UserRole.ADMIN))):
+    return WebSocketMetricsSchema(connections=len(connection_service.connections),
+                                  dispatchers=len(connection_service.dispatchers),
+                                  **ws_stats.snapshot())
+
+
+@router.get(path="/cache",
+            summary="Получить метрики кэша (локальный уровень и Redis)",
+            response_model=CacheMetricsSchema)
+async def get_cache_metrics(user: User = Depends(require_role(UserRole.ADMIN))):
+    return CacheMetricsSchema(**redisService.stats.snapshot(), **redisService.local.snapshot())
@@ -4,11 +4,21 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.dependencies import get_session
 from app.db.models import User
 from app.db.models.user import UserRole
-from app.services.notification_service import NotificationService
+from app.schemas.notification import UnreadCountSchema
+from app.services.user_service import UserService
 from app.utils.auth_utils import required_roles
 
 router = APIRouter(prefix="/notifications", tags=["Notifications"])
-service = NotificationService()
+user_service = UserService()
+
+
+@router.get(path="/unread_count",
+            summary="Получить число непрочитанных уведомлений",
+            response_model=UnreadCountSchema)
+async def get_unread_count(session: AsyncSession = Depends(get_session),
+                           user: User = Depends(
+                               required_roles([UserRole.ADMIN, UserRole.DISPATCHER, UserRole.WORKER]))):
+    return await user_service.get_unread_count(user, session)
 
 
 @router.delete(path="/{notification_id}",
@@ -18,4 +28,13 @@ async def del_notification(notification_id: int,
                            session: AsyncSession = Depends(get_session),
                            user: User = Depends(
                                required_roles([UserRole.ADMIN, UserRole.DISPATCHER, UserRole.WORKER]))):
-    return await service.del_notification(notification_id, session)
+    return await user_service.del_notification(user, notification_id, session)
+
+
+@router.post(path="/{notification_id}/read",
+             summary="Отметить уведомление прочитанным",
+             status_code=204)
+async def mark_read(notification_id: int,
+                    session: AsyncSession = Depends(get_session),
+                    user: User = Depends(required_roles([UserRole.ADMIN, UserRole.DISPATCHER, UserRole.WORKER]))):
+    return await user_service.mark_notification_read(user, notification_id, session)
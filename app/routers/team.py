@@ -17,7 +17,7 @@ service = TeamService()
             response_model=list[TeamModelSchema])
 async def get_teams(session: AsyncSession = Depends(get_session),
                     user: User = Depends(require_role(UserRole.DISPATCHER))):
-    return await service.get_teams(session)
+    return await service.get_teams_with_positions(session)
 
 
 @router.get(path="/full_info",
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Depends, Request, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.dependencies import get_session
@@ -7,7 +7,7 @@ from app.schemas.user import UserModelSchema, UserCreateSchema, UserUpdateSchema
 
 from app.services.user_service import UserService
 
-from app.schemas.notification import NotificationModelSchema
+from app.schemas.notification import NotificationPageSchema
 
 from app.utils.auth_utils import require_role, get_current_user, required_roles
 
@@ -87,10 +87,12 @@ async def delete_user(user_id: int,
 
 
 @router.get(path="/{user_id}/notifications",
-            summary="Получить уведомления пользователя",
-            response_model=list[NotificationModelSchema])
+            summary="Получить уведомления пользователя (постранично)",
+            response_model=NotificationPageSchema)
 async def get_user_notifications(user_id: int,
+                                 cursor: str | None = None,
+                                 limit: int = Query(default=15, ge=1, le=100),
                                  session: AsyncSession = Depends(get_session),
                                  user: User = Depends(
                                      required_roles([UserRole.ADMIN, UserRole.DISPATCHER, UserRole.WORKER]))):
-    return await service.get_user_notifications(user_id, session)
+    return await service.get_user_notifications(user_id, session, cursor, limit)
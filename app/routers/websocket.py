@@ -1,31 +1,49 @@
 import asyncio
 
-from fastapi import APIRouter, Depends, WebSocket
+from fastapi import APIRouter, Depends, WebSocket, Query
+from pydantic import ValidationError
 from starlette.websockets import WebSocketDisconnect
 
 from app.db.dependencies import get_manual_session
 from app.db.models.user import UserRole, User
 from app.services.connection_service import connection_service
+from app.schemas.websocket import WSEncoding, ViewportSchema
+from app.services.dispatcher_state_service import dispatcher_state_service
+from app.services.team_service import TeamService
 
 from app.utils.auth_utils import require_role_ws
+from app.utils.ws_encoding import negotiate_encoding
 
 from logger import logger
 
 router = APIRouter(prefix="/ws", tags=["WebSocket"])
+team_service = TeamService()
 
 
 @router.websocket(path="/dispatcher")
 async def connect_dispatcher(ws: WebSocket,
+                             since: int | None = Query(None, ge=0),
+                             encoding: WSEncoding = Query(WSEncoding.JSON),
                              dispatcher: User = Depends(require_role_ws(UserRole.DISPATCHER))):
-    await ws.accept()
+    encoding, subprotocol = negotiate_encoding(ws, encoding)
+    await ws.accept(subprotocol=subprotocol)
     logger.info(f"WS CONNECT Dispatcher {dispatcher.id}")
-    await connection_service.handle_connect_dispatcher(ws)
+    async with get_manual_session() as session:
+        await dispatcher_state_service.ensure_loaded(session)
+    await connection_service.handle_connect_dispatcher(ws, since, encoding, dispatcher.id)
     try:
         while True:
             try:
                 msg = await asyncio.wait_for(ws.receive_text(), timeout=180)
             except asyncio.TimeoutError:
                 continue
+            # Единственное сообщение от диспетчера - подписка на область карты
+            try:
+                viewport = ViewportSchema.model_validate_json(msg)
+            except ValidationError as e:
+                logger.info(f"WS BAD VIEWPORT Dispatcher {dispatcher.id} {e.errors()}")
+                continue
+            connection_service.subscribe_dispatcher(ws, viewport)
     except WebSocketDisconnect:
         logger.info(f"WS DISCONNECT Dispatcher {dispatcher.id}")
         await connection_service.handle_disconnect_dispatcher(ws)
@@ -33,11 +51,16 @@ async def connect_dispatcher(ws: WebSocket,
 
 @router.websocket(path="/worker")
 async def connect_worker(ws: WebSocket,
+                         since: int | None = Query(None, ge=0),
+                         position_rate: float | None = Query(None, gt=0),
+                         encoding: WSEncoding = Query(WSEncoding.JSON),
                          worker: User = Depends(require_role_ws(UserRole.WORKER))):
-    await ws.accept()
+    encoding, subprotocol = negotiate_encoding(ws, encoding)
+    await ws.accept(subprotocol=subprotocol)
     logger.info(f"WS CONNECT Worker {worker.id}")
     async with get_manual_session() as session:
-        await connection_service.handle_connect_worker(ws, worker, session)
+        worker_team = await team_service.get_team_by_user_id(worker.id, session)
+    await connection_service.handle_connect_worker(ws, worker.id, worker_team.id, since, position_rate, encoding)
 
     try:
         while True:
@@ -33,6 +33,17 @@ class CallModelSchema(BaseModelSchema, CallBaseSchema):
     pass
 
 
+class CallPageSchema(BaseSchema):
+    items: list[CallModelSchema]
+    next_cursor: str | None = None
+
+
+class CallAssignmentSchema(BaseSchema):
+    call_id: int = Field(gt=0)
+    team_id: int = Field(gt=0)
+    distance_km: float = Field(ge=0)
+
+
 class CallFullInfoSchema(BaseModelSchema):
     reason: str = Field(min_length=1, max_length=50)
     address: str = Field(min_length=1, max_length=80)
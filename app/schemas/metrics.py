@@ -0,0 +1,46 @@
+from app.schemas.base import BaseSchema
+
+
+class LatencyStatsSchema(BaseSchema):
+    requests: int
+    errors: int
+    avg_ms: float
+    p50_ms: float
+    p95_ms: float
+    max_ms: float
+
+
+class RouteCacheStatsSchema(BaseSchema):
+    hits_local: int
+    hits_redis: int
+    misses: int
+    hit_rate: float
+    size: int
+
+
+class RoutingMetricsSchema(BaseSchema):
+    http: LatencyStatsSchema
+    cache: RouteCacheStatsSchema
+
+
+class WebSocketMetricsSchema(BaseSchema):
+    connections: int
+    dispatchers: int
+    coalesced_positions: int
+    dropped_messages: int
+    slow_consumer_disconnects: int
+
+
+class CacheMetricsSchema(BaseSchema):
+    local_hits: int
+    local_misses: int
+    redis_hits: int
+    redis_misses: int
+    invalidations: int
+    computes: int
+    coalesced: int
+    stale_served: int
+    stale_discarded: int
+    local_entries: int
+    local_bytes: int
+    local_evictions: int
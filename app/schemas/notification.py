@@ -1,7 +1,8 @@
-from pydantic import Field
+from pydantic import Field, model_validator
 
 from app.schemas.base import BaseSchema, BaseModelSchema
 from app.db.models.notification import NotificationType
+from app.db.models.user import UserRole
 
 
 class NotificationBaseSchema(BaseSchema):
@@ -10,8 +11,29 @@ class NotificationBaseSchema(BaseSchema):
 
 
 class NotificationCreateSchema(NotificationBaseSchema):
-    user_id: int = Field(gt=0)
+    # Ровно один адресат: пользователь, все пользователи роли или работники бригады
+    user_id: int | None = Field(None, gt=0)
+    target_role: UserRole | None = None
+    target_team_id: int | None = Field(None, gt=0)
+
+    @model_validator(mode="after")
+    def check_single_target(self) -> "NotificationCreateSchema":
+        if sum(t is not None for t in (self.user_id, self.target_role, self.target_team_id)) != 1:
+            raise ValueError("Уведомление должно иметь ровно одного адресата")
+        return self
 
 
 class NotificationModelSchema(BaseModelSchema, NotificationBaseSchema):
-    user_id: int = Field(gt=0)
+    user_id: int | None = Field(None, gt=0)
+    target_role: UserRole | None = None
+    target_team_id: int | None = None
+    is_read: bool = False
+
+
+class NotificationPageSchema(BaseSchema):
+    items: list[NotificationModelSchema]
+    next_cursor: str | None = None
+
+
+class UnreadCountSchema(BaseSchema):
+    count: int
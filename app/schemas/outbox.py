@@ -0,0 +1,24 @@
+from pydantic import Field
+
+from app.db.models.user import UserRole
+from app.schemas.base import BaseSchema
+from app.schemas.notification import NotificationBaseSchema
+
+
+class OutboxNotificationSchema(NotificationBaseSchema):
+    # Получатели: рассылки ролям и бригадам (одна строка на адресата) и отдельные пользователи
+    roles: list[UserRole] = Field(default_factory=list)
+    team_ids: list[int] = Field(default_factory=list)
+    user_ids: list[int] = Field(default_factory=list)
+
+
+class OutboxMessageSchema(BaseSchema):
+    # Готовый JSON события и канал шины (dispatchers или team:{id})
+    channel: str
+    text: str
+
+
+class OutboxPayloadSchema(BaseSchema):
+    notifications: list[OutboxNotificationSchema] = Field(default_factory=list)
+    cache_keys: list[str] = Field(default_factory=list)
+    messages: list[OutboxMessageSchema] = Field(default_factory=list)
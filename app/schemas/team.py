@@ -28,6 +28,25 @@ class TeamFullInfoSchema(BaseModelSchema):
     is_busy: bool
 
 
+class TeamStateSchema(TeamFullInfoSchema):
+    lat: float
+    lon: float
+
+
+class TeamPositionSchema(BaseSchema):
+    team_id: int
+    lat: float
+    lon: float
+
+
+class TeamCandidateSchema(BaseSchema):
+    team_id: int = Field(gt=0)
+    lat: float
+    lon: float
+    distance_km: float = Field(ge=0)
+    eta_minutes: float = Field(ge=0)
+
+
 class CoordinatesSchema(BaseSchema):
     lat: float = Field(ge=59.7, le=60.2)
     lon: float = Field(ge=29.6, le=30.9)
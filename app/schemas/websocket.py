@@ -1,8 +1,10 @@
 from enum import StrEnum
 
+from pydantic import model_validator
+
 from app.schemas.base import BaseSchema
-from app.schemas.call import CallModelSchema, CallFullInfoSchema
-from app.schemas.team import TeamModelSchema, CoordinatesSchema
+from app.schemas.call import CallModelSchema, CallFullInfoSchema, CallAssignmentSchema
+from app.schemas.team import TeamModelSchema, CoordinatesSchema, TeamStateSchema, TeamPositionSchema
 
 
 class EventType(StrEnum):
@@ -10,6 +12,16 @@ class EventType(StrEnum):
     CALL_ACCEPTED = "call_accepted"
     CALL_REJECTED = "call_rejected"
     AVAILABLE_TEAM = "available_team"
+    CALLS_ASSIGNED = "calls_assigned"
+
+    SNAPSHOT = "snapshot"
+    CALL_ADDED = "call_added"
+    CALL_CHANGED = "call_changed"
+    CALL_REMOVED = "call_removed"
+    TEAM_BUSY = "team_busy"
+    TEAM_FREE = "team_free"
+    TEAM_POSITIONS = "team_positions"
+    TEAMS_CHANGED = "teams_changed"
 
     MOVE_STARTED = "move_started"
     MOVE_TEAM = "move_team"
@@ -18,6 +30,16 @@ class EventType(StrEnum):
     COMPLETED_CALL = "completed_call"
     TROUBLE_CALL = "trouble_call"
 
+    UNREAD_COUNT = "unread_count"
+    UNREAD_COUNTS = "unread_counts"
+
+    RESYNC = "resync"
+
+
+class WSEncoding(StrEnum):
+    JSON = "json"
+    MSGPACK = "msgpack"
+
 
 class BaseWSMessage(BaseSchema):
     event: EventType
@@ -36,10 +58,50 @@ class CallRejectedMessage(BaseWSMessage):
     call_id: int
 
 
+class CallsAssignedMessage(BaseWSMessage):
+    assignments: list[CallAssignmentSchema]
+
+
 class AvailableTeamMessage(BaseWSMessage):
     team: TeamModelSchema
 
 
+class DispatcherSnapshotMessage(BaseWSMessage):
+    # Актуальные вызовы и бригады; последующие изменения приходят событиями с номером больше seq
+    seq: int
+    calls: list[CallModelSchema]
+    teams: list[TeamStateSchema]
+
+
+class CallAddedMessage(BaseWSMessage):
+    call: CallModelSchema
+
+
+class CallChangedMessage(BaseWSMessage):
+    call: CallModelSchema
+
+
+class CallRemovedMessage(BaseWSMessage):
+    call_id: int
+
+
+class TeamBusyMessage(BaseWSMessage):
+    team_id: int
+
+
+class TeamFreeMessage(BaseWSMessage):
+    team_id: int
+
+
+class TeamPositionsMessage(BaseWSMessage):
+    positions: list[TeamPositionSchema]
+
+
+class TeamsChangedMessage(BaseWSMessage):
+    # Состав бригад или исправность автомобилей изменились: снимок нужно запросить заново
+    pass
+
+
 class MoveStartedMessage(BaseWSMessage):
     pass
 
@@ -62,3 +124,38 @@ class CompletedCallMessage(BaseWSMessage):
 
 class TroubleCallMessage(BaseWSMessage):
     call_id: int
+
+
+class ViewportSchema(BaseSchema):
+    # Подписка диспетчера на область карты; без bbox и districts приходят все события
+    bbox: tuple[float, float, float, float] | None = None  # min_lat, min_lon, max_lat, max_lon
+    districts: list[str] | None = None
+
+    @model_validator(mode="after")
+    def check_bbox(self) -> "ViewportSchema":
+        if self.bbox is None:
+            return self
+        if self.bbox[0] > self.bbox[2] or self.bbox[1] > self.bbox[3]:
+            raise ValueError("bbox: минимум больше максимума")
+        # Область обрезается по границам зоны обслуживания, как в CoordinatesSchema
+        min_lat, min_lon = max(self.bbox[0], 59.7), max(self.bbox[1], 29.6)
+        max_lat, max_lon = min(self.bbox[2], 60.2), min(self.bbox[3], 30.9)
+        if min_lat > max_lat or min_lon > max_lon:
+            raise ValueError("bbox: область вне зоны обслуживания")
+        self.bbox = (min_lat, min_lon, max_lat, max_lon)
+        return self
+
+
+class ResyncMessage(BaseWSMessage):
+    # Пропущенные события недоступны: клиент перезагружает данные и продолжает с этого номера
+    seq: int
+
+
+class UnreadCountsMessage(BaseWSMessage):
+    # Сообщение шины: новые значения счетчиков непрочитанных уведомлений по id пользователя
+    counts: dict[int, int]
+
+
+class UnreadCountMessage(BaseWSMessage):
+    # Клиенту приходит только его счетчик, без номера события: пропуск восполняется запросом счетчика
+    count: int
@@ -1,29 +1,44 @@
-import asyncio
 from collections import defaultdict
+
+import numpy as np
+from datetime import datetime
 from enum import StrEnum
-from sqlalchemy import or_, and_
+from sqlalchemy import or_, and_, exists
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import noload
 
-from app.db.dependencies import get_manual_session
 from app.db.repository import Repository
 from app.db.models.call import Call, CallStatus, CallType
+from app.db.models.team import Team
+from app.db.models.user import UserRole
 from app.redis import redisService
 
-from app.schemas.call import CallCreateSchema, CallModelSchema, CallFullInfoSchema
-from app.schemas.car import CarUpdateSchema
-from app.schemas.notification import NotificationBaseSchema, NotificationType
+from app.schemas.call import CallCreateSchema, CallModelSchema, CallFullInfoSchema, CallPageSchema, \
+    CallAssignmentSchema
+from app.schemas.notification import NotificationType
+from app.schemas.outbox import OutboxNotificationSchema, OutboxPayloadSchema
 
 from app.exceptions.call import CallNotFoundException, CallAlreadyExistsException, TeamCallNotFound
-from app.schemas.team import CoordinatesSchema, TeamModelSchema
+from app.exceptions.routing import RoutingException
+from app.schemas.team import CoordinatesSchema, TeamModelSchema, TeamCandidateSchema
 from app.schemas.websocket import NewCallMessage, EventType, CallAcceptedMessage, CallRejectedMessage, \
-    AvailableTeamMessage, CompletedCallMessage, AssignedCallMessage, MoveTeamMessage, MoveFinishedMessage, \
-    TroubleCallMessage, MoveStartedMessage
+    AvailableTeamMessage, CompletedCallMessage, AssignedCallMessage, \
+    TroubleCallMessage, MoveStartedMessage, CallsAssignedMessage, CallAddedMessage, CallChangedMessage, \
+    CallRemovedMessage, TeamBusyMessage, TeamFreeMessage, TeamsChangedMessage
 from app.services.car_service import CarService
 from app.services.connection_service import connection_service, ConnectionService
+from app.services.movement_service import MovementService, movement_service
+from app.services.outbox_service import OutboxService, outbox_service
+from app.services.position_service import PositionService, position_service
 
 from app.services.user_service import UserService
-from app.services.notification_service import NotificationService
+from app.utils.assignment import assign_teams
+from app.utils.call_queue import CallQueue, new_calls_queue
+from app.utils.event_bus import DISPATCHERS_CHANNEL
+from app.utils.pagination import encode_cursor, decode_cursor
 from app.utils.routing import Router
+from app.utils.team_locator import TeamLocator, team_locator
+from app.settings import settings
 
 
 class TroubleType(StrEnum):
@@ -37,27 +52,56 @@ class CallService:
         self.repo: Repository = Repository(Call)
 
         self.user_service: UserService = UserService()
-        self.notification_service: NotificationService = NotificationService()
         self.car_service: CarService = CarService()
         self.connection_service: ConnectionService = connection_service
         self.routing_service: Router = Router()
         self.redisService = redisService
+        self.new_calls_queue: CallQueue = new_calls_queue
+        self.team_locator: TeamLocator = team_locator
 
-        self.routes: dict[int, list[CoordinatesSchema]] = defaultdict(list)
-        self.move_tasks: dict[int, asyncio.Task] = {}
+        self.movement_service: MovementService = movement_service
+        self.position_service: PositionService = position_service
+        self.outbox_service: OutboxService = outbox_service
 
-    async def get_calls(self, session: AsyncSession):
-        return await self.repo.get(session)
+        self.routes: dict[int, list[CoordinatesSchema]] = defaultdict(list)
 
-    async def get_new_calls(self, session: AsyncSession):
+    async def get_calls(self,
+                        session: AsyncSession,
+                        status: CallStatus | None = None,
+                        call_type: CallType | None = None,
+                        date_from: datetime | None = None,
+                        date_to: datetime | None = None,
+                        cursor: str | None = None,
+                        limit: int = 50) -> CallPageSchema:
+        conditions = []
+        if status: conditions.append(Call.status == status)
+        if call_type: conditions.append(Call.type == call_type)
+        if date_from: conditions.append(Call.date_time >= date_from)
+        if date_to: conditions.append(Call.date_time <= date_to)
+
+        calls = await self.repo.get_custom(session,
+                                           conditions=conditions,
+                                           options=[noload(Call.patient), noload(Call.team)],
+                                           keyset=[Call.date_time, Call.id],
+                                           keyset_after=decode_cursor(cursor) if cursor else None,
+                                           limit=limit + 1)
+
+        items = [CallModelSchema.model_validate(c) for c in calls[:limit]]
+        next_cursor = encode_cursor(items[-1].date_time, items[-1].id) if len(calls) > limit else None
+
+        return CallPageSchema(items=items, next_cursor=next_cursor)
+
+    async def load_new_calls(self, session: AsyncSession) -> None:
+        # Номер читается до выборки, дальше индекс догоняет БД по событиям
+        seq = await self.connection_service.event_bus.last_seq(DISPATCHERS_CHANNEL)
         calls = await self.repo.get_by_filters(session, status=CallStatus.NEW)
-        priority = {
-            CallType.CRITICAL: 0,
-            CallType.IMPORTANT: 1,
-            CallType.COMMON: 2,
-        }
-        calls.sort(key=lambda c: (priority[c.type], -c.date_time.timestamp()))
-        return calls
+        self.new_calls_queue.rebuild([CallModelSchema.model_validate(c) for c in calls], seq)
+        self.connection_service.reapply(seq, self.new_calls_queue.apply)
+
+    async def get_new_calls(self, session: AsyncSession) -> list[CallModelSchema]:
+        if not self.new_calls_queue.is_loaded:
+            await self.load_new_calls(session)
+        return self.new_calls_queue.get_all()
 
     async def get_actual_calls(self, session: AsyncSession):
         return await self.repo.get_by_conditions(
@@ -71,6 +115,25 @@ class CallService:
             raise CallNotFoundException()
         return CallModelSchema.model_validate(call)
 
+    async def get_call_candidates(self, call_id: int, limit: int, session: AsyncSession) -> list[TeamCandidateSchema]:
+        call = self.new_calls_queue.calls.get(call_id)
+        if not call:
+            call = await self.get_call_by_id(call_id, session)
+
+        if not self.team_locator.is_loaded:
+            await self.user_service.team_service.load_team_locator(session)
+
+        result = []
+        for distance, team_id in self.team_locator.nearest_free(call.lat, call.lon, limit):
+            lat, lon = self.team_locator.positions[team_id]
+            eta = distance * settings.ROUTE_DETOUR_FACTOR / settings.TEAM_AVERAGE_SPEED_KMH * 60
+            result.append(TeamCandidateSchema(team_id=team_id,
+                                              lat=lat,
+                                              lon=lon,
+                                              distance_km=round(distance, 3),
+                                              eta_minutes=round(eta, 1)))
+        return result
+
     async def get_call_by_team_id(self, team_id: int, session: AsyncSession) -> CallModelSchema:
         cached = await self.redisService.get_cache(f"calls:by_team_id{team_id}")
         if cached:
@@ -96,7 +159,15 @@ class CallService:
         if not call:
             raise CallNotFoundException()
 
-        result = CallFullInfoSchema(
+        result = self._to_full_info(call)
+
+        await self.redisService.set_cache(f"calls:full_info{call_id}", result, 240)
+
+        return result
+
+    @staticmethod
+    def _to_full_info(call: Call) -> CallFullInfoSchema:
+        return CallFullInfoSchema(
             id=call.id,
             reason=call.reason,
             address=call.address,
@@ -114,10 +185,6 @@ class CallService:
             lon=call.lon,
         )
 
-        await self.redisService.set_cache(f"calls:full_info{call_id}", result, 240)
-
-        return result
-
     async def get_active_calls(self, session: AsyncSession) -> list:
         return [CallModelSchema.model_validate(c) for c in await self.repo.get_by_filters(session, status=CallStatus.NEW)]
 
@@ -127,86 +194,175 @@ class CallService:
             raise CallAlreadyExistsException()
 
         call_to_create = Call(**call.model_dump())
-        created_call = CallModelSchema.model_validate(await self.repo.create(session, call_to_create))
-
-        # Уведомления диспетчерам
-        dispatchers = await self.user_service.get_users_by_filters(session, role="dispatcher")
-        dispatchers_ids = [d.id for d in dispatchers]
-        await self.notification_service.notify_users(dispatchers_ids,
-                                                     NotificationBaseSchema(notification_type=NotificationType.MESSAGE,
-                                                                            text="Новый вызов"),
-                                                     session)
-
-        # Оповещение диспетчеров через WS
-        await self.connection_service.notify_dispatchers(NewCallMessage(event=EventType.NEW_CALL,
-                                                                        call=created_call))
+        created_call = CallModelSchema.model_validate(await self.repo.create(session, call_to_create, commit=False))
+
+        # Уведомления и оповещения диспетчеров через WS выполняются после фиксации через outbox
+        messages = [self.outbox_service.to_dispatchers(NewCallMessage(event=EventType.NEW_CALL, call=created_call))]
+        if created_call.status in (CallStatus.NEW, CallStatus.ACCEPTED):
+            messages.append(self.outbox_service.to_dispatchers(CallAddedMessage(event=EventType.CALL_ADDED,
+                                                                                call=created_call)))
+        await self.outbox_service.commit(session, OutboxPayloadSchema(
+            notifications=[OutboxNotificationSchema(roles=[UserRole.DISPATCHER],
+                                                    notification_type=NotificationType.MESSAGE,
+                                                    text="Новый вызов")],
+            messages=messages))
+
+        if created_call.status == CallStatus.NEW:
+            self.new_calls_queue.push(created_call)
 
         return created_call
 
     async def accept_call(self, call_id: int, team_id: int, session: AsyncSession) -> CallModelSchema:
-        await self.repo.update(session, call_id, team_id=team_id, status=CallStatus.ACCEPTED)
+        # Строка бригады блокируется до фиксации, пакетное назначение ее пропустит
+        await self.user_service.team_service.repo.get_custom(session,
+                                                             conditions=[Team.id == team_id],
+                                                             options=[noload("*")],
+                                                             for_update=True)
+        await self.repo.update(session, call_id, commit=False, team_id=team_id, status=CallStatus.ACCEPTED)
+
+        updated_call = await self.repo.get_by_id(session, call_id)
+        call = CallModelSchema.model_validate(updated_call)
+
+        await self.outbox_service.commit(session, OutboxPayloadSchema(
+            notifications=[OutboxNotificationSchema(team_ids=[team_id],
+                                                    notification_type=NotificationType.MESSAGE,
+                                                    text="Назначен вызов")],
+            cache_keys=["teams:full_info", f"calls:full_info{call_id}"],
+            messages=[
+                # Оповещение диспетчеров через WS
+                self.outbox_service.to_dispatchers(CallAcceptedMessage(event=EventType.CALL_ACCEPTED,
+                                                                       call_id=call_id,
+                                                                       team_id=team_id)),
+                self.outbox_service.to_dispatchers(CallChangedMessage(event=EventType.CALL_CHANGED, call=call)),
+                self.outbox_service.to_dispatchers(TeamBusyMessage(event=EventType.TEAM_BUSY, team_id=team_id)),
+                # Оповещение работников через WS
+                self.outbox_service.to_workers(team_id, AssignedCallMessage(event=EventType.ASSIGNED_CALL,
+                                                                            call=self._to_full_info(updated_call))),
+            ]))
+
+        self.new_calls_queue.remove(call_id)
+        self.team_locator.set_busy(team_id, True)
 
-        team = await self.user_service.team_service.get_team_by_id(team_id, session)
-        await self.notification_service.notify_users([team.worker1_id, team.worker2_id, team.worker3_id],
-                                                     NotificationBaseSchema(notification_type=NotificationType.MESSAGE,
-                                                                            text="Назначен вызов"),
-                                                     session)
+        return call
 
-        call = CallModelSchema.model_validate(await self.repo.get_by_id(session, call_id))
+    async def batch_dispatch(self, session: AsyncSession) -> list[CallAssignmentSchema]:
+        if not self.new_calls_queue.is_loaded:
+            await self.load_new_calls(session)
+        if not self.team_locator.is_loaded:
+            await self.user_service.team_service.load_team_locator(session)
+
+        calls = self.new_calls_queue.get_all()
+        free_teams = list(self.team_locator.free_index.points.items())
+        if not calls or not free_teams:
+            return []
+
+        pairs = assign_teams(np.array([coords for _, coords in free_teams]),
+                             np.array([(c.lat, c.lon) for c in calls]),
+                             [c.type for c in calls])
+
+        # Блокировка вызовов: назначаются только те, что еще не приняты другим диспетчером
+        locked_calls = await self.repo.get_custom(session,
+                                                  conditions=[Call.id.in_([calls[c].id for _, c, _ in pairs]),
+                                                              Call.status == CallStatus.NEW],
+                                                  options=[noload(Call.team)],
+                                                  for_update=True)
+        locked_calls = {c.id: c for c in locked_calls}
+
+        # Индекс свободных бригад локальный и может отставать: бригады блокируются и перепроверяются по БД.
+        # Заблокированные другой транзакцией пропускаются, а не ожидаются
+        has_accepted = exists().where(Call.team_id == Team.id, Call.status == CallStatus.ACCEPTED)
+        locked_teams = await self.user_service.team_service.repo.get_custom(
+            session,
+            conditions=[Team.id.in_([free_teams[t][0] for t, _, _ in pairs]), ~Team.is_deleted, ~has_accepted],
+            options=[noload("*")],
+            for_update=True,
+            skip_locked=True)
+        locked_teams = {t.id for t in locked_teams}
+
+        assignments = [CallAssignmentSchema(call_id=calls[c].id, team_id=free_teams[t][0], distance_km=round(d, 3))
+                       for t, c, d in pairs if calls[c].id in locked_calls and free_teams[t][0] in locked_teams]
+
+        if not assignments:
+            await session.rollback()
+            return []
+
+        await self.repo.update_many(session,
+                                    [{"id": a.call_id, "team_id": a.team_id, "status": CallStatus.ACCEPTED}
+                                     for a in assignments],
+                                    commit=False)
+
+        # Оповещение диспетчеров через WS одним сообщением
+        messages = [self.outbox_service.to_dispatchers(CallsAssignedMessage(event=EventType.CALLS_ASSIGNED,
+                                                                            assignments=assignments))]
+        for a in assignments:
+            messages.append(self.outbox_service.to_dispatchers(CallChangedMessage(
+                event=EventType.CALL_CHANGED,
+                call=CallModelSchema.model_validate(locked_calls[a.call_id]).model_copy(
+                    update={"status": CallStatus.ACCEPTED, "team_id": a.team_id}))))
+            messages.append(self.outbox_service.to_dispatchers(TeamBusyMessage(event=EventType.TEAM_BUSY,
+                                                                               team_id=a.team_id)))
 
-        await self.redisService.del_cache("teams:full_info")
+        # Оповещение работников через WS
+        for a in assignments:
+            messages.append(self.outbox_service.to_workers(a.team_id, AssignedCallMessage(
+                event=EventType.ASSIGNED_CALL,
+                call=self._to_full_info(locked_calls[a.call_id]).model_copy(update={"status": CallStatus.ACCEPTED}))))
 
-        # Оповещение диспетчеров через WS
-        await self.connection_service.notify_dispatchers(CallAcceptedMessage(event=EventType.CALL_ACCEPTED,
-                                                                             call_id=call_id,
-                                                                             team_id=team_id))
+        await self.outbox_service.commit(session, OutboxPayloadSchema(
+            notifications=[OutboxNotificationSchema(team_ids=[a.team_id for a in assignments],
+                                                    notification_type=NotificationType.MESSAGE,
+                                                    text="Назначен вызов")],
+            cache_keys=["teams:full_info"] + [f"calls:full_info{a.call_id}" for a in assignments],
+            messages=messages))
 
-        # Оповещение работников через WS
-        await self.connection_service.notify_workers(team_id, AssignedCallMessage(event=EventType.ASSIGNED_CALL,
-                                                                                  call=(await self.get_call_full_info(
-                                                                                      call_id, session))))
+        for a in assignments:
+            self.new_calls_queue.remove(a.call_id)
+            self.team_locator.set_busy(a.team_id, True)
 
-        return call
+        return assignments
 
     async def reject_call(self, call_id: int, session: AsyncSession) -> CallModelSchema:
-        await self.repo.update(session, call_id, status=CallStatus.REJECTED)
+        await self.repo.update(session, call_id, commit=False, status=CallStatus.REJECTED)
 
         # Оповещение диспетчеров через WS
-        await self.connection_service.notify_dispatchers(CallRejectedMessage(event=EventType.CALL_REJECTED,
-                                                                             call_id=call_id))
-
-        await self.redisService.del_cache(f"calls:full_info{call_id}")
+        await self.outbox_service.commit(session, OutboxPayloadSchema(
+            cache_keys=[f"calls:full_info{call_id}"],
+            messages=[self.outbox_service.to_dispatchers(CallRejectedMessage(event=EventType.CALL_REJECTED,
+                                                                             call_id=call_id)),
+                      self.outbox_service.to_dispatchers(CallRemovedMessage(event=EventType.CALL_REMOVED,
+                                                                            call_id=call_id))]))
+        self.new_calls_queue.remove(call_id)
 
         return CallModelSchema.model_validate(await self.repo.get_by_id(session, call_id))
 
     async def complete_call(self, call_id: int, session: AsyncSession):
         # Установка статуса завершен
-        await self.repo.update(session, call_id, status=CallStatus.COMPLETED)
-
-        # Уведомления диспетчерам
-        dispatchers = await self.user_service.get_users_by_filters(session, role="dispatcher")
-        dispatchers_ids = [d.id for d in dispatchers]
-        await self.notification_service.notify_users(dispatchers_ids,
-                                                     NotificationBaseSchema(notification_type=NotificationType.SUCCESS,
-                                                                            text=f"Вызов {call_id} выполнен"),
-                                                     session)
-        # Перестановка бригады в точку вызова
+        await self.repo.update(session, call_id, commit=False, status=CallStatus.COMPLETED)
+
         call = await self.repo.get_by_id(session, call_id)
         team = call.team
-        await self.user_service.team_service.move_team(team.id, CoordinatesSchema(lat=call.lat, lon=call.lon), session)
-
-        # Оповещение диспетчеров через WS
-        await self.connection_service.notify_dispatchers(AvailableTeamMessage(event=EventType.AVAILABLE_TEAM,
-                                                                              team=TeamModelSchema.model_validate(
-                                                                                  team)))
-
-        # Оповещение работников через WS
-        await self.connection_service.notify_workers(team.id, CompletedCallMessage(event=EventType.COMPLETED_CALL,
-                                                                                   call_id=call_id))
+        # Бригада переставляется в точку вызова после фиксации, в событии - уже новые координаты
+        free_team = TeamModelSchema.model_validate(team).model_copy(update={"lat": call.lat, "lon": call.lon})
+
+        await self.outbox_service.commit(session, OutboxPayloadSchema(
+            # Уведомления диспетчерам
+            notifications=[OutboxNotificationSchema(roles=[UserRole.DISPATCHER],
+                                                    notification_type=NotificationType.SUCCESS,
+                                                    text=f"Вызов {call_id} выполнен")],
+            cache_keys=["teams:full_info", f"calls:by_team_id{team.id}", f"calls:full_info{call_id}"],
+            messages=[
+                # Оповещение диспетчеров через WS
+                self.outbox_service.to_dispatchers(AvailableTeamMessage(event=EventType.AVAILABLE_TEAM,
+                                                                        team=free_team)),
+                self.outbox_service.to_dispatchers(CallRemovedMessage(event=EventType.CALL_REMOVED, call_id=call_id)),
+                self.outbox_service.to_dispatchers(TeamFreeMessage(event=EventType.TEAM_FREE, team_id=team.id)),
+                # Оповещение работников через WS
+                self.outbox_service.to_workers(team.id, CompletedCallMessage(event=EventType.COMPLETED_CALL,
+                                                                             call_id=call_id)),
+            ]))
 
-        await self.redisService.del_cache("teams:full_info")
-        await self.redisService.del_cache(f"calls:by_team_id{call.team_id}")
-        await self.redisService.del_cache(f"calls:full_info{call_id}")
+        await self.user_service.team_service.move_team(team.id, CoordinatesSchema(lat=call.lat, lon=call.lon), session)
+        self.team_locator.set_busy(team.id, False)
 
         return call
 
@@ -214,53 +370,55 @@ class CallService:
         call = await self.repo.get_by_id(session, call_id)
         if not call:
             raise CallNotFoundException()
+        team = call.team
 
-        await self.user_service.team_service.set_is_moving_team(call.team_id, False, session)
-        if call.team_id in self.routes:
-            del self.routes[call.team_id]
-        task = self.move_tasks.pop(call.team_id, None)
-        if task and not task.done():
-            task.cancel()
-
-        await self.redisService.del_cache("teams:full_info")
-        await self.redisService.del_cache(f"calls:by_team_id{call.team_id}")
-
-        await self.repo.update(session, call_id, status=CallStatus.NEW, team_id=None)
-
-        if trouble_type == TroubleType.CAR_BROKEN:
-            team_car = call.team.car
-            await self.car_service.update_car(team_car.id, CarUpdateSchema(number=team_car.number, status=False),
-                                              session)
-
-            admins = await self.user_service.get_users_by_filters(session, role="admin")
-            admins_ids = [d.id for d in admins]
-            await self.notification_service.notify_users(admins_ids,
-                                                         NotificationBaseSchema(
-                                                             notification_type=NotificationType.TROUBLE,
-                                                             text=f"Автомобиль {team_car.number} сломан"),
-                                                         session)
-
-        dispatchers = await self.user_service.get_users_by_filters(session, role="dispatcher")
-        dispatchers_ids = [d.id for d in dispatchers]
-
-        await self.notification_service.notify_users(dispatchers_ids,
-                                                     NotificationBaseSchema(
-                                                         notification_type=NotificationType.TROUBLE,
-                                                         text=f"Проблема на вызове {call_id}: {trouble_type}"),
-                                                     session)
-
-        # Оповещение диспетчеров через WS
-        await self.connection_service.notify_dispatchers(NewCallMessage(event=EventType.NEW_CALL,
-                                                                        call=CallModelSchema.model_validate(
-                                                                            call)))
-
-        await self.connection_service.notify_dispatchers(AvailableTeamMessage(event=EventType.AVAILABLE_TEAM,
-                                                                              team=TeamModelSchema.model_validate(
-                                                                                  call.team)))
-
-        # Оповещение работников через WS
-        await self.connection_service.notify_workers(call.team.id, TroubleCallMessage(event=EventType.TROUBLE_CALL,
-                                                                                      call_id=call_id))
+        await self.user_service.team_service.repo.update(session, team.id, commit=False, is_moving=False)
+        await self.repo.update(session, call_id, commit=False, status=CallStatus.NEW, team_id=None)
+        new_call = CallModelSchema.model_validate(call).model_copy(update={"status": CallStatus.NEW, "team_id": None})
+
+        notifications = []
+        cache_keys = ["teams:full_info", f"calls:by_team_id{team.id}"]
+        team_car = team.car
+        car_broken = trouble_type == TroubleType.CAR_BROKEN
+        if car_broken:
+            if team_car.status:
+                await self.car_service.repo.update(session, team_car.id, commit=False, status=False)
+                cache_keys += ["cars", "cars:free"]
+            notifications.append(OutboxNotificationSchema(roles=[UserRole.ADMIN],
+                                                          notification_type=NotificationType.TROUBLE,
+                                                          text=f"Автомобиль {team_car.number} сломан"))
+
+        notifications.append(OutboxNotificationSchema(roles=[UserRole.DISPATCHER],
+                                                      notification_type=NotificationType.TROUBLE,
+                                                      text=f"Проблема на вызове {call_id}: {trouble_type}"))
+
+        messages = [
+            # Оповещение диспетчеров через WS
+            self.outbox_service.to_dispatchers(NewCallMessage(event=EventType.NEW_CALL, call=new_call)),
+            self.outbox_service.to_dispatchers(AvailableTeamMessage(event=EventType.AVAILABLE_TEAM,
+                                                                    team=await self.position_service.apply(
+                                                                        TeamModelSchema.model_validate(team)))),
+            self.outbox_service.to_dispatchers(CallChangedMessage(event=EventType.CALL_CHANGED, call=new_call)),
+            self.outbox_service.to_dispatchers(TeamFreeMessage(event=EventType.TEAM_FREE, team_id=team.id)),
+            # Оповещение работников через WS
+            self.outbox_service.to_workers(team.id, TroubleCallMessage(event=EventType.TROUBLE_CALL,
+                                                                       call_id=call_id)),
+        ]
+        if car_broken:
+            # Бригада со сломанным автомобилем выпадает из свободных в индексах всех процессов
+            messages.append(self.outbox_service.to_dispatchers(TeamsChangedMessage(event=EventType.TEAMS_CHANGED)))
+
+        await self.outbox_service.commit(session, OutboxPayloadSchema(
+            notifications=notifications,
+            cache_keys=cache_keys,
+            messages=messages))
+
+        self.routes.pop(team.id, None)
+        self.movement_service.cancel(team.id)
+        self.new_calls_queue.push(new_call)
+        self.team_locator.set_busy(team.id, False)
+        if car_broken:
+            self.team_locator.set_car_ok(team.id, False)
 
         return await self.repo.get_by_id(session, call_id)
 
@@ -270,14 +428,18 @@ class CallService:
             raise CallNotFoundException()
         team = call.team
 
+        if self.movement_service.is_moving(team.id):
+            return self.movement_service.remaining_route(team.id)
+
+        team_lat, team_lon = await self.position_service.get(team.id) or (team.lat, team.lon)
         cached_route = self.routes[team.id]
         if cached_route:
             for i in range(len(cached_route)):
-                if abs(cached_route[i].lat - team.lat) < 0.00005 and abs(cached_route[i].lon - team.lon) < 0.00005:
+                if abs(cached_route[i].lat - team_lat) < 0.00005 and abs(cached_route[i].lon - team_lon) < 0.00005:
                     self.routes[team.id] = cached_route[i:]
                     return self.routes[team.id]
 
-        route = await self.routing_service.get_route(CoordinatesSchema(lat=team.lat, lon=team.lon),
+        route = await self.routing_service.get_route(CoordinatesSchema(lat=team_lat, lon=team_lon),
                                                      CoordinatesSchema(lat=call.lat, lon=call.lon))
         self.routes[team.id] = route
         return route
@@ -286,35 +448,26 @@ class CallService:
         call = await self.repo.get_by_id(session, call_id)
         if not call:
             raise CallNotFoundException()
+        team = call.team
 
-        await self.connection_service.notify_workers(call.team.id, MoveStartedMessage(event=EventType.MOVE_STARTED))
-
-        task = asyncio.create_task(self.start_move_background(call_id))
-        self.move_tasks[call.team_id] = task
-
-    async def start_move_background(self, call_id: int) -> None:
-        async with get_manual_session() as session:
-            call = await self.repo.get_by_id(session, call_id)
-            if not call:
-                raise CallNotFoundException()
-            team = call.team
-
-            if team.is_moving:
-                return
+        if self.movement_service.is_moving(team.id):
+            return
 
-            await self.user_service.team_service.set_is_moving_team(team.id, True, session)
-            for point in self.routes[team.id]:
-                if not team.is_moving:
-                    return
+        if not self.routes[team.id]:
+            await self.get_call_route(call_id, session)
+        route = self.routes.pop(team.id, None)
+        # Без маршрута флаг is_moving некому было бы снять
+        if not route:
+            raise RoutingException()
 
-                await self.user_service.team_service.move_team(team.id, CoordinatesSchema(lat=point.lat, lon=point.lon),
-                                                               session)
-                await self.connection_service.notify_workers(team.id, MoveTeamMessage(event=EventType.MOVE_TEAM,
-                                                                                      coordinates=point))
-                await asyncio.sleep(0.25)
+        # Движение могло начаться в другом процессе: флаг перечитывается из строки бригады под блокировкой
+        await session.refresh(team, attribute_names=["is_moving"], with_for_update=True)
+        if team.is_moving:
+            await session.rollback()
+            return
 
-            await self.user_service.team_service.set_is_moving_team(team.id, False, session)
-            await self.connection_service.notify_workers(team.id, MoveFinishedMessage(event=EventType.MOVE_FINISHED))
+        await self.user_service.team_service.set_is_moving_team(team.id, True, session)
+        await self.connection_service.notify_workers(team.id, MoveStartedMessage(event=EventType.MOVE_STARTED))
 
-            del self.routes[team.id]
-            self.move_tasks.pop(team.id, None)
+        # Маршрут передается планировщику движения, он же снимает флаг is_moving по прибытии
+        self.movement_service.add(team.id, route)
@@ -1,18 +1,25 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.db.dependencies import get_manual_session
 from app.db.repository import Repository
 from app.db.models.car import Car
 from app.redis import redisService
+from app.settings import settings
 
 from app.schemas.car import CarCreateSchema, CarModelSchema, CarUpdateSchema
 
 from app.exceptions.car import CarAlreadyExistsException, CarNotFoundException, CarBusyException
+from app.schemas.websocket import TeamsChangedMessage, EventType
+from app.services.connection_service import connection_service, ConnectionService
+from app.utils.team_locator import TeamLocator, team_locator
 
 
 class CarService:
     def __init__(self):
         self.repo: Repository = Repository(Car)
         self.redisService = redisService
+        self.team_locator: TeamLocator = team_locator
+        self.connection_service: ConnectionService = connection_service
 
     async def get_cars(self, session: AsyncSession) -> list[CarModelSchema]:
         cached = await self.redisService.get_cache("cars")
@@ -26,16 +33,16 @@ class CarService:
         return result
 
     async def get_free_cars(self, session: AsyncSession) -> list[CarModelSchema]:
-        cached = await self.redisService.get_cache("cars:free")
-        if cached:
-            return [CarModelSchema.model_validate(car_dict) for car_dict in cached]
-
-        cars = await self.repo.get_by_filters(session, is_deleted=False)
-        result = [CarModelSchema.model_validate(c) for c in cars if not c.team and c.status]
+        cars = await self.redisService.get_or_compute("cars:free",
+                                                      self.__load_free_cars,
+                                                      ttl=300,
+                                                      stale_ttl=settings.CACHE_STALE_TTL)
+        return [CarModelSchema.model_validate(car) for car in cars]
 
-        await self.redisService.set_cache("cars:free", result, 300)
-
-        return result
+    async def __load_free_cars(self) -> list[CarModelSchema]:
+        async with get_manual_session() as session:
+            cars = await self.repo.get_by_filters(session, is_deleted=False)
+            return [CarModelSchema.model_validate(c) for c in cars if not c.team and c.status]
 
     async def add_car(self, car: CarCreateSchema, session: AsyncSession) -> CarModelSchema:
         existing_car = await self.repo.get_by_filters(session, number=car.number, is_deleted=False)
@@ -67,6 +74,10 @@ class CarService:
             raise CarAlreadyExistsException()
 
         await self.repo.update(session, car_id, **car_data.model_dump())
+        if existing_car.team and not existing_car.team.is_deleted:
+            self.team_locator.set_car_ok(existing_car.team.id, car_data.status)
+            # Исправность автомобиля меняет свободные бригады в индексах остальных процессов
+            await self.connection_service.notify_dispatchers(TeamsChangedMessage(event=EventType.TEAMS_CHANGED))
 
         await self.redisService.del_cache("cars")
         await self.redisService.del_cache("cars:free")
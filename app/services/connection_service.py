@@ -1,28 +1,60 @@
+import json
 from collections import defaultdict
+from collections.abc import Callable
 
 from fastapi import WebSocket
-from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.models import User
 from app.schemas.websocket import (
     NewCallMessage,
     CallAcceptedMessage,
     CallRejectedMessage,
     AvailableTeamMessage,
+    CallsAssignedMessage,
+    CallAddedMessage,
+    CallChangedMessage,
+    CallRemovedMessage,
+    TeamBusyMessage,
+    TeamFreeMessage,
+    TeamPositionsMessage,
+    TeamsChangedMessage,
     MoveTeamMessage,
     MoveFinishedMessage,
     AssignedCallMessage,
     CompletedCallMessage,
     TroubleCallMessage,
+    ResyncMessage,
+    UnreadCountMessage,
+    EventType,
+    WSEncoding,
+    ViewportSchema,
 )
-from app.services.team_service import TeamService
+from app.redis import redisService
+from app.settings import settings
+from app.utils.call_queue import CallQueue, new_calls_queue
+from app.utils.dispatcher_state import DispatcherState, dispatcher_state
+from app.utils.team_locator import TeamLocator, team_locator
+from app.utils.viewport_index import Area, Polygon, ViewportIndex, load_districts
+from app.utils.event_bus import DISPATCHERS_CHANNEL, TEAM_CHANNEL_PREFIX, UNREAD_CHANNEL, InMemoryEventBus, \
+    RedisEventBus, EventHistory, create_event_bus, team_channel
+from app.utils.ws_connection import ClientConnection
+from app.utils.ws_encoding import MessageEncoder, ws_encoder
 from logger import logger
 
+MOVE_TEAM_EVENT = f'"event":"{EventType.MOVE_TEAM}"'
+
 DispatcherMessage = (
         NewCallMessage
         | CallAcceptedMessage
         | CallRejectedMessage
         | AvailableTeamMessage
+        | CallsAssignedMessage
+        | CallAddedMessage
+        | CallChangedMessage
+        | CallRemovedMessage
+        | TeamBusyMessage
+        | TeamFreeMessage
+        | TeamPositionsMessage
+        | TeamsChangedMessage
 )
 
 WorkerMessage = (
@@ -36,47 +68,237 @@ WorkerMessage = (
 
 class ConnectionService:
     def __init__(self):
-        self.team_service = TeamService()
+        self.encoder: MessageEncoder = ws_encoder
+        self.dispatcher_state: DispatcherState = dispatcher_state
+        # Индексы вызовов и бригад каждого процесса догоняют изменения других процессов по событиям
+        self.new_calls_queue: CallQueue = new_calls_queue
+        self.team_locator: TeamLocator = team_locator
+        # События публикуются в шину, а до сокетов доходят через _deliver в каждом процессе
+        self.event_bus: InMemoryEventBus | RedisEventBus = create_event_bus(redisService.redis_client,
+                                                                            self._deliver)
 
+        self.connections: dict[WebSocket, ClientConnection] = {}
         self.dispatchers: set[WebSocket] = set()
+        # Диспетчеры без подписки на область получают все события, остальные - через индекс областей
+        self.unfiltered: set[WebSocket] = set()
+        self.viewports: ViewportIndex = ViewportIndex(settings.WS_VIEWPORT_CELL_DEG, settings.WS_VIEWPORT_MAX_CELLS)
+        self.districts: dict[str, list[Polygon]] = {}
         self.workers: dict[WebSocket, int] = defaultdict(int)
         self.teams: dict[int, set[WebSocket]] = defaultdict(set)
+        self.user_ids: dict[WebSocket, int] = {}
+        self.users: dict[int, set[WebSocket]] = defaultdict(set)
+        # Последние события каждого канала для дозагрузки пропущенного при переподключении
+        self.history: dict[str, EventHistory] = defaultdict(lambda: EventHistory(settings.WS_REPLAY_BUFFER_SIZE))
+
+    async def start(self) -> None:
+        self.districts = load_districts(settings.DISTRICTS_PATH)
+        await self.event_bus.start()
+
+    async def stop(self) -> None:
+        await self.event_bus.stop()
+
+    def _open(self,
+              ws: WebSocket,
+              position_rate_hz: float | None = None,
+              encoding: WSEncoding = WSEncoding.JSON) -> None:
+        connection = ClientConnection(ws, on_close=self._forget, position_rate_hz=position_rate_hz, encoding=encoding)
+        self.connections[ws] = connection
+        connection.start()
+
+    def _forget(self, ws: WebSocket) -> None:
+        self.connections.pop(ws, None)
+        self.dispatchers.discard(ws)
+        self.unfiltered.discard(ws)
+        self.viewports.unsubscribe(ws)
+        team_id = self.workers.pop(ws, None)
+        if team_id is not None:
+            self.teams[team_id].discard(ws)
+            if not self.teams[team_id]:
+                del self.teams[team_id]
+        user_id = self.user_ids.pop(ws, None)
+        if user_id is not None:
+            self.users[user_id].discard(ws)
+            if not self.users[user_id]:
+                del self.users[user_id]
+
+    async def _replay(self, channel: str, since: int | None) -> list[str]:
+        # Диспетчер без номера или с слишком старым номером получает снимок состояния
+        with_snapshot = channel == DISPATCHERS_CHANNEL and self.dispatcher_state.is_loaded
+        if since is None:
+            return [self.encoder.encode(self.dispatcher_state.snapshot())] if with_snapshot else []
 
-    async def handle_connect_dispatcher(self, ws: WebSocket) -> None:
+        history = self.history[channel]
+        if history.covers(since):
+            replay = history.after(since)
+            if len(replay) <= settings.WS_SEND_QUEUE_SIZE:
+                return replay
+
+        # Локальный буфер не покрывает разрыв (например, процесс только запущен)
+        last = await self.event_bus.last_seq(channel)
+        if since == last:
+            return history.after(since)
+
+        if since < last and last - since <= settings.WS_SEND_QUEUE_SIZE:
+            # Пропущенные события берутся из потока Redis, если он включен
+            entries = await self.event_bus.history(channel, since, settings.WS_SEND_QUEUE_SIZE)
+            if entries and entries[0][0] == since + 1:
+                replay = [text for _, text in entries if not self._is_position(text)]
+                replay += history.after(entries[-1][0])
+                if len(replay) <= settings.WS_SEND_QUEUE_SIZE:
+                    return replay
+
+        if with_snapshot:
+            return [self.encoder.encode(self.dispatcher_state.snapshot())]
+        return [self.encoder.encode(ResyncMessage(event=EventType.RESYNC, seq=last))]
+
+    def _attach(self,
+                ws: WebSocket,
+                replay: list[str],
+                position_rate_hz: float | None = None,
+                encoding: WSEncoding = WSEncoding.JSON) -> None:
+        # Между дозагрузкой и подпиской на новые события нет await, поэтому события не теряются
+        self._open(ws, position_rate_hz, encoding)
+        for payload in replay:
+            self.connections[ws].send(payload)
+
+    def _bind_user(self, ws: WebSocket, user_id: int | None) -> None:
+        # Личные события (счетчик непрочитанных) идут на все соединения пользователя
+        if user_id is not None:
+            self.user_ids[ws] = user_id
+            self.users[user_id].add(ws)
+
+    async def handle_connect_dispatcher(self,
+                                        ws: WebSocket,
+                                        since: int | None = None,
+                                        encoding: WSEncoding = WSEncoding.JSON,
+                                        user_id: int | None = None) -> None:
+        replay = await self._replay(DISPATCHERS_CHANNEL, since)
+        self._attach(ws, replay, encoding=encoding)
         self.dispatchers.add(ws)
+        self.unfiltered.add(ws)
+        self._bind_user(ws, user_id)
+
+    def subscribe_dispatcher(self, ws: WebSocket, viewport: ViewportSchema) -> None:
+        connection = self.connections.get(ws)
+        if connection is None:
+            return
+
+        unknown = set(viewport.districts or ()) - self.districts.keys()
+        if unknown:
+            logger.info(f"WS UNKNOWN DISTRICTS {sorted(unknown)}")
+        polygons = [p for name in viewport.districts or () for p in self.districts.get(name, ())]
+
+        area = None
+        if viewport.bbox is not None or viewport.districts is not None:
+            area = Area(viewport.bbox, polygons)
+            if not self.viewports.subscribe(ws, area):
+                # Слишком большая область: подписка на все события
+                logger.info(f"WS VIEWPORT TOO LARGE {viewport.bbox} {viewport.districts}")
+                area = None
+
+        if area is not None:
+            self.unfiltered.discard(ws)
+        else:
+            self.viewports.unsubscribe(ws)
+            self.unfiltered.add(ws)
+
+        # Снимок новой области; следующие события идут уже по новой подписке
+        if self.dispatcher_state.is_loaded:
+            connection.send(self.encoder.encode(self.dispatcher_state.snapshot(area)))
+
+    def _disconnect(self, ws: WebSocket) -> None:
+        connection = self.connections.get(ws)
+        if connection is not None:
+            connection.stop()
+        self._forget(ws)
 
     async def handle_disconnect_dispatcher(self, ws: WebSocket) -> None:
-        self.dispatchers.discard(ws)
+        self._disconnect(ws)
 
     async def handle_connect_worker(self,
                                     ws: WebSocket,
-                                    worker: User,
-                                    session: AsyncSession) -> None:
-        worker_team = await self.team_service.get_team_by_user_id(worker.id, session)
-        self.workers[ws] = worker_team.id
-        self.teams[worker_team.id].add(ws)
+                                    worker_id: int,
+                                    team_id: int,
+                                    since: int | None = None,
+                                    position_rate_hz: float | None = None,
+                                    encoding: WSEncoding = WSEncoding.JSON) -> None:
+        replay = await self._replay(team_channel(team_id), since)
+        self._attach(ws, replay, position_rate_hz, encoding)
+        self.workers[ws] = team_id
+        self.teams[team_id].add(ws)
+        self._bind_user(ws, worker_id)
 
     async def handle_disconnect_worker(self, ws: WebSocket) -> None:
-        self.teams[self.workers[ws]].discard(ws)
-        del self.workers[ws]
+        self._disconnect(ws)
+
+    @staticmethod
+    def _is_position(payload: str) -> bool:
+        # Событие идет сразу за номером: {"seq":N,"event":"move_team",...}
+        return payload.startswith(MOVE_TEAM_EVENT, payload.index(",") + 1)
+
+    def _deliver(self, channel: str, seq: int, payload: str) -> None:
+        # Рассылка только ставит сообщение в очереди соединений и не ждет медленных клиентов
+        if channel == DISPATCHERS_CHANNEL:
+            event = json.loads(payload)
+            points = self.dispatcher_state.locate(event) if self.viewports.areas else None
+            self.history[channel].append(seq, payload)
+            self.dispatcher_state.apply(seq, event)
+            self.new_calls_queue.apply(seq, event)
+            self.team_locator.apply(seq, event)
+
+            recipients = self.dispatchers if points is None else self.unfiltered
+            for ws in list(recipients):
+                self.connections[ws].send(payload)
+            if points is not None:
+                for ws in self.viewports.match(points):
+                    self.connections[ws].send(payload)
+            return
+
+        if channel == UNREAD_CHANNEL:
+            # Одно событие шины на пачку счетчиков; история не нужна, важно только последнее значение
+            for user_id, count in json.loads(payload)["counts"].items():
+                sockets = self.users.get(int(user_id))
+                if sockets:
+                    text = self.encoder.encode(UnreadCountMessage(event=EventType.UNREAD_COUNT, count=count))
+                    for ws in list(sockets):
+                        self.connections[ws].send(text)
+            return
+
+        team_id = int(channel.removeprefix(TEAM_CHANNEL_PREFIX))
+        sockets = list(self.teams.get(team_id, ()))
+        if self._is_position(payload):
+            # Координаты не попадают в историю: при переподключении старые позиции не нужны
+            self.history[channel].seen(seq)
+            for ws in sockets:
+                self.connections[ws].send_position(team_id, payload)
+            return
+
+        self.history[channel].append(seq, payload)
+        for ws in sockets:
+            self.connections[ws].send(payload)
+
+    def reapply(self, seq: int, apply: Callable[[int, dict], None]) -> None:
+        """
+        Повторяет полученные процессом события канала диспетчеров с номером больше seq.
+        Вызывается после перестроения состояния из БД: события, пришедшие во время чтения,
+        были применены к старому состоянию.
+        """
+        for event_seq, text in self.history[DISPATCHERS_CHANNEL].entries_after(seq):
+            apply(event_seq, json.loads(text))
 
     async def notify_dispatchers(self, message: DispatcherMessage) -> None:
         logger.info(f"WS SEND Dispatcher {message.event}")
 
-        for d in self.dispatchers:
-            try:
-                await d.send_json(message.model_dump(mode="json"))
-            except Exception:
-                await self.handle_disconnect_dispatcher(d)
+        await self.publish(DISPATCHERS_CHANNEL, self.encoder.encode(message))
 
     async def notify_workers(self, team_id: int, message: WorkerMessage) -> None:
         logger.info(f"WS SEND Worker {message.event}")
 
-        for ws in self.teams[team_id]:
-            try:
-                await ws.send_json(message.model_dump(mode="json"))
-            except Exception:
-                await self.handle_disconnect_worker(ws)
+        await self.publish(team_channel(team_id), self.encoder.encode(message))
+
+    async def publish(self, channel: str, text: str) -> None:
+        # Уже закодированное событие, например из outbox
+        await self.event_bus.publish(channel, text)
 
 
 connection_service = ConnectionService()
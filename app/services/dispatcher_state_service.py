@@ -0,0 +1,97 @@
+import asyncio
+
+from sqlalchemy import or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.call import Call, CallStatus
+from app.db.repository import Repository
+from app.schemas.call import CallModelSchema
+from app.schemas.team import TeamStateSchema, TeamPositionSchema
+from app.schemas.websocket import TeamPositionsMessage, EventType
+from app.services.connection_service import connection_service, ConnectionService
+from app.services.position_service import PositionService, position_service
+from app.services.team_service import TeamService
+from app.settings import settings
+from app.utils.dispatcher_state import DispatcherState, dispatcher_state
+from app.utils.event_bus import DISPATCHERS_CHANNEL
+
+from logger import logger
+
+
+class DispatcherStateService:
+    """
+    Загружает состояние диспетчерского экрана и рассылает координаты бригад пачкой раз
+    в DISPATCHER_POSITIONS_INTERVAL секунд. Изменения вызовов и занятости бригад публикуются через outbox.
+    """
+
+    def __init__(self):
+        self.call_repo: Repository = Repository(Call)
+        self.team_service: TeamService = TeamService()
+        self.connection_service: ConnectionService = connection_service
+        self.position_service: PositionService = position_service
+        self.dispatcher_state: DispatcherState = dispatcher_state
+
+        self.task: asyncio.Task | None = None
+
+    async def load(self, session: AsyncSession) -> None:
+        """
+        Номер читается до снимка: событие, опубликованное во время чтения, уже отражено в БД
+        или будет применено поверх снимка. Снимок строится по БД, а не по кэшу со stale-while-revalidate,
+        иначе занятость бригад могла бы отставать от номера.
+        """
+        seq = await self.connection_service.event_bus.last_seq(DISPATCHERS_CHANNEL)
+
+        calls = await self.call_repo.get_by_conditions(
+            session,
+            or_(Call.status == CallStatus.NEW, Call.status == CallStatus.ACCEPTED))
+        teams = await self.team_service.get_teams(session)
+        positions = await self.position_service.get_many([t.id for t in teams])
+
+        team_states = []
+        for t in teams:
+            lat, lon = positions.get(t.id, (t.lat, t.lon))
+            team_states.append(TeamStateSchema(**self.team_service.to_full_info(t).model_dump(),
+                                               lat=lat,
+                                               lon=lon).model_dump(mode="json"))
+
+        self.dispatcher_state.rebuild([CallModelSchema.model_validate(c).model_dump(mode="json") for c in calls],
+                                      team_states,
+                                      seq)
+        self.connection_service.reapply(seq, self.dispatcher_state.apply)
+
+    async def ensure_loaded(self, session: AsyncSession) -> None:
+        if not self.dispatcher_state.is_loaded:
+            await self.load(session)
+
+    def start(self) -> None:
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(settings.DISPATCHER_POSITIONS_INTERVAL)
+            try:
+                await self.publish_positions()
+            except Exception as e:
+                logger.error(f"DISPATCHER POSITIONS ERROR {e!r}")
+
+    async def publish_positions(self) -> None:
+        changed = self.position_service.pop_changed()
+        if not changed:
+            return
+        await self.connection_service.notify_dispatchers(TeamPositionsMessage(
+            event=EventType.TEAM_POSITIONS,
+            positions=[TeamPositionSchema(team_id=team_id, lat=lat, lon=lon)
+                       for team_id, (lat, lon) in changed.items()]))
+
+
+dispatcher_state_service = DispatcherStateService()
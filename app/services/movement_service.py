@@ -0,0 +1,100 @@
+import asyncio
+from collections import deque
+
+from app.db.dependencies import get_manual_session
+from app.db.models.team import Team
+from app.db.repository import Repository
+from app.schemas.team import CoordinatesSchema
+from app.schemas.websocket import MoveTeamMessage, MoveFinishedMessage, EventType
+from app.services.connection_service import connection_service, ConnectionService
+from app.services.position_service import PositionService, position_service
+from app.settings import settings
+
+from logger import logger
+
+
+class MovementService:
+    """
+    Единый планировщик движения бригад: за один тик все активные маршруты сдвигаются на точку,
+    позиции попадают в буфер отложенной записи, сообщения работникам рассылаются пачкой.
+    """
+
+    def __init__(self):
+        self.team_repo: Repository = Repository(Team)
+        self.connection_service: ConnectionService = connection_service
+        self.position_service: PositionService = position_service
+
+        self.routes: dict[int, deque[CoordinatesSchema]] = {}
+        self.task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    def is_moving(self, team_id: int) -> bool:
+        return team_id in self.routes
+
+    def remaining_route(self, team_id: int) -> list[CoordinatesSchema]:
+        return list(self.routes.get(team_id, ()))
+
+    def add(self, team_id: int, route: list[CoordinatesSchema]) -> None:
+        if route:
+            self.routes[team_id] = deque(route)
+
+    def cancel(self, team_id: int) -> None:
+        self.routes.pop(team_id, None)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            try:
+                await self.tick()
+            except Exception as e:
+                logger.error(f"MOVEMENT TICK ERROR {e!r}")
+            await asyncio.sleep(max(0.0, settings.MOVEMENT_TICK_INTERVAL - (loop.time() - started)))
+
+    def _advance(self) -> tuple[dict[int, CoordinatesSchema], list[int]]:
+        positions = {}
+        finished = []
+        for team_id, route in self.routes.items():
+            positions[team_id] = route.popleft()
+            if not route:
+                finished.append(team_id)
+        for team_id in finished:
+            del self.routes[team_id]
+        return positions, finished
+
+    async def _flush(self, rows: list[dict]) -> None:
+        async with get_manual_session() as session:
+            await self.team_repo.update_many(session, rows)
+
+    async def tick(self) -> None:
+        if not self.routes:
+            return
+
+        positions, finished = self._advance()
+
+        await self.position_service.set_many({team_id: (point.lat, point.lon) for team_id, point in positions.items()})
+        if finished:
+            await self._flush([{"id": team_id, "is_moving": False} for team_id in finished])
+
+        await asyncio.gather(
+            *(self.connection_service.notify_workers(team_id, MoveTeamMessage(event=EventType.MOVE_TEAM,
+                                                                              coordinates=point))
+              for team_id, point in positions.items()))
+        await asyncio.gather(
+            *(self.connection_service.notify_workers(team_id, MoveFinishedMessage(event=EventType.MOVE_FINISHED))
+              for team_id in finished))
+
+
+movement_service = MovementService()
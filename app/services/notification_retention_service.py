@@ -0,0 +1,172 @@
+import asyncio
+import gzip
+import re
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.dependencies import get_manual_session
+from app.db.locks import NOTIFICATION_RETENTION_LOCK, try_advisory_xact_lock
+from app.redis import redisService
+from app.settings import settings
+
+from logger import logger
+
+PARTITION_PREFIX = "notification_p"
+DEFAULT_PARTITION = "notification_default"
+PARTITION_NAME = re.compile(rf"^{PARTITION_PREFIX}(\d{{4}})(\d{{2}})$")
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    years, index = divmod(month.month - 1 + months, 12)
+    return month.replace(year=month.year + years, month=index + 1)
+
+
+def month_start(moment: datetime) -> datetime:
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def partition_name(month: datetime) -> str:
+    return f"{PARTITION_PREFIX}{month:%Y%m}"
+
+
+class NotificationRetentionService:
+    """
+    Обслуживание месячных секций таблицы notification: заранее создает секции следующих месяцев,
+    выгружает секции старше NOTIFICATION_RETENTION_DAYS в сжатый CSV и удаляет их вместе с отметками.
+    Удаление секции занимает секунды вместо DELETE по строкам и не оставляет раздутых индексов.
+    Работу выполняет один процесс (advisory-блокировка).
+    """
+
+    def __init__(self):
+        self.redisService = redisService
+        self.task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.ensure_partitions()
+                await self.drop_expired()
+            except Exception as e:
+                logger.error(f"RETENTION ERROR {e!r}")
+            await asyncio.sleep(settings.NOTIFICATION_RETENTION_INTERVAL)
+
+    @staticmethod
+    async def _partitions(session: AsyncSession) -> dict[str, datetime]:
+        res = await session.execute(text("SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                                         "WHERE i.inhparent = 'notification'::regclass"))
+        partitions = {}
+        for name in res.scalars().all():
+            match = PARTITION_NAME.match(name)
+            if match:
+                partitions[name] = datetime(int(match[1]), int(match[2]), 1)
+        return partitions
+
+    @staticmethod
+    async def _default_months(session: AsyncSession) -> set[datetime]:
+        # Месяцы уведомлений, для которых не было секции: после простоя или с заданным задним числом created_at
+        res = await session.execute(text(f"SELECT DISTINCT date_trunc('month', created_at) FROM {DEFAULT_PARTITION}"))
+        return set(res.scalars().all())
+
+    @staticmethod
+    async def _create_partition(session: AsyncSession, month: datetime, from_default: bool = False) -> str:
+        name = partition_name(month)
+        bounds = f"FROM ('{month:%Y-%m-%d}') TO ('{add_months(month, 1):%Y-%m-%d}')"
+        if not from_default:
+            await session.execute(text(f'CREATE TABLE "{name}" PARTITION OF notification FOR VALUES {bounds}'))
+            return name
+
+        # Секцию нельзя создать, пока ее строки лежат в секции по умолчанию: она отсоединяется,
+        # строки месяца переносятся в новую секцию, и секция по умолчанию присоединяется обратно
+        await session.execute(text(f'ALTER TABLE notification DETACH PARTITION "{DEFAULT_PARTITION}"'))
+        await session.execute(text(f'CREATE TABLE "{name}" PARTITION OF notification FOR VALUES {bounds}'))
+        await session.execute(text(f'WITH moved AS (DELETE FROM "{DEFAULT_PARTITION}" '
+                                   f"WHERE created_at >= '{month:%Y-%m-%d}' "
+                                   f"AND created_at < '{add_months(month, 1):%Y-%m-%d}' RETURNING *) "
+                                   f"INSERT INTO notification SELECT * FROM moved"))
+        await session.execute(text(f'ALTER TABLE notification ATTACH PARTITION "{DEFAULT_PARTITION}" DEFAULT'))
+        return name
+
+    async def ensure_partitions(self) -> list[str]:
+        # Отдельная короткая транзакция: создание секции блокирует запись в таблицу до фиксации
+        current = month_start(datetime.utcnow())
+        async with get_manual_session() as session:
+            if not await try_advisory_xact_lock(session, NOTIFICATION_RETENTION_LOCK):
+                return []
+            existing = await self._partitions(session)
+            in_default = await self._default_months(session)
+            months = {add_months(current, i) for i in range(settings.NOTIFICATION_PARTITIONS_AHEAD + 1)} | in_default
+            created = []
+            for month in sorted(months):
+                if partition_name(month) in existing:
+                    continue
+                created.append(await self._create_partition(session, month, month in in_default))
+            await session.commit()
+
+        if created:
+            logger.info(f"RETENTION CREATED {created}")
+        return created
+
+    async def drop_expired(self) -> list[str]:
+        border = datetime.utcnow() - timedelta(days=settings.NOTIFICATION_RETENTION_DAYS)
+        async with get_manual_session() as session:
+            if not await try_advisory_xact_lock(session, NOTIFICATION_RETENTION_LOCK):
+                return []
+            # Секция удаляется, когда в ней не осталось уведомлений новее границы хранения
+            expired = sorted(name for name, month in (await self._partitions(session)).items()
+                             if add_months(month, 1) <= border)
+            if not expired:
+                await session.rollback()
+                return []
+
+            # Выгрузка читает секции без блокировки записи; исключительные блокировки берутся в конце
+            if settings.NOTIFICATION_ARCHIVE_DIR:
+                for name in expired:
+                    await self._archive(session, name)
+            for name in expired:
+                await session.execute(text(f'DELETE FROM notificationreceipt r USING "{name}" p '
+                                           f"WHERE r.notification_id = p.id"))
+                await session.execute(text(f'ALTER TABLE notification DETACH PARTITION "{name}"'))
+                await session.execute(text(f'DROP TABLE "{name}"'))
+            await session.commit()
+
+        # Удаленные уведомления могли быть непрочитанными: счетчики пересчитаются по БД
+        await self.redisService.del_counters("notifications:unread:")
+        logger.info(f"RETENTION DROPPED {expired}")
+        return expired
+
+    @staticmethod
+    async def _archive(session: AsyncSession, name: str) -> Path:
+        directory = Path(settings.NOTIFICATION_ARCHIVE_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{name}.csv.gz"
+        partial = directory / f"{name}.csv.gz.part"
+
+        # COPY в той же транзакции, что и удаление: в архив попадает ровно удаляемое содержимое
+        connection = await session.connection()
+        raw = await connection.get_raw_connection()
+        with gzip.open(partial, "wb") as archive:
+            async def write(chunk: bytes) -> None:
+                await asyncio.to_thread(archive.write, chunk)
+
+            await raw.driver_connection.copy_from_table(name, output=write, format="csv", header=True)
+        partial.replace(path)
+        return path
+
+
+notification_retention_service = NotificationRetentionService()
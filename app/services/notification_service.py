@@ -1,47 +1,204 @@
-from sqlalchemy import desc
+from collections import Counter
+
+from sqlalchemy import exists, or_
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import noload
 
 from app.db.repository import Repository
-from app.db.models.notification import Notification
+from app.db.models.notification import Notification, NotificationReceipt
+from app.db.models.user import UserRole
+from app.exceptions.notification import NotificationNotFoundException
 from app.redis import redisService
+from app.schemas.websocket import EventType, UnreadCountsMessage
+from app.services.connection_service import connection_service, ConnectionService
+from app.settings import settings
+from app.utils.event_bus import UNREAD_CHANNEL
+from app.utils.pagination import encode_cursor, decode_cursor
 
-from app.schemas.notification import NotificationCreateSchema, NotificationModelSchema, NotificationBaseSchema
+from app.schemas.notification import NotificationCreateSchema, NotificationModelSchema, NotificationBaseSchema, \
+    NotificationPageSchema
 
 
 class NotificationService:
+    """
+    Личные уведомления хранятся строкой на пользователя, рассылки роли или бригаде - одной строкой
+    на адресата (fan-out on read). Прочтение и скрытие рассылки отмечаются в NotificationReceipt.
+    Число непрочитанных хранится в Redis и меняется при записи, прочтении и удалении уведомлений.
+    """
+
     def __init__(self):
         self.repo: Repository = Repository(Notification)
+        self.receipt_repo: Repository = Repository(NotificationReceipt)
+        self.connection_service: ConnectionService = connection_service
         self.redisService = redisService
 
     async def notify_user(self, note: NotificationCreateSchema, session: AsyncSession) -> NotificationModelSchema:
-        await self.redisService.del_cache(f"notifications:{note.user_id}")
         created_note = await self.repo.create(session, Notification(**note.model_dump()))
+        await self.change_unread({note.user_id: 1})
         return NotificationModelSchema.model_validate(created_note)
 
     async def notify_users(self, ids: list[int], note: NotificationBaseSchema, session: AsyncSession) -> None:
-        for i in ids:
-            await self.notify_user(NotificationCreateSchema(text=note.text,
-                                                            notification_type=note.notification_type,
-                                                            user_id=i), session)
+        await self.notify_many([NotificationCreateSchema(text=note.text,
+                                                         notification_type=note.notification_type,
+                                                         user_id=i) for i in ids], session)
 
-    async def get_user_notifications(self, user_id: int, session: AsyncSession) -> list[NotificationModelSchema]:
-        cached = await self.redisService.get_cache(f"notifications:{user_id}")
-        if cached:
-            return [NotificationModelSchema(**n) for n in cached]
+    async def notify_many(self,
+                          notes: list[NotificationCreateSchema],
+                          session: AsyncSession,
+                          commit: bool = True) -> list[int]:
+        """
+        Создает уведомления одним INSERT и возвращает id личных получателей (по разу на уведомление).
+        Получателей рассылок учитывает вызывающий, он знает состав роли или бригады.
+        При commit=False счетчики меняет вызывающий после фиксации транзакции.
+        """
+        if not notes:
+            return []
+        recipients = [n.user_id for n in notes if n.user_id is not None]
+        await self.repo.create_many(session, [n.model_dump() for n in notes], commit=commit)
+        if commit:
+            await self.change_unread(Counter(recipients))
+        return recipients
 
-        notifications = await self.repo.get_custom(session,
-                                                   conditions=[Notification.user_id == user_id],
-                                                   order_by=[desc(Notification.created_at)],
-                                                   limit=15)
-        result = [NotificationModelSchema.model_validate(n) for n in notifications]
+    @staticmethod
+    def _targets(user_id: int, role: UserRole | None, team_id: int | None) -> list[list]:
+        # Личные уведомления и рассылки роли и бригады пользователя, кроме скрытых им
+        dismissed = exists().where(NotificationReceipt.notification_id == Notification.id,
+                                   NotificationReceipt.user_id == user_id,
+                                   NotificationReceipt.is_dismissed)
+        branches = [[Notification.user_id == user_id]]
+        if role is not None:
+            branches.append([Notification.target_role == role, ~dismissed])
+        if team_id is not None:
+            branches.append([Notification.target_team_id == team_id, ~dismissed])
+        return branches
 
-        await self.redisService.set_cache(f"notifications:{user_id}", result, 120)
+    @staticmethod
+    def _is_target(notification: Notification, user_id: int, role: UserRole | None, team_id: int | None) -> bool:
+        # То же условие адресата, что и в _targets, для уже загруженного уведомления
+        if notification.user_id is not None:
+            return notification.user_id == user_id
+        if notification.target_role is not None:
+            return notification.target_role == role
+        return team_id is not None and notification.target_team_id == team_id
 
-        return result
-
-    async def del_notification(self, notification_id, session: AsyncSession):
+    async def _get_targeted(self,
+                            notification_id: int,
+                            user_id: int,
+                            role: UserRole | None,
+                            team_id: int | None,
+                            session: AsyncSession) -> Notification:
+        # Чужое уведомление неотличимо от отсутствующего
         notification = await self.repo.get_by_id(session, notification_id)
+        if not notification or not self._is_target(notification, user_id, role, team_id):
+            raise NotificationNotFoundException()
+        return notification
+
+    async def get_user_notifications(self,
+                                     user_id: int,
+                                     session: AsyncSession,
+                                     role: UserRole | None = None,
+                                     team_id: int | None = None,
+                                     cursor: str | None = None,
+                                     limit: int = 15) -> NotificationPageSchema:
+        notifications = await self.repo.get_union(session,
+                                                  self._targets(user_id, role, team_id),
+                                                  keyset=[Notification.created_at, Notification.id],
+                                                  keyset_after=decode_cursor(cursor) if cursor else None,
+                                                  limit=limit + 1,
+                                                  options=[noload("*")])
+        items = notifications[:limit]
+
+        read = set()
+        if items:
+            receipts = await self.receipt_repo.get_by_conditions(session,
+                                                                 NotificationReceipt.user_id == user_id,
+                                                                 NotificationReceipt.notification_id.in_(
+                                                                     [n.id for n in items]),
+                                                                 NotificationReceipt.is_read)
+            read = {r.notification_id for r in receipts}
+
+        result = [NotificationModelSchema.model_validate(n).model_copy(update={"is_read": n.id in read})
+                  for n in items]
+        next_cursor = encode_cursor(items[-1].created_at, items[-1].id) if len(notifications) > limit else None
+
+        return NotificationPageSchema(items=result, next_cursor=next_cursor)
+
+    async def get_unread_count(self,
+                               user_id: int,
+                               session: AsyncSession,
+                               role: UserRole | None = None,
+                               team_id: int | None = None) -> int:
+        count = await self.redisService.get_counter(f"notifications:unread:{user_id}")
+        if count is not None:
+            return count
+
+        handled = exists().where(NotificationReceipt.notification_id == Notification.id,
+                                 NotificationReceipt.user_id == user_id,
+                                 or_(NotificationReceipt.is_read, NotificationReceipt.is_dismissed))
+        targets = [Notification.user_id == user_id]
+        if role is not None:
+            targets.append(Notification.target_role == role)
+        if team_id is not None:
+            targets.append(Notification.target_team_id == team_id)
+        count = await self.repo.count(session, or_(*targets), ~handled)
+
+        return await self.redisService.init_counter(f"notifications:unread:{user_id}",
+                                                    count,
+                                                    settings.NOTIFICATIONS_UNREAD_TTL)
+
+    async def change_unread(self, deltas: dict[int, int]) -> None:
+        """Меняет счетчики непрочитанных и рассылает новые значения по WS одним событием."""
+        counts = await self.redisService.incr_counters({f"notifications:unread:{user_id}": delta
+                                                        for user_id, delta in deltas.items() if delta},
+                                                       settings.NOTIFICATIONS_UNREAD_TTL)
+        if counts:
+            prefix = len("notifications:unread:")
+            message = UnreadCountsMessage(event=EventType.UNREAD_COUNTS,
+                                          counts={int(key[prefix:]): value for key, value in counts.items()})
+            await self.connection_service.publish(UNREAD_CHANNEL, message.model_dump_json())
+
+    async def mark_read(self,
+                        notification_id: int,
+                        user_id: int,
+                        session: AsyncSession,
+                        role: UserRole | None = None,
+                        team_id: int | None = None) -> None:
+        await self._get_targeted(notification_id, user_id, role, team_id, session)
+
+        # Строка возвращается, только если уведомление было непрочитанным и не скрытым
+        changed = await self.receipt_repo.upsert(
+            session,
+            {"notification_id": notification_id, "user_id": user_id, "is_read": True},
+            index_elements=["notification_id", "user_id"],
+            update_values={"is_read": True},
+            where=~NotificationReceipt.is_read & ~NotificationReceipt.is_dismissed)
+        if changed:
+            await self.change_unread({user_id: -1})
+
+    async def del_notification(self,
+                               notification_id: int,
+                               user_id: int,
+                               session: AsyncSession,
+                               role: UserRole | None = None,
+                               team_id: int | None = None):
+        notification = await self._get_targeted(notification_id, user_id, role, team_id, session)
 
-        await self.redisService.del_cache(f"notifications:{notification.user_id}")
+        if notification.user_id is None:
+            # Рассылка остается остальным адресатам и только скрывается у пользователя
+            receipt = await self.receipt_repo.upsert(
+                session,
+                {"notification_id": notification_id, "user_id": user_id, "is_dismissed": True},
+                index_elements=["notification_id", "user_id"],
+                update_values={"is_dismissed": True},
+                where=~NotificationReceipt.is_dismissed)
+            if receipt and not receipt.is_read:
+                await self.change_unread({user_id: -1})
+            return
 
-        return await self.repo.delete(session, notification_id)
+        # Внешнего ключа на секционированную таблицу нет, отметки удаляются в той же транзакции
+        receipts = await self.receipt_repo.get_by_conditions(session,
+                                                             NotificationReceipt.notification_id == notification_id)
+        await self.receipt_repo.delete_many(session, [r.id for r in receipts], commit=False)
+        await self.repo.delete(session, notification_id)
+        if not any(r.is_read for r in receipts):
+            await self.change_unread({notification.user_id: -1})
@@ -0,0 +1,132 @@
+import asyncio
+from collections import Counter
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.locks import OUTBOX_LOCK, advisory_lock_session
+from app.db.models.outbox import Outbox
+from app.db.repository import Repository
+from app.redis import redisService
+from app.schemas.notification import NotificationCreateSchema
+from app.schemas.outbox import OutboxMessageSchema, OutboxPayloadSchema
+from app.schemas.websocket import BaseWSMessage
+from app.services.connection_service import connection_service, ConnectionService
+from app.services.notification_service import NotificationService
+from app.services.user_service import UserService
+from app.settings import settings
+from app.utils.event_bus import DISPATCHERS_CHANNEL, team_channel
+from app.utils.ws_encoding import MessageEncoder, ws_encoder
+
+from logger import logger
+
+
+class OutboxService:
+    """
+    Transactional outbox: сервис вызовов пишет изменение и запись outbox в одной транзакции,
+    а фоновая задача пачками выполняет побочные эффекты - уведомления, сброс кэша и WS-рассылку.
+    Пачку обрабатывает один процесс (сессионная advisory-блокировка держится и после фиксации),
+    поэтому события уходят в порядке записи. Сброс кэша и WS-рассылка выполняются после фиксации,
+    так что клиенты не увидят событие раньше данных. При сбое между фиксацией и рассылкой
+    события пачки теряются: клиенты восстанавливаются по номерам событий и снимку.
+    """
+
+    def __init__(self):
+        self.repo: Repository = Repository(Outbox)
+        self.notification_service: NotificationService = NotificationService()
+        self.user_service: UserService = UserService()
+        self.connection_service: ConnectionService = connection_service
+        self.redisService = redisService
+        self.encoder: MessageEncoder = ws_encoder
+
+        self.wakeup = asyncio.Event()
+        self.task: asyncio.Task | None = None
+
+    def to_dispatchers(self, message: BaseWSMessage) -> OutboxMessageSchema:
+        return OutboxMessageSchema(channel=DISPATCHERS_CHANNEL, text=self.encoder.encode(message))
+
+    def to_workers(self, team_id: int, message: BaseWSMessage) -> OutboxMessageSchema:
+        return OutboxMessageSchema(channel=team_channel(team_id), text=self.encoder.encode(message))
+
+    async def commit(self, session: AsyncSession, payload: OutboxPayloadSchema) -> None:
+        # Фиксирует транзакцию вызывающего вместе с записью outbox
+        await self.repo.create(session, Outbox(payload=payload.model_dump(mode="json")))
+        self.wakeup.set()
+
+    def start(self) -> None:
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        try:
+            await self.drain()
+        except Exception as e:
+            logger.error(f"OUTBOX ERROR {e!r}")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                async with asyncio.timeout(settings.OUTBOX_POLL_INTERVAL):
+                    await self.wakeup.wait()
+            except TimeoutError:
+                pass
+            self.wakeup.clear()
+
+            try:
+                while await self.drain() == settings.OUTBOX_BATCH_SIZE:
+                    pass
+            except Exception as e:
+                logger.error(f"OUTBOX ERROR {e!r}")
+                await asyncio.sleep(settings.OUTBOX_POLL_INTERVAL)
+
+    async def drain(self) -> int:
+        async with advisory_lock_session(OUTBOX_LOCK) as session:
+            if session is None:
+                return 0
+
+            events = await self.repo.get_custom(session,
+                                                order_by=[Outbox.id],
+                                                limit=settings.OUTBOX_BATCH_SIZE,
+                                                for_update=True)
+            if not events:
+                return 0
+
+            payloads = [OutboxPayloadSchema.model_validate(e.payload) for e in events]
+
+            notes = []
+            recipients = Counter()
+            for payload in payloads:
+                for n in payload.notifications:
+                    base = n.model_dump(include={"notification_type", "text"})
+                    notes += [NotificationCreateSchema(**base, user_id=i) for i in dict.fromkeys(n.user_ids)]
+                    notes += [NotificationCreateSchema(**base, target_team_id=t) for t in dict.fromkeys(n.team_ids)]
+                    notes += [NotificationCreateSchema(**base, target_role=r) for r in dict.fromkeys(n.roles)]
+                    # Строка рассылки одна, но счетчик непрочитанных есть у каждого получателя
+                    for role in dict.fromkeys(n.roles):
+                        recipients.update(await self.user_service.get_user_ids_by_role(role))
+                    if n.team_ids:
+                        recipients.update(await self.user_service.team_service.get_workers_ids(n.team_ids, session))
+            recipients.update(await self.notification_service.notify_many(notes, session, commit=False))
+
+            await self.repo.delete_many(session, [e.id for e in events])
+
+            # После фиксации, но под той же блокировкой: следующая пачка не обгонит эту.
+            # Кэш сбрасывается до рассылки: клиент, получивший событие, перечитает свежие данные
+            keys = list(dict.fromkeys(key for payload in payloads for key in payload.cache_keys))
+            await self.redisService.del_cache_many(keys)
+
+            for payload in payloads:
+                for message in payload.messages:
+                    await self.connection_service.publish(message.channel, message.text)
+
+            await self.notification_service.change_unread(recipients)
+        return len(events)
+
+
+outbox_service = OutboxService()
@@ -0,0 +1,124 @@
+import asyncio
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.dependencies import get_manual_session
+from app.db.locks import POSITION_FLUSH_LOCK, try_advisory_xact_lock
+from app.db.models.team import Team
+from app.db.repository import Repository
+from app.redis import redisService
+from app.schemas.team import TeamModelSchema
+from app.settings import settings
+from app.utils.team_locator import TeamLocator, team_locator
+
+from logger import logger
+
+POSITIONS_KEY = "positions:teams"
+
+
+class PositionService:
+    """
+    Текущие координаты бригад с отложенной записью. Новая позиция сразу пишется в общий хеш Redis,
+    а раз в POSITION_FLUSH_INTERVAL секунд хеш одним массовым UPDATE сбрасывается в таблицу team.
+    В хеше лежат только несброшенные позиции, поэтому они всегда новее записанных в БД:
+    при чтении значение из хеша заменяет координаты из БД, а при его отсутствии верна БД.
+    """
+
+    def __init__(self):
+        self.team_repo: Repository = Repository(Team)
+        self.redisService = redisService
+        self.team_locator: TeamLocator = team_locator
+
+        self.changed: dict[int, tuple[float, float]] = {}
+        self.task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        await self.flush()
+
+    async def remove(self, team_id: int) -> None:
+        self.changed.pop(team_id, None)
+        await self.redisService.del_hash_fields(POSITIONS_KEY, [str(team_id)])
+
+    async def set(self, team_id: int, lat: float, lon: float) -> None:
+        await self.set_many({team_id: (lat, lon)})
+
+    async def set_many(self, positions: dict[int, tuple[float, float]]) -> None:
+        if not positions:
+            return
+        await self.redisService.set_hash(POSITIONS_KEY, {team_id: f"{lat},{lon}"
+                                                         for team_id, (lat, lon) in positions.items()})
+        for team_id, (lat, lon) in positions.items():
+            self.changed[team_id] = (lat, lon)
+            self.team_locator.set_position(team_id, lat, lon)
+
+    def pop_changed(self) -> dict[int, tuple[float, float]]:
+        # Изменения этого процесса с прошлого вызова, независимо от записи в БД
+        changed, self.changed = self.changed, {}
+        return changed
+
+    async def get(self, team_id: int) -> tuple[float, float] | None:
+        return (await self.get_many([team_id])).get(team_id)
+
+    async def get_many(self, team_ids: list[int]) -> dict[int, tuple[float, float]]:
+        if not team_ids:
+            return {}
+        values = await self.redisService.get_hash_fields(POSITIONS_KEY, [str(i) for i in team_ids])
+        return {team_id: tuple(map(float, value.split(",")))
+                for team_id, value in zip(team_ids, values) if value is not None}
+
+    async def apply(self, team: TeamModelSchema) -> TeamModelSchema:
+        return (await self.apply_many([team]))[0]
+
+    async def apply_many(self, teams: list[TeamModelSchema]) -> list[TeamModelSchema]:
+        positions = await self.get_many([t.id for t in teams])
+        return [t.model_copy(update={"lat": positions[t.id][0], "lon": positions[t.id][1]})
+                if t.id in positions and positions[t.id] != (t.lat, t.lon) else t
+                for t in teams]
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(settings.POSITION_FLUSH_INTERVAL)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"POSITION FLUSH ERROR {e!r}")
+
+    async def _write(self, batch: dict[int, tuple[float, float]], session: AsyncSession) -> None:
+        await self.team_repo.update_many(session, [{"id": team_id, "lat": lat, "lon": lon}
+                                                   for team_id, (lat, lon) in batch.items()], commit=False)
+
+    async def flush(self) -> int:
+        """
+        Сбрасывает хеш в БД. Сброс выполняет один процесс за раз (advisory-блокировка), иначе
+        запоздавший процесс мог бы записать в БД позицию старее уже сброшенной другим.
+        После фиксации из хеша удаляются только не изменившиеся за время сброса позиции.
+        """
+        async with get_manual_session() as session:
+            if not await try_advisory_xact_lock(session, POSITION_FLUSH_LOCK):
+                return 0
+
+            stored = await self.redisService.get_hash(POSITIONS_KEY)
+            if not stored:
+                await session.rollback()
+                return 0
+
+            await self._write({int(team_id): tuple(map(float, value.split(",")))
+                               for team_id, value in stored.items()}, session)
+            await session.commit()
+
+        await self.redisService.del_hash_fields_if_equal(POSITIONS_KEY, stored)
+        return len(stored)
+
+
+position_service = PositionService()
@@ -1,78 +1,119 @@
 from sqlalchemy import or_, and_
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import noload
 
+from app.db.dependencies import get_manual_session
 from app.db.models.call import CallStatus
 from app.db.repository import Repository
 from app.db.models.team import Team
 from app.exceptions.team import TeamNotFoundException, TeamBusyException
 from app.redis import redisService
+from app.settings import settings
 
 from app.schemas.team import TeamCreateSchema, TeamModelSchema, CoordinatesSchema, TeamFullInfoSchema
+from app.schemas.websocket import TeamsChangedMessage, EventType
+from app.services.connection_service import connection_service, ConnectionService
+from app.services.position_service import PositionService, position_service
+from app.utils.dispatcher_state import DispatcherState, dispatcher_state
+from app.utils.event_bus import DISPATCHERS_CHANNEL
+from app.utils.team_locator import TeamLocator, team_locator
 
 
 class TeamService:
     def __init__(self):
         self.repo: Repository = Repository(Team)
         self.redisService = redisService
+        self.team_locator: TeamLocator = team_locator
+        self.position_service: PositionService = position_service
+        self.dispatcher_state: DispatcherState = dispatcher_state
+        self.connection_service: ConnectionService = connection_service
+
+    async def load_team_locator(self, session: AsyncSession) -> None:
+        # Номер читается до выборки, дальше индекс догоняет БД по событиям
+        seq = await self.connection_service.event_bus.last_seq(DISPATCHERS_CHANNEL)
+        teams = await self.get_teams(session)
+        # Несброшенные в БД координаты новее записанных в таблицу
+        positions = await self.position_service.get_many([t.id for t in teams])
+        self.team_locator.rebuild([
+            (t.id, *positions.get(t.id, (t.lat, t.lon)),
+             any(call.status == CallStatus.ACCEPTED for call in t.calls), t.car.status)
+            for t in teams
+        ], seq)
+        self.connection_service.reapply(seq, self.team_locator.apply)
 
     async def get_teams(self, session: AsyncSession) -> list[Team]:
         return await self.repo.get_by_filters(session, is_deleted=False)
 
-    async def get_full_info_teams(self, session: AsyncSession) -> list[TeamFullInfoSchema]:
-        cached = await self.redisService.get_cache("teams:full_info")
-        if cached:
-            return [TeamFullInfoSchema(**team_dict) for team_dict in cached]
-
+    async def get_teams_with_positions(self, session: AsyncSession) -> list[TeamModelSchema]:
         teams = await self.get_teams(session)
+        return await self.position_service.apply_many([TeamModelSchema.model_validate(t) for t in teams])
 
-        result = []
-        for t in teams:
-            worker1_fio = f"{t.worker1.surname} {t.worker1.name[0]}. {t.worker1.patronym[0]}."
-            worker2_fio = f"{t.worker2.surname} {t.worker2.name[0]}. {t.worker2.patronym[0]}."
-            worker3_fio = f"{t.worker3.surname} {t.worker3.name[0]}. {t.worker3.patronym[0]}."
-            car_number = t.car.number
-            is_busy = True if any(call.status == CallStatus.ACCEPTED for call in t.calls) else False
-            team_full_info = TeamFullInfoSchema(
-                id=t.id,
-                worker1_fio=worker1_fio,
-                worker2_fio=worker2_fio,
-                worker3_fio=worker3_fio,
-                car_number=car_number,
-                is_busy=is_busy,
-                created_at=t.created_at,
-                updated_at=t.updated_at
-            )
-            result.append(team_full_info)
-
-        await self.redisService.set_cache("teams:full_info", result, 180)
-
-        return result
+    async def get_full_info_teams(self, session: AsyncSession) -> list[TeamFullInfoSchema]:
+        teams = await self.redisService.get_or_compute("teams:full_info",
+                                                       self.__load_full_info_teams,
+                                                       ttl=180,
+                                                       stale_ttl=settings.CACHE_STALE_TTL)
+        return [TeamFullInfoSchema.model_validate(t) for t in teams]
+
+    async def __load_full_info_teams(self) -> list[TeamFullInfoSchema]:
+        async with get_manual_session() as session:
+            teams = await self.get_teams(session)
+            return [self.to_full_info(t) for t in teams]
+
+    @staticmethod
+    def to_full_info(t: Team) -> TeamFullInfoSchema:
+        worker1_fio = f"{t.worker1.surname} {t.worker1.name[0]}. {t.worker1.patronym[0]}."
+        worker2_fio = f"{t.worker2.surname} {t.worker2.name[0]}. {t.worker2.patronym[0]}."
+        worker3_fio = f"{t.worker3.surname} {t.worker3.name[0]}. {t.worker3.patronym[0]}."
+        car_number = t.car.number
+        is_busy = True if any(call.status == CallStatus.ACCEPTED for call in t.calls) else False
+        return TeamFullInfoSchema(
+            id=t.id,
+            worker1_fio=worker1_fio,
+            worker2_fio=worker2_fio,
+            worker3_fio=worker3_fio,
+            car_number=car_number,
+            is_busy=is_busy,
+            created_at=t.created_at,
+            updated_at=t.updated_at
+        )
 
     async def get_team_by_id(self, team_id: int, session: AsyncSession) -> Team:
         return await self.repo.get_by_id(session, team_id)
 
     async def add_team(self, team: TeamCreateSchema, session: AsyncSession) -> TeamModelSchema:
         created_team = await self.repo.create(session, Team(**team.model_dump()))
+        self.team_locator.add(created_team.id, created_team.lat, created_team.lon)
+        self.dispatcher_state.invalidate()
+        # Остальные процессы перестраивают индекс бригад и снимок диспетчеров из БД
+        await self.connection_service.notify_dispatchers(TeamsChangedMessage(event=EventType.TEAMS_CHANGED))
 
         await self.redisService.del_cache("users:workers_free")
         await self.redisService.del_cache("teams:full_info")
         await self.redisService.del_cache("cars:free")
+        # Рассылки бригаде меняют число непрочитанных у работников: счетчики пересчитаются по БД
+        for worker_id in (created_team.worker1_id, created_team.worker2_id, created_team.worker3_id):
+            await self.redisService.del_counter(f"notifications:unread:{worker_id}")
 
         return TeamModelSchema.model_validate(created_team)
 
     async def get_free_teams(self, session: AsyncSession) -> list[TeamModelSchema]:
         teams = await self.get_teams(session)
-        return [
+        return await self.position_service.apply_many([
             TeamModelSchema.model_validate(t)
             for t in teams
             if not any(call.status == CallStatus.ACCEPTED for call in t.calls)
                and t.car.status
-        ]
+        ])
+
+    async def get_workers_ids(self, team_ids: list[int], session: AsyncSession) -> list[int]:
+        teams = await self.repo.get_custom(session, conditions=[Team.id.in_(team_ids)], options=[noload("*")])
+        return [w for t in teams for w in (t.worker1_id, t.worker2_id, t.worker3_id)]
 
     async def get_team_by_user_id(self, user_id: int, session: AsyncSession) -> TeamModelSchema:
         cached = await self.redisService.get_cache(f"teams:by_user_id:{user_id}")
         if cached:
-            return TeamModelSchema.model_validate(cached)
+            return await self.position_service.apply(TeamModelSchema.model_validate(cached))
 
         teams = await self.repo.get_by_conditions(
             session,
@@ -92,14 +133,16 @@ class TeamService:
 
         await self.redisService.set_cache(f"teams:by_user_id:{user_id}", result, 300)
 
-        return result
+        return await self.position_service.apply(result)
 
-    async def move_team(self, team_id: int, new_coordinates: CoordinatesSchema, session: AsyncSession) -> Team:
+    async def move_team(self, team_id: int, new_coordinates: CoordinatesSchema,
+                        session: AsyncSession) -> TeamModelSchema:
         team = await self.repo.get_by_id(session, team_id)
         if not team:
             raise TeamNotFoundException()
-        await self.repo.update(session, team_id, lat=new_coordinates.lat, lon=new_coordinates.lon)
-        return await self.repo.get_by_id(session, team_id)
+        # Координаты попадают в БД отложенно, пачкой вместе с остальными бригадами
+        await self.position_service.set(team_id, new_coordinates.lat, new_coordinates.lon)
+        return await self.position_service.apply(TeamModelSchema.model_validate(team))
 
     async def set_is_moving_team(self, team_id: int, is_moving: bool, session: AsyncSession) -> None:
         await self.repo.update(session, team_id, is_moving=is_moving)
@@ -115,7 +158,13 @@ class TeamService:
         await self.redisService.del_cache(f"teams:by_user_id:{team.worker1_id}")
         await self.redisService.del_cache(f"teams:by_user_id:{team.worker2_id}")
         await self.redisService.del_cache(f"teams:by_user_id:{team.worker3_id}")
+        for worker_id in (team.worker1_id, team.worker2_id, team.worker3_id):
+            await self.redisService.del_counter(f"notifications:unread:{worker_id}")
 
         await self.redisService.del_cache("cars:free")
 
-        return await self.repo.update(session, team_id, is_deleted=True)
+        await self.repo.update(session, team_id, is_deleted=True)
+        self.team_locator.remove(team_id)
+        await self.position_service.remove(team_id)
+        self.dispatcher_state.invalidate()
+        await self.connection_service.notify_dispatchers(TeamsChangedMessage(event=EventType.TEAMS_CHANGED))
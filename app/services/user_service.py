@@ -1,5 +1,6 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.db.dependencies import get_manual_session
 from app.db.repository import Repository
 from app.db.models.user import User, UserRole
 
@@ -11,9 +12,10 @@ from app.services.team_service import TeamService
 
 from app.utils.password_hasher import PasswordHasher
 
-from app.schemas.notification import NotificationModelSchema
+from app.schemas.notification import NotificationPageSchema, UnreadCountSchema
 
 from app.redis import redisService
+from app.settings import settings
 
 
 class UserService:
@@ -65,6 +67,20 @@ class UserService:
 
         return result
 
+    async def get_user_ids_by_role(self, role: UserRole) -> list[int]:
+        # Получатели рассылок: только ID, без загрузки пользователей и их бригад.
+        # Локальные копии во всех процессах сбрасываются через канал удалений кэша
+        return await self.redisService.get_or_compute(f"users:ids:{role}",
+                                                      lambda: self.__load_user_ids_by_role(role),
+                                                      ttl=settings.ROLE_IDS_CACHE_TTL)
+
+    async def __load_user_ids_by_role(self, role: UserRole) -> list[int]:
+        async with get_manual_session() as session:
+            return await self.repo.get_ids(session, User.role == role)
+
+    async def __invalidate_role_ids(self, role: UserRole) -> None:
+        await self.redisService.del_cache(f"users:ids:{role}")
+
     async def get_free_workers(self, session: AsyncSession) -> list[UserModelSchema]:
         cached = await self.redisService.get_cache("users:workers_free")
         if cached:
@@ -96,6 +112,7 @@ class UserService:
         created_user = await self.repo.create(session, user_to_create)
 
         await self.redisService.del_cache(f"users:{user.role}")
+        await self.__invalidate_role_ids(user.role)
 
         if user.role == UserRole.WORKER:
             await self.redisService.del_cache("users:workers_free")
@@ -116,7 +133,9 @@ class UserService:
         await self.redisService.del_cache(f"users:{user.role}")
         await self.redisService.del_cache(f"users:{user_id}")
 
-        return await self.repo.delete(session, user_id)
+        result = await self.repo.delete(session, user_id)
+        await self.__invalidate_role_ids(user.role)
+        return result
 
     async def update_user(self, user_id: int, user_data: UserUpdateSchema, session: AsyncSession):
         user = await self.repo.get_by_id(session, user_id)
@@ -127,12 +146,50 @@ class UserService:
 
         await self.redisService.del_cache(f"users:{user.role}")
         await self.redisService.del_cache(f"users:{user_id}")
+        await self.redisService.del_counter(f"notifications:unread:{user_id}")
+        await self.__invalidate_role_ids(user.role)
 
         return await self.repo.get_by_id(session, user_id)
 
-    async def get_user_notifications(self, user_id: int, session: AsyncSession) -> list[NotificationModelSchema]:
+    @staticmethod
+    def __team_id(user: User) -> int | None:
+        # Рассылки читаются по роли пользователя и бригаде, в которой он работает
+        teams = (user.team_as_worker1, user.team_as_worker2, user.team_as_worker3)
+        return next((t.id for t in teams if t is not None and not t.is_deleted), None)
+
+    async def get_user_notifications(self,
+                                     user_id: int,
+                                     session: AsyncSession,
+                                     cursor: str | None = None,
+                                     limit: int = 15) -> NotificationPageSchema:
         user = await self.repo.get_by_id(session, user_id)
         if not user:
             raise UserNotFoundException()
 
-        return await self.notification_service.get_user_notifications(user_id, session)
+        return await self.notification_service.get_user_notifications(user_id,
+                                                                      session,
+                                                                      role=user.role,
+                                                                      team_id=self.__team_id(user),
+                                                                      cursor=cursor,
+                                                                      limit=limit)
+
+    async def get_unread_count(self, user: User, session: AsyncSession) -> UnreadCountSchema:
+        count = await self.notification_service.get_unread_count(user.id,
+                                                                 session,
+                                                                 role=user.role,
+                                                                 team_id=self.__team_id(user))
+        return UnreadCountSchema(count=count)
+
+    async def mark_notification_read(self, user: User, notification_id: int, session: AsyncSession) -> None:
+        await self.notification_service.mark_read(notification_id,
+                                                  user.id,
+                                                  session,
+                                                  role=user.role,
+                                                  team_id=self.__team_id(user))
+
+    async def del_notification(self, user: User, notification_id: int, session: AsyncSession) -> None:
+        await self.notification_service.del_notification(notification_id,
+                                                         user.id,
+                                                         session,
+                                                         role=user.role,
+                                                         team_id=self.__team_id(user))
@@ -1,4 +1,5 @@
 from datetime import timedelta
+from typing import Literal
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -26,7 +27,59 @@ class Settings(BaseSettings):
     REDIS_PORT: int
     REDIS_PASSWORD: str
 
+    ROUTE_BACKEND: Literal["http", "local"] = "http"
+    ROUTE_FALLBACK_TO_LOCAL: bool = False
+    ROAD_GRAPH_PATH: str = "road_graph"
+
     ROUTE_API_URL: str = "https://router.project-osrm.org/route/v1/driving"
+    ROUTE_API_TIMEOUT: float = 5.0
+    ROUTE_API_MAX_CONNECTIONS: int = 20
+    ROUTE_API_MAX_KEEPALIVE: int = 10
+    ROUTE_API_KEEPALIVE_EXPIRY: float = 30.0
+    ROUTE_API_CONCURRENCY: int = 10
+
+    ROUTE_CACHE_CELL_METERS: float = 50.0
+    ROUTE_CACHE_SIZE: int = 1024
+    ROUTE_CACHE_TTL: int = 3600
+    ROUTE_CACHE_REDIS_TTL: int = 86400
+
+    MOVEMENT_TICK_INTERVAL: float = 0.25
+    POSITION_FLUSH_INTERVAL: float = 5.0
+    DISPATCHER_POSITIONS_INTERVAL: float = 1.0
+
+    EVENT_BUS_BACKEND: Literal["memory", "redis"] = "memory"
+
+    WS_SEND_QUEUE_SIZE: int = 256
+    WS_SEND_TIMEOUT: float = 10.0
+    WS_MAX_DROPPED: int = 256
+    WS_POSITION_RATE_HZ: float = 4.0
+    WS_REPLAY_BUFFER_SIZE: int = 200
+    WS_REPLAY_STREAM_SIZE: int = 0
+    WS_VIEWPORT_CELL_DEG: float = 0.02
+    WS_VIEWPORT_MAX_CELLS: int = 4096
+    DISTRICTS_PATH: str = "districts.geojson"
+
+    OUTBOX_POLL_INTERVAL: float = 1.0
+    OUTBOX_BATCH_SIZE: int = 100
+
+    ROLE_IDS_CACHE_TTL: int = 3600
+    NOTIFICATIONS_UNREAD_TTL: int = 86400
+
+    LOCAL_CACHE_MAX_BYTES: int = 16777216
+    LOCAL_CACHE_TTL: float = 30.0
+    CACHE_STALE_TTL: int = 60
+    CACHE_GENERATION_TTL: int = 86400
+    CACHE_LOCK_TTL_MS: int = 10000
+    CACHE_LOCK_WAIT: float = 5.0
+    CACHE_LOCK_POLL_INTERVAL: float = 0.05
+
+    NOTIFICATION_RETENTION_DAYS: int = 180
+    NOTIFICATION_RETENTION_INTERVAL: float = 3600.0
+    NOTIFICATION_PARTITIONS_AHEAD: int = 2
+    NOTIFICATION_ARCHIVE_DIR: str = "archive/notifications"
+
+    TEAM_AVERAGE_SPEED_KMH: float = 40.0
+    ROUTE_DETOUR_FACTOR: float = 1.3
 
     model_config = SettingsConfigDict(env_file=".env")
 
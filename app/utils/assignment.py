@@ -0,0 +1,47 @@
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+from app.db.models.call import CallType
+from app.utils.team_locator import EARTH_RADIUS_KM
+
+# Расстояние до более критичного вызова обходится дороже
+CALL_TYPE_WEIGHT = {
+    CallType.CRITICAL: 3.0,
+    CallType.IMPORTANT: 2.0,
+    CallType.COMMON: 1.0,
+}
+
+# Бонус за покрытие вызова: при нехватке бригад сначала назначаются критичные вызовы
+CALL_TYPE_BONUS = {
+    CallType.CRITICAL: 2000.0,
+    CallType.IMPORTANT: 1000.0,
+    CallType.COMMON: 0.0,
+}
+
+
+def distance_matrix_km(team_coords: np.ndarray, call_coords: np.ndarray) -> np.ndarray:
+    team_rad = np.radians(team_coords)[:, np.newaxis, :]
+    call_rad = np.radians(call_coords)[np.newaxis, :, :]
+    d_lat = call_rad[..., 0] - team_rad[..., 0]
+    d_lon = call_rad[..., 1] - team_rad[..., 1]
+    a = np.sin(d_lat / 2) ** 2 + np.cos(team_rad[..., 0]) * np.cos(call_rad[..., 0]) * np.sin(d_lon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def assign_teams(team_coords: np.ndarray,
+                 call_coords: np.ndarray,
+                 call_types: list[CallType]) -> list[tuple[int, int, float]]:
+    """
+    Оптимальное назначение бригад на вызовы (венгерский алгоритм).
+    Возвращает тройки (индекс бригады, индекс вызова, расстояние в км).
+    """
+    if len(team_coords) == 0 or len(call_coords) == 0:
+        return []
+
+    distances = distance_matrix_km(team_coords, call_coords)
+    weights = np.array([CALL_TYPE_WEIGHT[t] for t in call_types])
+    bonuses = np.array([CALL_TYPE_BONUS[t] for t in call_types])
+    cost = distances * weights - bonuses
+
+    team_idx, call_idx = linear_sum_assignment(cost)
+    return [(int(t), int(c), float(distances[t, c])) for t, c in zip(team_idx, call_idx)]
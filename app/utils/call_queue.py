@@ -0,0 +1,80 @@
+from bisect import bisect_left, insort
+
+from app.db.models.call import CallType, CallStatus
+from app.schemas.call import CallModelSchema
+from app.schemas.websocket import EventType
+
+CALL_TYPE_PRIORITY = {
+    CallType.CRITICAL: 0,
+    CallType.IMPORTANT: 1,
+    CallType.COMMON: 2,
+}
+
+
+class CallQueue:
+    """
+    Отсортированный индекс новых вызовов: критичность, затем время поступления (новые выше).
+    Обновляется инкрементально при изменении статуса вызова и событиями канала диспетчеров
+    из других процессов. При пропуске события индекс перестраивается из БД.
+    """
+
+    def __init__(self):
+        self.keys: list[tuple[int, float, int]] = []
+        self.calls: dict[int, CallModelSchema] = {}
+        self.seq: int = 0
+        self.is_loaded: bool = False
+
+    @staticmethod
+    def _key(call: CallModelSchema) -> tuple[int, float, int]:
+        return CALL_TYPE_PRIORITY[call.type], -call.date_time.timestamp(), call.id
+
+    def rebuild(self, calls: list[CallModelSchema], seq: int = 0) -> None:
+        self.calls = {c.id: c for c in calls}
+        self.keys = sorted(self._key(c) for c in self.calls.values())
+        self.seq = seq
+        self.is_loaded = True
+
+    def apply(self, seq: int, event: dict) -> None:
+        if not self.is_loaded or seq <= self.seq:
+            return
+        if seq > self.seq + 1:
+            # Событие пропущено: индекс перестраивается из БД при следующем обращении
+            self.is_loaded = False
+            return
+        self.seq = seq
+
+        match event["event"]:
+            case EventType.CALL_ADDED | EventType.CALL_CHANGED:
+                call = CallModelSchema.model_validate(event["call"])
+                if call.status == CallStatus.NEW:
+                    self.push(call)
+                else:
+                    self.remove(call.id)
+            case EventType.CALL_ACCEPTED | EventType.CALL_REJECTED | EventType.CALL_REMOVED:
+                self.remove(event["call_id"])
+            case EventType.CALLS_ASSIGNED:
+                for assignment in event["assignments"]:
+                    self.remove(assignment["call_id"])
+
+    def push(self, call: CallModelSchema) -> None:
+        self.remove(call.id)
+        self.calls[call.id] = call
+        insort(self.keys, self._key(call))
+
+    def remove(self, call_id: int) -> None:
+        call = self.calls.pop(call_id, None)
+        if call is None:
+            return
+        key = self._key(call)
+        i = bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            del self.keys[i]
+
+    def get_all(self) -> list[CallModelSchema]:
+        return [self.calls[key[2]] for key in self.keys]
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+
+new_calls_queue = CallQueue()
@@ -0,0 +1,91 @@
+from app.schemas.websocket import DispatcherSnapshotMessage, EventType
+from app.utils.viewport_index import Area
+
+
+class DispatcherState:
+    """
+    Состояние экрана диспетчера: актуальные вызовы и бригады. Обновляется событиями
+    из канала диспетчеров в порядке их номеров, поэтому снимок согласован с последующими событиями.
+    """
+
+    def __init__(self):
+        self.calls: dict[int, dict] = {}
+        self.teams: dict[int, dict] = {}
+        self.seq: int = 0
+        self.is_loaded: bool = False
+
+    def rebuild(self, calls: list[dict], teams: list[dict], seq: int) -> None:
+        self.calls = {c["id"]: c for c in calls}
+        self.teams = {t["id"]: t for t in teams}
+        self.seq = seq
+        self.is_loaded = True
+
+    def invalidate(self) -> None:
+        # Состав бригад изменился: снимок перестраивается из БД при следующем подключении
+        self.is_loaded = False
+
+    def apply(self, seq: int, event: dict) -> None:
+        if seq <= self.seq:
+            return
+        if self.is_loaded and (seq > self.seq + 1 or event["event"] == EventType.TEAMS_CHANGED):
+            # Событие пропущено или изменился состав бригад: снимок перестраивается из БД
+            self.invalidate()
+        self.seq = seq
+
+        match event["event"]:
+            case EventType.CALL_ADDED | EventType.CALL_CHANGED:
+                self.calls[event["call"]["id"]] = event["call"]
+            case EventType.CALL_REMOVED:
+                self.calls.pop(event["call_id"], None)
+            case EventType.TEAM_BUSY | EventType.TEAM_FREE:
+                team = self.teams.get(event["team_id"])
+                if team is not None:
+                    team["is_busy"] = event["event"] == EventType.TEAM_BUSY
+            case EventType.TEAM_POSITIONS:
+                for position in event["positions"]:
+                    team = self.teams.get(position["team_id"])
+                    if team is not None:
+                        team["lat"], team["lon"] = position["lat"], position["lon"]
+
+    def locate(self, event: dict) -> list[tuple[float, float]] | None:
+        """
+        Точки, к которым относится событие. Для событий с одними идентификаторами координаты
+        берутся из состояния, поэтому вызывается до apply. None - событие для всех диспетчеров.
+        """
+        match event["event"]:
+            case EventType.NEW_CALL | EventType.CALL_ADDED | EventType.CALL_CHANGED:
+                return [(event["call"]["lat"], event["call"]["lon"])]
+            case EventType.AVAILABLE_TEAM:
+                return [(event["team"]["lat"], event["team"]["lon"])]
+            case EventType.TEAM_POSITIONS:
+                return [(p["lat"], p["lon"]) for p in event["positions"]]
+            case EventType.CALL_ACCEPTED | EventType.CALL_REJECTED | EventType.CALL_REMOVED:
+                return self._locate(self.calls, [event["call_id"]])
+            case EventType.CALLS_ASSIGNED:
+                return self._locate(self.calls, [a["call_id"] for a in event["assignments"]])
+            case EventType.TEAM_BUSY | EventType.TEAM_FREE:
+                return self._locate(self.teams, [event["team_id"]])
+        return None
+
+    @staticmethod
+    def _locate(items: dict[int, dict], ids: list[int]) -> list[tuple[float, float]] | None:
+        points = []
+        for item_id in ids:
+            item = items.get(item_id)
+            if item is None:
+                return None
+            points.append((item["lat"], item["lon"]))
+        return points
+
+    def snapshot(self, area: Area | None = None) -> DispatcherSnapshotMessage:
+        calls, teams = self.calls.values(), self.teams.values()
+        if area is not None:
+            calls = [c for c in calls if area.contains(c["lat"], c["lon"])]
+            teams = [t for t in teams if area.contains(t["lat"], t["lon"])]
+        return DispatcherSnapshotMessage(event=EventType.SNAPSHOT,
+                                         seq=self.seq,
+                                         calls=list(calls),
+                                         teams=list(teams))
+
+
+dispatcher_state = DispatcherState()
@@ -0,0 +1,173 @@
+import asyncio
+from collections import defaultdict, deque
+from collections.abc import Callable
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.settings import settings
+
+from logger import logger
+
+DISPATCHERS_CHANNEL = "dispatchers"
+TEAM_CHANNEL_PREFIX = "team:"
+UNREAD_CHANNEL = "unread"
+CHANNEL_PREFIX = "ws:"
+SEQ_PREFIX = "ws:seq:"
+STREAM_PREFIX = "ws:stream:"
+
+# Обработчик получает канал, порядковый номер события и JSON с полем seq
+EventHandler = Callable[[str, int, str], None]
+
+# Номер события выдается, вписывается в сообщение, сохраняется в поток и публикуется атомарно,
+# поэтому порядок доставки совпадает с порядком номеров
+PUBLISH_SCRIPT = """
+local seq = redis.call('INCR', KEYS[1])
+local text = '{"seq":' .. seq .. ',' .. string.sub(ARGV[1], 2)
+if tonumber(ARGV[2]) > 0 then
+    redis.call('XADD', KEYS[3], 'MAXLEN', '~', ARGV[2], seq .. '-0', 'data', text)
+end
+redis.call('PUBLISH', KEYS[2], text)
+return seq
+"""
+
+
+def team_channel(team_id: int) -> str:
+    return f"{TEAM_CHANNEL_PREFIX}{team_id}"
+
+
+def stamp(seq: int, text: str) -> str:
+    return f'{{"seq":{seq},{text[1:]}'
+
+
+def read_seq(text: str) -> int:
+    return int(text[7:text.index(",")])
+
+
+def handle_safely(handler: EventHandler, channel: str, text: str, seq: int | None = None) -> None:
+    # Ошибка обработки одного события не должна останавливать доставку следующих
+    try:
+        handler(channel, read_seq(text) if seq is None else seq, text)
+    except Exception as e:
+        logger.exception(f"EVENT BUS HANDLER ERROR {channel} {e!r} {text[:200]}")
+
+
+class EventHistory:
+    """
+    Последние события канала для дозагрузки при переподключении. Координаты только отмечаются
+    без сохранения, поэтому буфер покрывает номера от first до last, а не от первого сохраненного.
+    """
+
+    def __init__(self, size: int):
+        self.events: deque[tuple[int, str]] = deque(maxlen=size)
+        self.first: int | None = None
+        self.last: int = 0
+
+    def seen(self, seq: int) -> None:
+        if self.first is None:
+            self.first = seq
+        self.last = max(self.last, seq)
+
+    def append(self, seq: int, text: str) -> None:
+        self.seen(seq)
+        if len(self.events) == self.events.maxlen:
+            self.first = self.events[0][0] + 1
+        self.events.append((seq, text))
+
+    def covers(self, since: int) -> bool:
+        return self.first is not None and self.first <= since + 1 and since <= self.last
+
+    def after(self, since: int) -> list[str]:
+        return [text for seq, text in self.events if seq > since]
+
+    def entries_after(self, since: int) -> list[tuple[int, str]]:
+        return [(seq, text) for seq, text in self.events if seq > since]
+
+
+class InMemoryEventBus:
+    """Шина событий одного процесса: опубликованное сообщение сразу передается обработчику."""
+
+    def __init__(self, handler: EventHandler):
+        self.handler = handler
+        self.seq: dict[str, int] = defaultdict(int)
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    async def publish(self, channel: str, text: str) -> None:
+        self.seq[channel] += 1
+        seq = self.seq[channel]
+        handle_safely(self.handler, channel, stamp(seq, text), seq)
+
+    async def last_seq(self, channel: str) -> int:
+        return self.seq[channel]
+
+    async def history(self, channel: str, since: int, count: int) -> list[tuple[int, str]]:
+        return []
+
+
+class RedisEventBus:
+    """
+    Шина событий через Redis pub/sub: каждый процесс API публикует сообщения в каналы
+    ws:dispatchers и ws:team:{id} и пересылает полученные из Redis своим локальным сокетам.
+    При WS_REPLAY_STREAM_SIZE > 0 события дублируются в поток ws:stream:{канал}.
+    """
+
+    def __init__(self, redis_client: Redis, handler: EventHandler):
+        self.redis_client = redis_client
+        self.handler = handler
+        self.publish_script = redis_client.register_script(PUBLISH_SCRIPT)
+        self.task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        if self.task is None:
+            pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+            await pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+            self.task = asyncio.create_task(self._run(pubsub))
+
+    async def stop(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    async def publish(self, channel: str, text: str) -> None:
+        await self.publish_script(keys=[f"{SEQ_PREFIX}{channel}",
+                                        f"{CHANNEL_PREFIX}{channel}",
+                                        f"{STREAM_PREFIX}{channel}"],
+                                  args=[text, settings.WS_REPLAY_STREAM_SIZE])
+
+    async def last_seq(self, channel: str) -> int:
+        return int(await self.redis_client.get(f"{SEQ_PREFIX}{channel}") or 0)
+
+    async def history(self, channel: str, since: int, count: int) -> list[tuple[int, str]]:
+        if settings.WS_REPLAY_STREAM_SIZE <= 0:
+            return []
+        entries = await self.redis_client.xrange(f"{STREAM_PREFIX}{channel}", min=f"{since + 1}-0", count=count)
+        return [(int(entry_id.split("-")[0]), fields["data"]) for entry_id, fields in entries]
+
+    async def _run(self, pubsub) -> None:
+        try:
+            while True:
+                try:
+                    async for message in pubsub.listen():
+                        if message["type"] == "pmessage":
+                            handle_safely(self.handler, message["channel"][len(CHANNEL_PREFIX):], message["data"])
+                except RedisError as e:
+                    # При переподключении pubsub сам восстанавливает подписку
+                    logger.error(f"EVENT BUS ERROR {e!r}")
+                    await asyncio.sleep(1)
+        finally:
+            await pubsub.aclose()
+
+
+def create_event_bus(redis_client: Redis, handler: EventHandler) -> InMemoryEventBus | RedisEventBus:
+    if settings.EVENT_BUS_BACKEND == "redis":
+        return RedisEventBus(redis_client, handler)
+    return InMemoryEventBus(handler)
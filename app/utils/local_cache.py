@@ -0,0 +1,80 @@
+import time
+from collections import OrderedDict
+from typing import Any
+
+
+class CacheStats:
+    def __init__(self):
+        self.local_hits: int = 0
+        self.local_misses: int = 0
+        self.redis_hits: int = 0
+        self.redis_misses: int = 0
+        self.invalidations: int = 0
+        self.computes: int = 0
+        self.coalesced: int = 0
+        self.stale_served: int = 0
+        self.stale_discarded: int = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "local_hits": self.local_hits,
+            "local_misses": self.local_misses,
+            "redis_hits": self.redis_hits,
+            "redis_misses": self.redis_misses,
+            "invalidations": self.invalidations,
+            "computes": self.computes,
+            "coalesced": self.coalesced,
+            "stale_served": self.stale_served,
+            "stale_discarded": self.stale_discarded,
+        }
+
+
+class LocalCache:
+    """
+    LRU с TTL в памяти процесса. Объем ограничен суммарной длиной JSON записей в байтах.
+    epoch растет при каждом удалении: значение, прочитанное из Redis до удаления, не сохраняется.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.entries: OrderedDict[str, tuple[float, int, Any]] = OrderedDict()
+        self.size: int = 0
+        self.epoch: int = 0
+        self.evictions: int = 0
+
+    def get(self, key: str) -> Any | None:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            self._pop(key)
+            return None
+        self.entries.move_to_end(key)
+        return entry[2]
+
+    def set(self, key: str, value: Any, size: int, ttl: float) -> None:
+        if size > self.max_bytes:
+            return
+        self._pop(key)
+        self.entries[key] = (time.monotonic() + ttl, size, value)
+        self.size += size
+        while self.size > self.max_bytes:
+            self._pop(next(iter(self.entries)))
+            self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        self.epoch += 1
+        self._pop(key)
+
+    def clear(self) -> None:
+        self.epoch += 1
+        self.entries.clear()
+        self.size = 0
+
+    def _pop(self, key: str) -> None:
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry[1]
+
+    def snapshot(self) -> dict:
+        return {"local_entries": len(self.entries), "local_bytes": self.size, "local_evictions": self.evictions}
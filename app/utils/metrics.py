@@ -0,0 +1,33 @@
+from collections import deque
+
+
+class LatencyStats:
+    def __init__(self, window: int = 1000):
+        self.requests: int = 0
+        self.errors: int = 0
+        self.total: float = 0.0
+        self.max: float = 0.0
+        self.samples: deque[float] = deque(maxlen=window)
+
+    def add(self, seconds: float, error: bool = False) -> None:
+        self.requests += 1
+        self.errors += error
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.samples.append(seconds)
+
+    def _percentile(self, q: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def snapshot(self) -> dict:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "avg_ms": round(self.total / self.requests * 1000, 2) if self.requests else 0.0,
+            "p50_ms": round(self._percentile(0.5) * 1000, 2),
+            "p95_ms": round(self._percentile(0.95) * 1000, 2),
+            "max_ms": round(self.max * 1000, 2),
+        }
@@ -0,0 +1,19 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+
+from app.exceptions.pagination import InvalidCursorException
+
+
+def encode_cursor(moment: datetime, item_id: int) -> str:
+    raw = json.dumps([moment.isoformat(), item_id]).encode()
+    return urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        moment, item_id = json.loads(raw)
+        return datetime.fromisoformat(moment), int(item_id)
+    except Exception:
+        raise InvalidCursorException()
@@ -0,0 +1,181 @@
+import argparse
+import heapq
+import os
+import xml.etree.ElementTree as ElementTree
+from math import asin, cos, radians, sin, sqrt
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from app.utils.team_locator import haversine_km, EARTH_RADIUS_KM
+
+# Дороги, по которым может проехать автомобиль скорой помощи
+DRIVABLE_HIGHWAYS = {
+    "motorway", "motorway_link", "trunk", "trunk_link", "primary", "primary_link",
+    "secondary", "secondary_link", "tertiary", "tertiary_link", "unclassified",
+    "residential", "living_street", "service", "road",
+}
+
+GRAPH_ARRAYS = ("indptr", "indices", "weights", "lat", "lon")
+# Точки для KD-дерева (широта, сжатая долгота) сохраняются вместе с графом
+POINTS_ARRAY = "points"
+
+
+class RoadGraph:
+    """
+    Дорожный граф в CSR-формате: соседи вершины v - indices[indptr[v]:indptr[v + 1]],
+    длины ребер в метрах - weights. Массивы отображаются в память с диска.
+    """
+
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray, weights: np.ndarray,
+                 lat: np.ndarray, lon: np.ndarray, points: np.ndarray | None = None):
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+        self.lat = lat
+        self.lon = lon
+        self._lat_rad: np.ndarray | None = None
+        self._lon_rad: np.ndarray | None = None
+        self._cos_lat: np.ndarray | None = None
+
+        # Для поиска ближайшей вершины долгота сжимается до масштаба широты
+        self.lon_scale = cos(radians(float(np.mean(lat)))) if len(lat) else 1.0
+        if points is None:
+            points = np.column_stack([lat, lon * self.lon_scale])
+        self.points = points
+        # cKDTree не копирует непрерывный float64-массив: дерево строится прямо по отображению в память
+        self.tree = cKDTree(np.ascontiguousarray(points, dtype=np.float64))
+
+    @classmethod
+    def load(cls, path: str) -> "RoadGraph":
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in GRAPH_ARRAYS}
+        points_path = os.path.join(path, f"{POINTS_ARRAY}.npy")
+        if os.path.exists(points_path):
+            arrays[POINTS_ARRAY] = np.load(points_path, mmap_mode="r")
+        return cls(**arrays)
+
+    def save(self, path: str) -> None:
+        os.makedirs(path, exist_ok=True)
+        for name in (*GRAPH_ARRAYS, POINTS_ARRAY):
+            np.save(os.path.join(path, f"{name}.npy"), np.asarray(getattr(self, name)))
+
+    @classmethod
+    def from_edges(cls, lat: np.ndarray, lon: np.ndarray,
+                   sources: np.ndarray, targets: np.ndarray, weights: np.ndarray) -> "RoadGraph":
+        order = np.argsort(sources, kind="stable")
+        indptr = np.zeros(len(lat) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=len(lat)), out=indptr[1:])
+        return cls(indptr,
+                   targets[order].astype(np.int32),
+                   weights[order].astype(np.float32),
+                   lat.astype(np.float64),
+                   lon.astype(np.float64))
+
+    def _radians(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # Радианы и косинусы широт считаются один раз векторно по отображенным массивам
+        if self._lat_rad is None:
+            self._lat_rad = np.radians(self.lat)
+            self._lon_rad = np.radians(self.lon)
+            self._cos_lat = np.cos(self._lat_rad)
+        return self._lat_rad, self._lon_rad, self._cos_lat
+
+    def nearest_node(self, lat: float, lon: float) -> int:
+        _, node = self.tree.query((lat, lon * self.lon_scale))
+        return int(node)
+
+    def shortest_path(self, source: int, target: int) -> list[int]:
+        # A* с эвристикой по расстоянию по прямой: допустима, т.к. веса ребер - длины в метрах
+        lat_rad, lon_rad, cos_lat = self._radians()
+        target_lat, target_lon = float(lat_rad[target]), float(lon_rad[target])
+        cos_target = float(cos_lat[target])
+        meters = 2 * EARTH_RADIUS_KM * 1000
+
+        def heuristic(v: int) -> float:
+            a = sin((lat_rad[v] - target_lat) / 2) ** 2 + \
+                cos_lat[v] * cos_target * sin((lon_rad[v] - target_lon) / 2) ** 2
+            return meters * asin(sqrt(a))
+
+        dist = {source: 0.0}
+        prev = {}
+        queue = [(heuristic(source), source)]
+        closed = set()
+        while queue:
+            _, v = heapq.heappop(queue)
+            if v == target:
+                break
+            if v in closed:
+                continue
+            closed.add(v)
+
+            start, end = int(self.indptr[v]), int(self.indptr[v + 1])
+            base = dist[v]
+            for u, w in zip(self.indices[start:end].tolist(), self.weights[start:end].tolist()):
+                candidate = base + w
+                if candidate < dist.get(u, float("inf")):
+                    dist[u] = candidate
+                    prev[u] = v
+                    heapq.heappush(queue, (candidate + heuristic(u), u))
+
+        if target not in dist:
+            return []
+
+        path = [target]
+        while path[-1] != source:
+            path.append(prev[path[-1]])
+        path.reverse()
+        return path
+
+    def route(self, from_lat: float, from_lon: float, to_lat: float, to_lon: float) -> list[tuple[float, float]]:
+        path = self.shortest_path(self.nearest_node(from_lat, from_lon), self.nearest_node(to_lat, to_lon))
+        return [(float(self.lat[v]), float(self.lon[v])) for v in path]
+
+
+def build_road_graph(osm_path: str) -> RoadGraph:
+    """Строит граф из OSM XML выгрузки (.osm): вершины - узлы дорог, ребра - отрезки путей."""
+    nodes: dict[int, tuple[float, float]] = {}
+    ways: list[tuple[list[int], str]] = []
+
+    for _, element in ElementTree.iterparse(osm_path, events=("end",)):
+        if element.tag == "node":
+            nodes[int(element.get("id"))] = (float(element.get("lat")), float(element.get("lon")))
+            element.clear()
+        elif element.tag == "way":
+            tags = {t.get("k"): t.get("v") for t in element.iter("tag")}
+            if tags.get("highway") in DRIVABLE_HIGHWAYS:
+                ways.append(([int(nd.get("ref")) for nd in element.iter("nd")], tags.get("oneway", "no")))
+            element.clear()
+
+    node_index: dict[int, int] = {}
+    sources, targets = [], []
+    for refs, oneway in ways:
+        refs = [r for r in refs if r in nodes]
+        if oneway == "-1":
+            refs.reverse()
+        for a, b in zip(refs, refs[1:]):
+            ia = node_index.setdefault(a, len(node_index))
+            ib = node_index.setdefault(b, len(node_index))
+            sources.append(ia)
+            targets.append(ib)
+            if oneway not in ("yes", "1", "true", "-1"):
+                sources.append(ib)
+                targets.append(ia)
+
+    coords = np.zeros((len(node_index), 2))
+    for osm_id, i in node_index.items():
+        coords[i] = nodes[osm_id]
+    sources, targets = np.array(sources, dtype=np.int64), np.array(targets, dtype=np.int64)
+    lengths = np.array([haversine_km(*coords[a], *coords[b]) * 1000 for a, b in zip(sources, targets)])
+
+    return RoadGraph.from_edges(coords[:, 0], coords[:, 1], sources, targets, lengths)
+
+
+if __name__ == "__main__":
+    # python -m app.utils.road_graph city.osm road_graph
+    parser = argparse.ArgumentParser(description="Подготовка дорожного графа из OSM XML")
+    parser.add_argument("osm_path")
+    parser.add_argument("out_dir")
+    args = parser.parse_args()
+
+    graph = build_road_graph(args.osm_path)
+    graph.save(args.out_dir)
+    print(f"Вершин: {len(graph.lat)}, ребер: {len(graph.indices)}")
@@ -0,0 +1,94 @@
+import time
+from collections import OrderedDict
+from math import cos, radians, floor
+
+import polyline
+
+from app.redis import redisService
+from app.schemas.team import CoordinatesSchema
+from app.settings import settings
+
+METERS_PER_DEGREE = 111_195
+
+
+class RouteCache:
+    """
+    Кэш маршрутов: локальный LRU с TTL перед Redis.
+    Начало и конец маршрута привязываются к ячейкам ~ROUTE_CACHE_CELL_METERS метров,
+    геометрия хранится в виде encoded polyline.
+    """
+
+    def __init__(self):
+        self.local: OrderedDict[str, tuple[float, list[CoordinatesSchema]]] = OrderedDict()
+        self.redisService = redisService
+
+        self.hits_local: int = 0
+        self.hits_redis: int = 0
+        self.misses: int = 0
+
+    @staticmethod
+    def _snap(point: CoordinatesSchema) -> tuple[int, int]:
+        lat_step = settings.ROUTE_CACHE_CELL_METERS / METERS_PER_DEGREE
+        lat_cell = floor(point.lat / lat_step)
+        lon_step = lat_step / cos(radians((lat_cell + 0.5) * lat_step))
+        return lat_cell, floor(point.lon / lon_step)
+
+    def key(self, origin: CoordinatesSchema, destination: CoordinatesSchema) -> str:
+        o_lat, o_lon = self._snap(origin)
+        d_lat, d_lon = self._snap(destination)
+        return f"routes:{o_lat}:{o_lon}:{d_lat}:{d_lon}"
+
+    @staticmethod
+    def _encode(route: list[CoordinatesSchema]) -> str:
+        return polyline.encode([(p.lat, p.lon) for p in route], 6)
+
+    @staticmethod
+    def _decode(encoded: str) -> list[CoordinatesSchema]:
+        return [CoordinatesSchema(lat=lat, lon=lon) for lat, lon in polyline.decode(encoded, 6)]
+
+    def _put_local(self, key: str, route: list[CoordinatesSchema]) -> None:
+        self.local[key] = (time.monotonic() + settings.ROUTE_CACHE_TTL, route)
+        self.local.move_to_end(key)
+        while len(self.local) > settings.ROUTE_CACHE_SIZE:
+            self.local.popitem(last=False)
+
+    async def get(self, origin: CoordinatesSchema, destination: CoordinatesSchema) -> list[CoordinatesSchema] | None:
+        key = self.key(origin, destination)
+
+        entry = self.local.get(key)
+        if entry:
+            if entry[0] > time.monotonic():
+                self.local.move_to_end(key)
+                self.hits_local += 1
+                return entry[1]
+            del self.local[key]
+
+        # Маршруты уже хранятся локально в разобранном виде
+        encoded = await self.redisService.get_cache(key, local=False)
+        if encoded:
+            route = self._decode(encoded)
+            self._put_local(key, route)
+            self.hits_redis += 1
+            return route
+
+        self.misses += 1
+        return None
+
+    async def set(self, origin: CoordinatesSchema, destination: CoordinatesSchema,
+                  route: list[CoordinatesSchema]) -> None:
+        key = self.key(origin, destination)
+        self._put_local(key, route)
+        await self.redisService.set_cache(key, self._encode(route), settings.ROUTE_CACHE_REDIS_TTL, local=False)
+
+    def stats(self) -> dict:
+        total = self.hits_local + self.hits_redis + self.misses
+        return {
+            "hits_local": self.hits_local,
+            "hits_redis": self.hits_redis,
+            "misses": self.misses,
+            "hit_rate": round((self.hits_local + self.hits_redis) / total, 4) if total else 0.0,
+            "size": len(self.local),
+        }
+
+
+route_cache = RouteCache()
@@ -1,31 +1,138 @@
-from httpx import AsyncClient
+import asyncio
+import time
+
+from httpx import AsyncClient, Limits, Response, Timeout
 
 from app.exceptions.routing import RoutingException
 from app.schemas.team import CoordinatesSchema
+from app.utils.metrics import LatencyStats
+from app.utils.road_graph import RoadGraph
+from app.utils.route_cache import RouteCache, route_cache
 
 from app.settings import settings
 
+from logger import logger
 
-class Router:
+
+class RouteHttpClient:
+    def __init__(self):
+        self.client: AsyncClient | None = None
+        self.semaphore = asyncio.Semaphore(settings.ROUTE_API_CONCURRENCY)
+        self.stats = LatencyStats()
+
+    async def start(self) -> None:
+        if self.client is None:
+            self.client = AsyncClient(limits=Limits(max_connections=settings.ROUTE_API_MAX_CONNECTIONS,
+                                                    max_keepalive_connections=settings.ROUTE_API_MAX_KEEPALIVE,
+                                                    keepalive_expiry=settings.ROUTE_API_KEEPALIVE_EXPIRY),
+                                      timeout=Timeout(settings.ROUTE_API_TIMEOUT))
+
+    async def close(self) -> None:
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    async def get(self, url: str) -> Response:
+        await self.start()
+        async with self.semaphore:
+            start_time = time.perf_counter()
+            error = True
+            try:
+                response = await self.client.get(url)
+                error = response.is_error
+                return response
+            finally:
+                latency = time.perf_counter() - start_time
+                self.stats.add(latency, error)
+                # Успешные запросы на горячем пути только в DEBUG, статистика собирается в stats
+                if error:
+                    logger.info(f"ROUTE GET error {round(latency * 1000, 2)}ms")
+                else:
+                    logger.debug(f"ROUTE GET ok {round(latency * 1000, 2)}ms")
+
+
+route_http_client = RouteHttpClient()
+
+
+class HttpRouteBackend:
     def __init__(self):
         self.api_url = settings.ROUTE_API_URL
+        self.http_client = route_http_client
 
     async def get_route(self,
                         team_coordinates: CoordinatesSchema,
                         call_coordinates: CoordinatesSchema
                         ) -> list[CoordinatesSchema]:
-
         url = (f"{self.api_url}/"
                f"{team_coordinates.lon},{team_coordinates.lat};"
                f"{call_coordinates.lon},{call_coordinates.lat}"
                f"?overview=full&steps=true&geometries=geojson")
 
         try:
-            async with AsyncClient() as client:
-                response = await client.get(url)
-                response.raise_for_status()
-                route = response.json()["routes"][0]["geometry"]["coordinates"]
-                res = [CoordinatesSchema(lon=route[i][0], lat=route[i][1]) for i in range(0, len(route), 3)]
-                return res
+            response = await self.http_client.get(url)
+            response.raise_for_status()
+            route = response.json()["routes"][0]["geometry"]["coordinates"]
+            res = [CoordinatesSchema(lon=route[i][0], lat=route[i][1]) for i in range(0, len(route), 3)]
+            return res
+        except Exception:
+            raise RoutingException()
+
+
+class LocalRouteBackend:
+    def __init__(self, graph_path: str = settings.ROAD_GRAPH_PATH):
+        self.graph_path = graph_path
+        self.graph: RoadGraph | None = None
+
+    def load(self) -> RoadGraph:
+        if self.graph is None:
+            self.graph = RoadGraph.load(self.graph_path)
+        return self.graph
+
+    def _route(self,
+               team_coordinates: CoordinatesSchema,
+               call_coordinates: CoordinatesSchema
+               ) -> list[tuple[float, float]]:
+        return self.load().route(team_coordinates.lat, team_coordinates.lon,
+                                 call_coordinates.lat, call_coordinates.lon)
+
+    async def get_route(self,
+                        team_coordinates: CoordinatesSchema,
+                        call_coordinates: CoordinatesSchema
+                        ) -> list[CoordinatesSchema]:
+        try:
+            # Поиск пути выполняется в отдельном потоке, чтобы не блокировать event loop
+            points = await asyncio.to_thread(self._route, team_coordinates, call_coordinates)
+            if not points:
+                raise RoutingException()
+            return [CoordinatesSchema(lat=lat, lon=lon) for lat, lon in points]
         except Exception:
             raise RoutingException()
+
+
+local_route_backend = LocalRouteBackend()
+
+
+class Router:
+    def __init__(self):
+        self.http_backend = HttpRouteBackend()
+        self.local_backend = local_route_backend
+        self.backend = self.local_backend if settings.ROUTE_BACKEND == "local" else self.http_backend
+        self.cache: RouteCache = route_cache
+
+    async def get_route(self,
+                        team_coordinates: CoordinatesSchema,
+                        call_coordinates: CoordinatesSchema
+                        ) -> list[CoordinatesSchema]:
+        cached = await self.cache.get(team_coordinates, call_coordinates)
+        if cached:
+            return cached
+
+        try:
+            route = await self.backend.get_route(team_coordinates, call_coordinates)
+        except RoutingException:
+            if self.backend is self.local_backend or not settings.ROUTE_FALLBACK_TO_LOCAL:
+                raise
+            route = await self.local_backend.get_route(team_coordinates, call_coordinates)
+
+        await self.cache.set(team_coordinates, call_coordinates, route)
+        return route
@@ -0,0 +1,177 @@
+from collections import defaultdict
+from math import radians, sin, cos, asin, sqrt, floor
+
+from app.schemas.websocket import EventType
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.195
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    d_lat = radians(lat2 - lat1)
+    d_lon = radians(lon2 - lon1)
+    a = sin(d_lat / 2) ** 2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(d_lon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * asin(sqrt(a))
+
+
+class SpatialIndex:
+    """
+    Сеточный индекс точек. Поиск ближайших обходит ячейки кольцами от точки запроса
+    и останавливается, когда следующее кольцо гарантированно дальше k-го найденного.
+    """
+
+    def __init__(self, cell_size: float = 0.01):
+        self.cell_size = cell_size
+        self.cells: dict[tuple[int, int], set[int]] = defaultdict(set)
+        self.points: dict[int, tuple[float, float]] = {}
+
+    def _cell(self, lat: float, lon: float) -> tuple[int, int]:
+        return floor(lat / self.cell_size), floor(lon / self.cell_size)
+
+    def upsert(self, item_id: int, lat: float, lon: float) -> None:
+        old = self.points.get(item_id)
+        if old is not None:
+            old_cell = self._cell(*old)
+            if old_cell == self._cell(lat, lon):
+                self.points[item_id] = (lat, lon)
+                return
+            self._discard(old_cell, item_id)
+        self.points[item_id] = (lat, lon)
+        self.cells[self._cell(lat, lon)].add(item_id)
+
+    def remove(self, item_id: int) -> None:
+        old = self.points.pop(item_id, None)
+        if old is not None:
+            self._discard(self._cell(*old), item_id)
+
+    def _discard(self, cell: tuple[int, int], item_id: int) -> None:
+        bucket = self.cells.get(cell)
+        if bucket is not None:
+            bucket.discard(item_id)
+            if not bucket:
+                del self.cells[cell]
+
+    def _ring(self, center: tuple[int, int], r: int):
+        ci, cj = center
+        if r == 0:
+            yield center
+            return
+        for j in range(cj - r, cj + r + 1):
+            yield ci - r, j
+            yield ci + r, j
+        for i in range(ci - r + 1, ci + r):
+            yield i, cj - r
+            yield i, cj + r
+
+    def nearest(self, lat: float, lon: float, k: int) -> list[tuple[float, int]]:
+        if not self.points or k <= 0:
+            return []
+
+        center = self._cell(lat, lon)
+        # Минимальная ширина ячейки в км (по долготе сужается с широтой)
+        cell_km = self.cell_size * KM_PER_DEGREE * min(1.0, cos(radians(lat)))
+        found: list[tuple[float, int]] = []
+        seen = 0
+        r = 0
+        while seen < len(self.points):
+            for cell in self._ring(center, r):
+                for item_id in self.cells.get(cell, ()):
+                    seen += 1
+                    p_lat, p_lon = self.points[item_id]
+                    found.append((haversine_km(lat, lon, p_lat, p_lon), item_id))
+            if len(found) >= k:
+                found.sort()
+                if found[k - 1][0] <= r * cell_km:
+                    break
+            r += 1
+
+        found.sort()
+        return found[:k]
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+
+class TeamLocator:
+    """
+    Позиции бригад в памяти. В пространственном индексе лежат только свободные бригады:
+    без принятого вызова и с исправным автомобилем. Изменения из других процессов приходят
+    событиями канала диспетчеров; при пропуске события или смене состава бригад индекс
+    перестраивается из БД.
+    """
+
+    def __init__(self):
+        self.positions: dict[int, tuple[float, float]] = {}
+        self.busy: set[int] = set()
+        self.broken: set[int] = set()
+        self.free_index: SpatialIndex = SpatialIndex()
+        self.seq: int = 0
+        self.is_loaded: bool = False
+
+    def rebuild(self, teams: list[tuple[int, float, float, bool, bool]], seq: int = 0) -> None:
+        self.positions.clear()
+        self.busy.clear()
+        self.broken.clear()
+        self.free_index = SpatialIndex()
+        for team_id, lat, lon, is_busy, car_ok in teams:
+            self.add(team_id, lat, lon, is_busy, car_ok)
+        self.seq = seq
+        self.is_loaded = True
+
+    def apply(self, seq: int, event: dict) -> None:
+        if not self.is_loaded or seq <= self.seq:
+            return
+        if seq > self.seq + 1 or event["event"] == EventType.TEAMS_CHANGED:
+            self.is_loaded = False
+            return
+        self.seq = seq
+
+        match event["event"]:
+            case EventType.TEAM_BUSY | EventType.TEAM_FREE:
+                self.set_busy(event["team_id"], event["event"] == EventType.TEAM_BUSY)
+            case EventType.TEAM_POSITIONS:
+                for position in event["positions"]:
+                    self.set_position(position["team_id"], position["lat"], position["lon"])
+
+    def add(self, team_id: int, lat: float, lon: float, is_busy: bool = False, car_ok: bool = True) -> None:
+        self.positions[team_id] = (lat, lon)
+        if is_busy:
+            self.busy.add(team_id)
+        if not car_ok:
+            self.broken.add(team_id)
+        self._sync(team_id)
+
+    def remove(self, team_id: int) -> None:
+        self.positions.pop(team_id, None)
+        self.busy.discard(team_id)
+        self.broken.discard(team_id)
+        self.free_index.remove(team_id)
+
+    def set_position(self, team_id: int, lat: float, lon: float) -> None:
+        if team_id not in self.positions:
+            return
+        self.positions[team_id] = (lat, lon)
+        self._sync(team_id)
+
+    def set_busy(self, team_id: int, is_busy: bool) -> None:
+        (self.busy.add if is_busy else self.busy.discard)(team_id)
+        self._sync(team_id)
+
+    def set_car_ok(self, team_id: int, car_ok: bool) -> None:
+        (self.broken.discard if car_ok else self.broken.add)(team_id)
+        self._sync(team_id)
+
+    def is_free(self, team_id: int) -> bool:
+        return team_id in self.positions and team_id not in self.busy and team_id not in self.broken
+
+    def _sync(self, team_id: int) -> None:
+        if self.is_free(team_id):
+            self.free_index.upsert(team_id, *self.positions[team_id])
+        else:
+            self.free_index.remove(team_id)
+
+    def nearest_free(self, lat: float, lon: float, k: int) -> list[tuple[float, int]]:
+        return self.free_index.nearest(lat, lon, k)
+
+
+team_locator = TeamLocator()
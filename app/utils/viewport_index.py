@@ -0,0 +1,128 @@
+import json
+import os
+from collections import defaultdict
+from collections.abc import Hashable, Iterable
+from math import floor
+
+from logger import logger
+
+# Полигон района: список вершин (lat, lon)
+Polygon = list[tuple[float, float]]
+
+
+def point_in_polygon(lat: float, lon: float, polygon: Polygon) -> bool:
+    inside = False
+    j = len(polygon) - 1
+    for i in range(len(polygon)):
+        lat_i, lon_i = polygon[i]
+        lat_j, lon_j = polygon[j]
+        if (lat_i > lat) != (lat_j > lat) and lon < (lon_j - lon_i) * (lat - lat_i) / (lat_j - lat_i) + lon_i:
+            inside = not inside
+        j = i
+    return inside
+
+
+def load_districts(path: str) -> dict[str, list[Polygon]]:
+    """Районы из GeoJSON (Polygon и MultiPolygon), название - в properties.name."""
+    if not os.path.exists(path):
+        logger.info(f"DISTRICTS NOT FOUND {path}")
+        return {}
+
+    with open(path, encoding="utf-8") as f:
+        collection = json.load(f)
+
+    districts: dict[str, list[Polygon]] = defaultdict(list)
+    for feature in collection["features"]:
+        geometry = feature["geometry"]
+        polygons = [geometry["coordinates"]] if geometry["type"] == "Polygon" else geometry["coordinates"]
+        for rings in polygons:
+            # Учитывается внешний контур, координаты GeoJSON идут как [lon, lat]
+            districts[feature["properties"]["name"]].append([(lat, lon) for lon, lat in rings[0]])
+    return dict(districts)
+
+
+class Area:
+    """Область подписки: прямоугольник и/или набор полигонов районов."""
+
+    def __init__(self,
+                 bbox: tuple[float, float, float, float] | None = None,
+                 polygons: list[Polygon] | None = None):
+        self.bbox = bbox
+        self.polygons = polygons or []
+
+    def bounds(self) -> list[tuple[float, float, float, float]]:
+        boxes = [self.bbox] if self.bbox is not None else []
+        for polygon in self.polygons:
+            lats = [lat for lat, _ in polygon]
+            lons = [lon for _, lon in polygon]
+            boxes.append((min(lats), min(lons), max(lats), max(lons)))
+        return boxes
+
+    def contains(self, lat: float, lon: float) -> bool:
+        if self.bbox is not None:
+            min_lat, min_lon, max_lat, max_lon = self.bbox
+            if min_lat <= lat <= max_lat and min_lon <= lon <= max_lon:
+                return True
+        return any(point_in_polygon(lat, lon, polygon) for polygon in self.polygons)
+
+
+class ViewportIndex:
+    """
+    Сеточный индекс подписок на области карты. Подписчик записывается во все ячейки,
+    пересекающие его область, поэтому поиск по точке события проверяет только подписчиков
+    ее ячейки, а не все соединения.
+    """
+
+    def __init__(self, cell_size: float = 0.02, max_cells: int = 4096):
+        self.cell_size = cell_size
+        self.max_cells = max_cells
+        self.cells: dict[tuple[int, int], set[Hashable]] = defaultdict(set)
+        self.areas: dict[Hashable, tuple[Area, list[tuple[int, int]]]] = {}
+
+    def _cell(self, lat: float, lon: float) -> tuple[int, int]:
+        return floor(lat / self.cell_size), floor(lon / self.cell_size)
+
+    def _cover(self, area: Area) -> list[tuple[int, int]] | None:
+        # Число ячеек считается до построения: слишком большая область не раскладывается по сетке
+        ranges = []
+        for min_lat, min_lon, max_lat, max_lon in area.bounds():
+            min_i, min_j = self._cell(min_lat, min_lon)
+            max_i, max_j = self._cell(max_lat, max_lon)
+            ranges.append((min_i, min_j, max_i, max_j))
+        if sum((max_i - min_i + 1) * (max_j - min_j + 1) for min_i, min_j, max_i, max_j in ranges) > self.max_cells:
+            return None
+
+        cells = set()
+        for min_i, min_j, max_i, max_j in ranges:
+            cells.update((i, j) for i in range(min_i, max_i + 1) for j in range(min_j, max_j + 1))
+        return list(cells)
+
+    def subscribe(self, key: Hashable, area: Area) -> bool:
+        """Возвращает False, если область слишком велика для индекса и подписчику нужны все события."""
+        self.unsubscribe(key)
+        cells = self._cover(area)
+        if cells is None:
+            return False
+        self.areas[key] = (area, cells)
+        for cell in cells:
+            self.cells[cell].add(key)
+        return True
+
+    def unsubscribe(self, key: Hashable) -> None:
+        entry = self.areas.pop(key, None)
+        if entry is None:
+            return
+        for cell in entry[1]:
+            bucket = self.cells.get(cell)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self.cells[cell]
+
+    def match(self, points: Iterable[tuple[float, float]]) -> set[Hashable]:
+        matched = set()
+        for lat, lon in points:
+            for key in self.cells.get(self._cell(lat, lon), ()):
+                if key not in matched and self.areas[key][0].contains(lat, lon):
+                    matched.add(key)
+        return matched
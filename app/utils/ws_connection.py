@@ -0,0 +1,155 @@
+import asyncio
+from collections import deque
+from collections.abc import Callable
+
+from fastapi import WebSocket
+
+from app.schemas.websocket import WSEncoding
+from app.settings import settings
+from app.utils.ws_encoding import MessageEncoder, ws_encoder
+from logger import logger
+
+
+class WebSocketStats:
+    def __init__(self):
+        self.coalesced: int = 0
+        self.dropped: int = 0
+        self.slow_disconnects: int = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "coalesced_positions": self.coalesced,
+            "dropped_messages": self.dropped,
+            "slow_consumer_disconnects": self.slow_disconnects,
+        }
+
+
+ws_stats = WebSocketStats()
+
+
+class ClientConnection:
+    """
+    WS-клиент с ограниченной очередью исходящих сообщений и собственной задачей записи.
+    Постановка в очередь не ждет сокет: при переполнении вытесняется самое старое сообщение,
+    а клиент, который не успевает читать, отключается.
+    Координаты бригад хранятся отдельно по одной на бригаду: неотправленная позиция заменяется
+    более новой, а отправляются они не чаще position_rate_hz (по умолчанию WS_POSITION_RATE_HZ) раз в секунду.
+    Сообщения ставятся в очередь в JSON и переводятся в кодировку клиента при отправке.
+    """
+
+    def __init__(self,
+                 ws: WebSocket,
+                 on_close: Callable[[WebSocket], None] | None = None,
+                 position_rate_hz: float | None = None,
+                 encoding: WSEncoding = WSEncoding.JSON):
+        self.ws = ws
+        self.encoding = encoding
+        self.on_close = on_close
+        self.position_interval = 1 / (position_rate_hz or settings.WS_POSITION_RATE_HZ)
+        self.queue: deque[str] = deque()
+        self.positions: dict[int, str] = {}
+        self.wakeup = asyncio.Event()
+        self.next_positions_at: float = 0.0
+        self.dropped: int = 0
+        self.is_closed: bool = False
+        self.task: asyncio.Task | None = None
+        self.stats: WebSocketStats = ws_stats
+        self.encoder: MessageEncoder = ws_encoder
+
+    def start(self) -> None:
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+
+    def send(self, payload: str) -> None:
+        if self.is_closed:
+            return
+        # Ожидающие координаты уходят раньше следующего сообщения, чтобы сохранить порядок событий
+        if self.positions:
+            positions, self.positions = self.positions, {}
+            for position in positions.values():
+                self._enqueue(position)
+        self._enqueue(payload)
+        self.wakeup.set()
+
+    def send_position(self, team_id: int, payload: str) -> None:
+        if self.is_closed:
+            return
+        if team_id in self.positions:
+            self.stats.coalesced += 1
+        self.positions[team_id] = payload
+        self.wakeup.set()
+
+    def _enqueue(self, payload: str) -> None:
+        if self.is_closed:
+            return
+        if len(self.queue) >= settings.WS_SEND_QUEUE_SIZE:
+            self.queue.popleft()
+            self.dropped += 1
+            self.stats.dropped += 1
+            if self.dropped > settings.WS_MAX_DROPPED:
+                logger.info(f"WS SLOW CONSUMER dropped {self.dropped}")
+                self.stats.slow_disconnects += 1
+                self.close()
+                return
+        self.queue.append(payload)
+
+    async def _write(self, payload: str) -> None:
+        async with asyncio.timeout(settings.WS_SEND_TIMEOUT):
+            if self.encoding == WSEncoding.MSGPACK:
+                await self.ws.send_bytes(self.encoder.pack(payload))
+            else:
+                await self.ws.send_text(payload)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                if not self.queue and not self.positions:
+                    self.wakeup.clear()
+                    await self.wakeup.wait()
+
+                if self.queue:
+                    await self._write(self.queue.popleft())
+                    self.dropped = 0
+                    continue
+
+                delay = self.next_positions_at - loop.time()
+                if delay > 0:
+                    # До следующей отправки координат могут прийти обычные сообщения
+                    self.wakeup.clear()
+                    try:
+                        async with asyncio.timeout(delay):
+                            await self.wakeup.wait()
+                    except TimeoutError:
+                        pass
+                    continue
+
+                positions, self.positions = self.positions, {}
+                for payload in positions.values():
+                    await self._write(payload)
+                self.next_positions_at = loop.time() + self.position_interval
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.info(f"WS SEND ERROR {e!r}")
+            self.close()
+
+    def stop(self) -> None:
+        self.is_closed = True
+        if self.task is not None and self.task is not asyncio.current_task():
+            self.task.cancel()
+
+    def close(self) -> None:
+        # Отключение со стороны сервера: медленный или отвалившийся клиент
+        if self.is_closed:
+            return
+        self.stop()
+        if self.on_close is not None:
+            self.on_close(self.ws)
+        asyncio.create_task(self._close_socket())
+
+    async def _close_socket(self) -> None:
+        try:
+            await self.ws.close()
+        except Exception:
+            pass
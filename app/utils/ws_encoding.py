@@ -0,0 +1,57 @@
+import json
+from collections import OrderedDict
+
+import msgpack
+from fastapi import WebSocket
+
+from app.schemas.websocket import BaseWSMessage, WSEncoding
+
+
+class MessageEncoder:
+    """
+    Кодирует WS-сообщение в JSON один раз на рассылку: повторная отправка того же объекта
+    (диспетчерам и бригаде, всем сокетам группы) берет готовый текст из кэша.
+    """
+
+    def __init__(self, size: int = 64):
+        self.size = size
+        # Ссылка на сообщение хранится вместе с текстом, чтобы id не переиспользовался
+        self.cache: OrderedDict[int, tuple[BaseWSMessage, str]] = OrderedDict()
+        self.packed: OrderedDict[str, bytes] = OrderedDict()
+
+    def encode(self, message: BaseWSMessage) -> str:
+        key = id(message)
+        cached = self.cache.get(key)
+        if cached is not None and cached[0] is message:
+            self.cache.move_to_end(key)
+            return cached[1]
+
+        text = message.model_dump_json()
+        self.cache[key] = (message, text)
+        if len(self.cache) > self.size:
+            self.cache.popitem(last=False)
+        return text
+
+    def pack(self, text: str) -> bytes:
+        # Текст события один на всех получателей, поэтому MessagePack строится один раз на рассылку
+        packed = self.packed.get(text)
+        if packed is not None:
+            self.packed.move_to_end(text)
+            return packed
+
+        packed = msgpack.packb(json.loads(text))
+        self.packed[text] = packed
+        if len(self.packed) > self.size:
+            self.packed.popitem(last=False)
+        return packed
+
+
+def negotiate_encoding(ws: WebSocket, encoding: WSEncoding) -> tuple[WSEncoding, str | None]:
+    """Кодировка из подпротокола Sec-WebSocket-Protocol, иначе из параметра запроса."""
+    for subprotocol in ws.scope.get("subprotocols", []):
+        if subprotocol in list(WSEncoding):
+            return WSEncoding(subprotocol), subprotocol
+    return encoding, None
+
+
+ws_encoder = MessageEncoder()
@@ -0,0 +1,32 @@
+# Время решения задачи назначения бригад на вызовы (матрица стоимостей + венгерский алгоритм)
+# Запуск из корня проекта: python -m benchmarks.batch_assignment
+import random
+import timeit
+
+import numpy as np
+
+from app.db.models.call import CallType
+from app.utils.assignment import assign_teams
+
+
+def main():
+    repeats = 20
+    print(f"{'бригад x вызовов':>18} {'среднее, мс':>12} {'максимум, мс':>13}")
+    for teams, calls in ((50, 200), (200, 200), (200, 50), (500, 500)):
+        team_coords = np.column_stack([np.random.uniform(59.8, 60.1, teams), np.random.uniform(29.8, 30.6, teams)])
+        call_coords = np.column_stack([np.random.uniform(59.8, 60.1, calls), np.random.uniform(29.8, 30.6, calls)])
+        call_types = [random.choice(list(CallType)) for _ in range(calls)]
+
+        pairs = assign_teams(team_coords, call_coords, call_types)
+        assert len(pairs) == min(teams, calls)
+        # Пока хватает бригад, ни один критичный вызов не остается без бригады
+        assigned = {c for _, c, _ in pairs}
+        if sum(t == CallType.CRITICAL for t in call_types) <= teams:
+            assert all(c in assigned for c in range(calls) if call_types[c] == CallType.CRITICAL)
+
+        times = timeit.repeat(lambda: assign_teams(team_coords, call_coords, call_types), number=1, repeat=repeats)
+        print(f"{f'{teams} x {calls}':>18} {sum(times) / repeats * 1000:>12.2f} {max(times) * 1000:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# Уведомление всех диспетчеров: строка на каждого получателя против одной строки-рассылки роли.
+# Считаются записанные строки и прирост размера таблицы notification на событие, а также
+# время чтения списка уведомлений без кэша (личные строки против объединения с рассылками).
+# Запуск из корня проекта (использует БД и Redis из .env, пользователей с префиксом seed_d):
+#   python -m benchmarks.broadcast_notifications --users 500 --events 50
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import text
+
+from app.db.dependencies import get_manual_session, session_manager
+from app.db.models.notification import NotificationType
+from app.db.models.user import UserRole
+from app.redis import redisService
+from app.schemas.notification import NotificationBaseSchema, NotificationCreateSchema
+from app.services.notification_service import NotificationService
+
+TEXT = "seed_broadcast"
+
+
+async def table_size() -> int:
+    async with get_manual_session() as session:
+        return (await session.execute(text("SELECT pg_total_relation_size('notification')"))).scalar()
+
+
+async def read_latency(service: NotificationService, user_id: int, role: UserRole | None, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        await redisService.del_cache(f"notifications:{user_id}")
+        async with get_manual_session() as session:
+            start = time.perf_counter()
+            await service.get_user_notifications(user_id, session, role=role)
+            timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2] * 1000
+
+
+async def run(name: str, ids: list[int], events: int, broadcast: bool) -> None:
+    service = NotificationService()
+    note = NotificationBaseSchema(notification_type=NotificationType.MESSAGE, text=TEXT)
+    before = await table_size()
+    for _ in range(events):
+        async with get_manual_session() as session:
+            if broadcast:
+                await service.notify_many([NotificationCreateSchema(**note.model_dump(),
+                                                                    target_role=UserRole.DISPATCHER)], session)
+            else:
+                await service.notify_users(ids, note, session)
+    grown = await table_size() - before
+
+    rows = 1 if broadcast else len(ids)
+    latency = await read_latency(service, ids[0], UserRole.DISPATCHER if broadcast else None, 20)
+    print(f"{name:>10} {rows:>8} {grown / events / 1024:>12.1f} {latency:>12.2f}")
+
+    async with get_manual_session() as session:
+        await session.execute(text("DELETE FROM notification WHERE text = :text"), {"text": TEXT})
+        await session.commit()
+
+
+async def main(args: argparse.Namespace) -> None:
+    async with get_manual_session() as session:
+        await session.execute(text("""
+            INSERT INTO "user" (login, password, role, name, surname, patronym, created_at, updated_at)
+            SELECT 'seed_d' || g, 'x', 'DISPATCHER', 'Петр', 'Петров', 'Петрович', now(), now()
+            FROM generate_series(1, :users) g
+            ON CONFLICT (login) DO NOTHING
+        """), {"users": args.users})
+        await session.commit()
+        ids = list((await session.execute(text("SELECT id FROM \"user\" WHERE login LIKE 'seed_d%' ORDER BY id "
+                                               "LIMIT :users"), {"users": args.users})).scalars().all())
+
+    print(f"{len(ids)} диспетчеров, {args.events} событий")
+    print(f"{'способ':>10} {'строк':>8} {'КБ/событие':>12} {'чтение, мс':>12}")
+    await run("по строке", ids, args.events, broadcast=False)
+    await run("рассылка", ids, args.events, broadcast=True)
+    await session_manager.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--events", type=int, default=50)
+    asyncio.run(main(parser.parse_args()))
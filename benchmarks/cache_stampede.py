@@ -0,0 +1,72 @@
+# Одновременные промахи по ключу вроде teams:full_info: прежний get_cache + загрузка + set_cache
+# против get_or_compute. Загрузка имитирует запрос к БД с задержкой; считаются загрузки и время ответа.
+# Запуск из корня проекта (использует Redis из .env): python -m benchmarks.cache_stampede --requests 200
+import argparse
+import asyncio
+import time
+
+from app.redis import redisService
+
+KEY = "bench:stampede"
+
+
+class Loader:
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+
+    async def __call__(self) -> list[dict]:
+        self.calls += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        # Параллельные запросы к БД замедляют друг друга
+        await asyncio.sleep(self.delay * self.active)
+        self.active -= 1
+        return [{"id": i} for i in range(50)]
+
+
+async def naive(loader: Loader) -> None:
+    cached = await redisService.get_cache(KEY)
+    if cached:
+        return
+    await redisService.set_cache(KEY, await loader(), 60)
+
+
+async def coalesced(loader: Loader) -> None:
+    await redisService.get_or_compute(KEY, loader, ttl=60)
+
+
+async def run(name: str, requests: int, delay: float, read) -> None:
+    await redisService.del_cache(KEY)
+    loader = Loader(delay)
+    timings = []
+
+    async def request():
+        start = time.perf_counter()
+        await read(loader)
+        timings.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(request() for _ in range(requests)))
+    timings.sort()
+    print(f"{name:>16} {loader.calls:>10} {loader.peak:>10} {timings[len(timings) // 2] * 1000:>10.1f} "
+          f"{timings[-1] * 1000:>10.1f}")
+
+
+async def main(args: argparse.Namespace) -> None:
+    await redisService.start()
+    await asyncio.sleep(0.1)
+    print(f"{args.requests} одновременных запросов, загрузка {args.delay * 1000:.0f} мс")
+    print(f"{'способ':>16} {'загрузок':>10} {'паралл.':>10} {'p50, мс':>10} {'max, мс':>10}")
+    await run("get + set", args.requests, args.delay, naive)
+    await run("get_or_compute", args.requests, args.delay, coalesced)
+    await redisService.del_cache(KEY)
+    await redisService.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--delay", type=float, default=0.02)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,125 @@
+# Стоимость диспетчерского экрана: опрос REST (актуальные вызовы + бригады) против
+# снимка при подключении и потока изменений по WS. Считается объем JSON за минуту на одного
+# диспетчера и проверяется, что состояние, собранное из событий, совпадает с новым снимком.
+# Запуск из корня проекта: python -m benchmarks.dispatcher_feed
+import asyncio
+import json
+import random
+from datetime import datetime
+
+from app.db.models.call import CallStatus, CallType
+from app.schemas.call import CallModelSchema
+from app.schemas.team import TeamFullInfoSchema, TeamStateSchema, TeamPositionSchema
+from app.schemas.websocket import CallAddedMessage, CallChangedMessage, CallRemovedMessage, TeamBusyMessage, \
+    TeamFreeMessage, TeamPositionsMessage, EventType
+from app.services.connection_service import ConnectionService
+
+POLL_INTERVAL = 5
+CALL_EVENTS_PER_MINUTE = 30
+MOVING_TEAMS = 50
+
+
+def make_call(call_id: int, status: CallStatus = CallStatus.NEW, team_id: int | None = None) -> CallModelSchema:
+    now = datetime.now()
+    return CallModelSchema(id=call_id, reason="Боль в груди", address="Невский проспект, 1", date_time=now,
+                           lat=random.uniform(59.8, 60.1), lon=random.uniform(29.8, 30.6), status=status,
+                           type=random.choice(list(CallType)), patient_id=1, team_id=team_id,
+                           created_at=now, updated_at=now)
+
+
+def make_team(team_id: int) -> TeamStateSchema:
+    now = datetime.now()
+    return TeamStateSchema(id=team_id, worker1_fio="Иванов И. И.", worker2_fio="Петров П. П.",
+                           worker3_fio="Сидоров С. С.", car_number="А123БВ", is_busy=False,
+                           created_at=now, updated_at=now,
+                           lat=random.uniform(59.8, 60.1), lon=random.uniform(29.8, 30.6))
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.bytes = 0
+        self.messages: list[dict] = []
+
+    async def send_text(self, data: str) -> None:
+        self.bytes += len(data.encode())
+        self.messages.append(json.loads(data))
+
+    async def close(self) -> None:
+        pass
+
+
+async def run(calls: int, teams: int) -> None:
+    service = ConnectionService()
+    call_list = [make_call(i) for i in range(1, calls + 1)]
+    team_list = [make_team(i) for i in range(1, teams + 1)]
+    service.dispatcher_state.rebuild([c.model_dump(mode="json") for c in call_list],
+                                     [t.model_dump(mode="json") for t in team_list], 0)
+
+    ws = FakeWebSocket()
+    await service.handle_connect_dispatcher(ws)
+    await asyncio.sleep(0)
+    snapshot_bytes = ws.bytes
+
+    # Минута работы: события по вызовам и координаты движущихся бригад раз в секунду
+    next_id = calls + 1
+    for second in range(60):
+        if second % (60 // CALL_EVENTS_PER_MINUTE) == 0:
+            action = random.choice(("add", "accept", "complete"))
+            if action == "add":
+                await service.notify_dispatchers(CallAddedMessage(event=EventType.CALL_ADDED, call=make_call(next_id)))
+                next_id += 1
+            elif action == "accept":
+                call_id = random.choice(list(service.dispatcher_state.calls))
+                team_id = random.randint(1, teams)
+                await service.notify_dispatchers(CallChangedMessage(
+                    event=EventType.CALL_CHANGED, call=make_call(call_id, CallStatus.ACCEPTED, team_id)))
+                await service.notify_dispatchers(TeamBusyMessage(event=EventType.TEAM_BUSY, team_id=team_id))
+            else:
+                call_id = random.choice(list(service.dispatcher_state.calls))
+                await service.notify_dispatchers(CallRemovedMessage(event=EventType.CALL_REMOVED, call_id=call_id))
+                await service.notify_dispatchers(TeamFreeMessage(event=EventType.TEAM_FREE,
+                                                                 team_id=random.randint(1, teams)))
+        await service.notify_dispatchers(TeamPositionsMessage(
+            event=EventType.TEAM_POSITIONS,
+            positions=[TeamPositionSchema(team_id=t, lat=random.uniform(59.8, 60.1), lon=random.uniform(29.8, 30.6))
+                       for t in random.sample(range(1, teams + 1), min(MOVING_TEAMS, teams))]))
+        await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    delta_bytes = ws.bytes - snapshot_bytes
+
+    # Состояние клиента из снимка и событий должно совпасть со снимком сервера
+    client_calls = {c["id"]: c for c in ws.messages[0]["calls"]}
+    client_teams = {t["id"]: t for t in ws.messages[0]["teams"]}
+    for event in ws.messages[1:]:
+        if event["event"] in (EventType.CALL_ADDED, EventType.CALL_CHANGED):
+            client_calls[event["call"]["id"]] = event["call"]
+        elif event["event"] == EventType.CALL_REMOVED:
+            client_calls.pop(event["call_id"], None)
+        elif event["event"] in (EventType.TEAM_BUSY, EventType.TEAM_FREE):
+            client_teams[event["team_id"]]["is_busy"] = event["event"] == EventType.TEAM_BUSY
+        elif event["event"] == EventType.TEAM_POSITIONS:
+            for p in event["positions"]:
+                client_teams[p["team_id"]].update(lat=p["lat"], lon=p["lon"])
+    snapshot = json.loads(service.dispatcher_state.snapshot().model_dump_json())
+    assert client_calls == {c["id"]: c for c in snapshot["calls"]}
+    assert client_teams == {t["id"]: t for t in snapshot["teams"]}
+    await service.handle_disconnect_dispatcher(ws)
+
+    # Опрос: актуальные вызовы и полная информация о бригадах каждые POLL_INTERVAL секунд
+    poll_bytes = (len(json.dumps([c.model_dump(mode="json") for c in call_list]).encode())
+                  + len(json.dumps([TeamFullInfoSchema(**t.model_dump()).model_dump(mode="json")
+                                    for t in team_list]).encode())) * (60 // POLL_INTERVAL)
+
+    print(f"{calls:>7} {teams:>7} {poll_bytes / 1024:>12.0f} {snapshot_bytes / 1024:>12.0f} {delta_bytes / 1024:>12.0f}")
+
+
+async def main() -> None:
+    print(f"Опрос раз в {POLL_INTERVAL} с; {CALL_EVENTS_PER_MINUTE} событий по вызовам в минуту, "
+          f"{MOVING_TEAMS} бригад в движении")
+    print(f"{'вызовов':>7} {'бригад':>7} {'опрос, КБ/мин':>12} {'снимок, КБ':>12} {'события, КБ/мин':>12}")
+    for calls, teams in ((50, 50), (200, 100), (1000, 300)):
+        await run(calls, teams)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,150 @@
+# Заполнение БД синтетическими данными и сравнение планов горячих запросов без индексов и с индексами
+# Запуск из корня проекта (использует БД из .env, добавляет данные с префиксом seed_):
+#   python -m benchmarks.explain_hot_queries --calls 500000 --notifications 1000000
+import argparse
+import asyncio
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncConnection
+
+from app.db.models import Base
+from app.settings import settings
+
+HOT_QUERIES = {
+    "get_new_calls": "SELECT * FROM call WHERE status = 'NEW'",
+    "get_actual_calls": "SELECT * FROM call WHERE status IN ('NEW', 'ACCEPTED')",
+    "get_call_by_team_id": "SELECT * FROM call WHERE team_id = :team_id AND status = 'ACCEPTED'",
+    "reports (date_time)": "SELECT * FROM call WHERE date_time >= now() - interval '7 days'",
+    "get_team_by_user_id": ("SELECT * FROM team WHERE is_deleted = false "
+                            "AND (worker1_id = :user_id OR worker2_id = :user_id OR worker3_id = :user_id)"),
+    "get_user_notifications": ("SELECT * FROM notification WHERE user_id = :user_id "
+                               "ORDER BY created_at DESC LIMIT 15"),
+    "get_users_by_role": "SELECT * FROM \"user\" WHERE role = 'DISPATCHER'",
+}
+
+
+async def seed(conn: AsyncConnection, teams: int, calls: int, notifications: int) -> None:
+    await conn.execute(text("""
+        INSERT INTO "user" (login, password, role, name, surname, patronym, created_at, updated_at)
+        SELECT 'seed_w' || g, 'x', 'WORKER', 'Иван', 'Иванов', 'Иванович', now(), now()
+        FROM generate_series(1, :workers) g
+        ON CONFLICT (login) DO NOTHING
+    """), {"workers": teams * 3})
+    await conn.execute(text("""
+        INSERT INTO "user" (login, password, role, name, surname, patronym, created_at, updated_at)
+        SELECT 'seed_d' || g, 'x', 'DISPATCHER', 'Петр', 'Петров', 'Петрович', now(), now()
+        FROM generate_series(1, 50) g
+        ON CONFLICT (login) DO NOTHING
+    """))
+    await conn.execute(text("""
+        INSERT INTO car (number, status, is_deleted, created_at, updated_at)
+        SELECT 'seed_' || g, true, false, now(), now()
+        FROM generate_series(1, :teams) g
+    """), {"teams": teams})
+
+    workers = (await conn.execute(text("SELECT id FROM \"user\" WHERE login LIKE 'seed_w%' ORDER BY id"))).scalars().all()
+    cars = (await conn.execute(text("SELECT id FROM car WHERE number LIKE 'seed_%' ORDER BY id"))).scalars().all()
+    await conn.execute(text("""
+        INSERT INTO team (worker1_id, worker2_id, worker3_id, car_id, lat, lon, is_deleted, is_moving,
+                          created_at, updated_at)
+        VALUES (:w1, :w2, :w3, :car_id, 59.93, 30.31, :is_deleted, false, now(), now())
+    """), [{"w1": workers[3 * i], "w2": workers[3 * i + 1], "w3": workers[3 * i + 2], "car_id": cars[i],
+            "is_deleted": i % 10 == 0} for i in range(min(teams, len(workers) // 3, len(cars)))])
+
+    await conn.execute(text("""
+        INSERT INTO patient (name, surname, patronym, gender, age, created_at, updated_at)
+        SELECT 'Анна', 'Смирнова', 'Сергеевна', 'FEMALE', 18 + g % 70, now(), now()
+        FROM generate_series(1, 1000) g
+    """))
+
+    team_ids = (await conn.execute(text("SELECT id FROM team ORDER BY id"))).scalars().all()
+    patient_ids = (await conn.execute(text("SELECT id FROM patient ORDER BY id"))).scalars().all()
+    await conn.execute(text("""
+        INSERT INTO call (status, type, reason, date_time, address, lat, lon, patient_id, team_id,
+                          created_at, updated_at)
+        SELECT s.status::call_status,
+               (ARRAY['CRITICAL', 'IMPORTANT', 'COMMON'])[1 + floor(random() * 3)::int]::call_type,
+               'Синтетический вызов',
+               now() - random() * interval '365 days',
+               'Невский проспект, 1',
+               59.8 + random() * 0.3,
+               29.8 + random() * 0.8,
+               (CAST(:patient_ids AS int[]))[1 + floor(random() * cardinality(CAST(:patient_ids AS int[])))::int],
+               CASE WHEN s.status IN ('ACCEPTED', 'COMPLETED')
+                    THEN (CAST(:team_ids AS int[]))[1 + floor(random() * cardinality(CAST(:team_ids AS int[])))::int]
+               END,
+               now(), now()
+        FROM (
+            SELECT CASE WHEN r < 0.005 THEN 'NEW'
+                        WHEN r < 0.01 THEN 'ACCEPTED'
+                        WHEN r < 0.9 THEN 'COMPLETED'
+                        ELSE 'REJECTED' END AS status
+            FROM (SELECT random() AS r FROM generate_series(1, :calls)) g
+        ) s
+    """), {"calls": calls, "team_ids": list(team_ids), "patient_ids": list(patient_ids)})
+
+    user_ids = (await conn.execute(text("SELECT id FROM \"user\" WHERE login LIKE 'seed_%'"))).scalars().all()
+    await conn.execute(text("""
+        INSERT INTO notification (notification_type, text, user_id, created_at, updated_at)
+        SELECT 'MESSAGE', 'Новый вызов',
+               (CAST(:user_ids AS int[]))[1 + floor(random() * cardinality(CAST(:user_ids AS int[])))::int],
+               now() - random() * interval '365 days', now()
+        FROM generate_series(1, :notifications)
+    """), {"notifications": notifications, "user_ids": list(user_ids)})
+
+
+async def set_indexes(conn: AsyncConnection, enabled: bool) -> None:
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            if enabled:
+                await conn.run_sync(lambda c: index.create(c, checkfirst=True))
+            else:
+                await conn.run_sync(lambda c: index.drop(c, checkfirst=True))
+    await conn.execute(text("ANALYZE"))
+
+
+async def explain(conn: AsyncConnection, title: str) -> dict[str, float]:
+    params = {
+        "team_id": (await conn.execute(text("SELECT team_id FROM call WHERE status = 'ACCEPTED' LIMIT 1"))).scalar(),
+        "user_id": (await conn.execute(text("SELECT worker2_id FROM team WHERE is_deleted = false LIMIT 1"))).scalar(),
+    }
+    timings = {}
+    print(f"\n===== {title} =====")
+    for name, query in HOT_QUERIES.items():
+        plan = (await conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {query}"), params)).scalars().all()
+        print(f"\n--- {name}")
+        print("\n".join(plan))
+        timings[name] = float(plan[-1].split(":")[1].split()[0])
+    return timings
+
+
+async def run(args: argparse.Namespace) -> None:
+    engine = create_async_engine(settings.get_db_url())
+    async with engine.begin() as conn:
+        if not args.no_seed:
+            await seed(conn, args.teams, args.calls, args.notifications)
+
+    async with engine.begin() as conn:
+        await set_indexes(conn, enabled=False)
+    async with engine.connect() as conn:
+        before = await explain(conn, "Без индексов")
+
+    async with engine.begin() as conn:
+        await set_indexes(conn, enabled=True)
+    async with engine.connect() as conn:
+        after = await explain(conn, "С индексами")
+
+    await engine.dispose()
+
+    print(f"\n{'запрос':<26} {'до, мс':>10} {'после, мс':>10}")
+    for name in HOT_QUERIES:
+        print(f"{name:<26} {before[name]:>10.3f} {after[name]:>10.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--teams", type=int, default=300)
+    parser.add_argument("--calls", type=int, default=500_000)
+    parser.add_argument("--notifications", type=int, default=1_000_000)
+    parser.add_argument("--no-seed", action="store_true", help="Не добавлять данные, только сравнить планы")
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,62 @@
+# Масштабирование планировщика движения бригад: 10/100/1000 одновременно движущихся бригад.
+# Запись в БД подменяется счетчиком запросов, WS - сокетами-заглушками, поэтому измеряется
+# собственная стоимость тика; число запросов к БД сравнивается с прежней схемой
+# (задача на бригаду: get_by_id + UPDATE + get_by_id на каждую точку).
+# Запуск из корня проекта: python -m benchmarks.movement_scheduler
+import asyncio
+import random
+import time
+
+from app.schemas.team import CoordinatesSchema
+from app.services.connection_service import connection_service
+from app.services.movement_service import MovementService
+from app.settings import settings
+
+
+class FakeWebSocket:
+    async def send_text(self, data: str) -> None:
+        pass
+
+
+class RecordingMovementService(MovementService):
+    def __init__(self):
+        super().__init__()
+        self.statements = 0
+
+    async def _flush(self, rows: list[dict]) -> None:
+        self.statements += 1
+
+
+async def run(teams: int, ticks: int) -> None:
+    service = RecordingMovementService()
+    for ws in list(connection_service.connections):
+        await connection_service.handle_disconnect_worker(ws)
+    for team_id in range(1, teams + 1):
+        for ws in (FakeWebSocket(), FakeWebSocket(), FakeWebSocket()):
+            connection_service._open(ws)
+            connection_service.workers[ws] = team_id
+            connection_service.teams[team_id].add(ws)
+        service.add(team_id, [CoordinatesSchema(lat=random.uniform(59.8, 60.1), lon=random.uniform(29.8, 30.6))
+                              for _ in range(ticks + 1)])
+
+    durations = []
+    for _ in range(ticks):
+        start = time.perf_counter()
+        await service.tick()
+        durations.append(time.perf_counter() - start)
+
+    per_second = 1 / settings.MOVEMENT_TICK_INTERVAL
+    avg_ms = sum(durations) / len(durations) * 1000
+    print(f"{teams:>6} {avg_ms:>12.2f} {max(durations) * 1000:>12.2f} "
+          f"{avg_ms / (settings.MOVEMENT_TICK_INTERVAL * 1000) * 100:>10.1f}% "
+          f"{service.statements / ticks * per_second:>10.0f} {teams * 3 * per_second:>10.0f}")
+
+
+async def main() -> None:
+    print(f"{'бригад':>6} {'тик, мс':>12} {'макс, мс':>12} {'загрузка':>11} {'SQL/с':>10} {'было SQL/с':>10}")
+    for teams in (10, 100, 1000):
+        await run(teams, ticks=20)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,65 @@
+# Сравнение сортировки новых вызовов на каждый запрос и индекса CallQueue
+# Запуск из корня проекта: python -m benchmarks.new_calls_queue
+import random
+import timeit
+from datetime import datetime, timedelta
+
+from app.db.models.call import CallStatus, CallType
+from app.schemas.call import CallModelSchema
+from app.utils.call_queue import CallQueue, CALL_TYPE_PRIORITY
+
+
+def generate_calls(count: int) -> list[CallModelSchema]:
+    now = datetime.now()
+    return [
+        CallModelSchema(id=i,
+                        reason="Тестовый вызов",
+                        address="Невский проспект, 1",
+                        date_time=now - timedelta(seconds=random.randint(0, 86400)),
+                        lat=random.uniform(59.8, 60.1),
+                        lon=random.uniform(29.8, 30.6),
+                        status=CallStatus.NEW,
+                        type=random.choice(list(CallType)),
+                        patient_id=1,
+                        team_id=None,
+                        created_at=now,
+                        updated_at=now)
+        for i in range(1, count + 1)
+    ]
+
+
+def sort_per_request(calls: list[CallModelSchema]) -> list[CallModelSchema]:
+    # Повторяет прежний get_new_calls без учета стоимости запроса к БД
+    result = list(calls)
+    result.sort(key=lambda c: (CALL_TYPE_PRIORITY[c.type], -c.date_time.timestamp()))
+    return result
+
+
+def main():
+    repeats = 200
+    print(f"{'вызовов':>8} {'sort, мкс':>12} {'queue, мкс':>12} {'push, мкс':>12} {'remove, мкс':>12}")
+    for count in (100, 500, 1000, 5000):
+        calls = generate_calls(count)
+        queue = CallQueue()
+        queue.rebuild(calls)
+        order_key = lambda c: (c.type, c.date_time)
+        assert list(map(order_key, queue.get_all())) == list(map(order_key, sort_per_request(calls)))
+
+        sort_time = timeit.timeit(lambda: sort_per_request(calls), number=repeats) / repeats
+        queue_time = timeit.timeit(queue.get_all, number=repeats) / repeats
+
+        extra = generate_calls(repeats)
+        for i, c in enumerate(extra):
+            extra[i] = c.model_copy(update={"id": count + i + 1})
+        push_iter = iter(extra)
+        push_time = timeit.timeit(lambda: queue.push(next(push_iter)), number=repeats) / repeats
+        remove_iter = iter(extra)
+        remove_time = timeit.timeit(lambda: queue.remove(next(remove_iter).id), number=repeats) / repeats
+
+        print(f"{count:>8} {sort_time * 1e6:>12.1f} {queue_time * 1e6:>12.1f} "
+              f"{push_time * 1e6:>12.1f} {remove_time * 1e6:>12.1f}")
+    print("Время sort не включает полное чтение таблицы call из PostgreSQL, которое CallQueue исключает")
+
+
+if __name__ == "__main__":
+    main()
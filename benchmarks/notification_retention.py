@@ -0,0 +1,58 @@
+# Удаление устаревших уведомлений: DELETE по created_at против отсоединения и удаления месячной секции.
+# Обе операции выполняются в транзакции над отдельной секцией за январь 2000 года и откатываются.
+# Запуск из корня проекта (использует БД из .env, пользователя с логином seed_d1):
+#   python -m benchmarks.notification_retention --rows 200000
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import text
+
+from app.db.dependencies import get_manual_session, session_manager
+
+PARTITION = "notification_p200001"
+
+
+async def main(args: argparse.Namespace) -> None:
+    async with get_manual_session() as session:
+        await session.execute(text("""
+            INSERT INTO "user" (login, password, role, name, surname, patronym, created_at, updated_at)
+            VALUES ('seed_d1', 'x', 'DISPATCHER', 'Петр', 'Петров', 'Петрович', now(), now())
+            ON CONFLICT (login) DO NOTHING
+        """))
+        await session.commit()
+        user_id = (await session.execute(text("SELECT id FROM \"user\" WHERE login = 'seed_d1'"))).scalar_one()
+
+        await session.execute(text(f"CREATE TABLE {PARTITION} PARTITION OF notification "
+                                   f"FOR VALUES FROM ('2000-01-01') TO ('2000-02-01')"))
+        await session.execute(text(f"""
+            INSERT INTO notification (notification_type, text, user_id, created_at, updated_at)
+            SELECT 'MESSAGE', 'seed_retention', :user_id,
+                   '2000-01-01'::timestamp + g * interval '1 second', now()
+            FROM generate_series(1, :rows) g
+        """), {"user_id": user_id, "rows": args.rows})
+
+        print(f"{args.rows} уведомлений в секции {PARTITION}")
+        print(f"{'способ':>16} {'мс':>10}")
+
+        savepoint = await session.begin_nested()
+        start = time.perf_counter()
+        await session.execute(text("DELETE FROM notification WHERE created_at < '2000-02-01'"))
+        print(f"{'DELETE':>16} {(time.perf_counter() - start) * 1000:>10.1f}")
+        await savepoint.rollback()
+
+        savepoint = await session.begin_nested()
+        start = time.perf_counter()
+        await session.execute(text(f"ALTER TABLE notification DETACH PARTITION {PARTITION}"))
+        await session.execute(text(f"DROP TABLE {PARTITION}"))
+        print(f"{'DETACH + DROP':>16} {(time.perf_counter() - start) * 1000:>10.1f}")
+        await savepoint.rollback()
+
+        await session.rollback()
+    await session_manager.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200000)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,97 @@
+# Уведомление N пользователей: прежний цикл notify_user (create с commit и refresh и изменение
+# счетчика непрочитанных на каждого) против notify_users с одним многострочным INSERT ... RETURNING
+# и одним вызовом скрипта счетчиков.
+# Считаются SQL-запросы, транзакции и команды Redis на вызов.
+# Запуск из корня проекта (использует БД и Redis из .env, пользователей с префиксом seed_d):
+#   python -m benchmarks.notify_users --users 40 --repeats 20
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import event, text
+
+from app.db.dependencies import get_manual_session, session_manager
+from app.db.models.notification import NotificationType
+from app.redis import redisService
+from app.schemas.notification import NotificationBaseSchema, NotificationCreateSchema
+from app.services.notification_service import NotificationService
+
+TEXT = "seed_notify"
+
+
+class LegacyNotificationService(NotificationService):
+    async def notify_users(self, ids, note, session) -> None:
+        for i in ids:
+            await self.notify_user(NotificationCreateSchema(text=note.text,
+                                                            notification_type=note.notification_type,
+                                                            user_id=i), session)
+
+
+class Counter:
+    def __init__(self):
+        self.statements = 0
+        self.commits = 0
+        self.redis = 0
+
+
+async def run(name: str, service: NotificationService, ids: list[int], repeats: int, counter: Counter) -> None:
+    note = NotificationBaseSchema(notification_type=NotificationType.MESSAGE, text=TEXT)
+    counter.statements = counter.commits = counter.redis = 0
+    timings = []
+    for _ in range(repeats):
+        async with get_manual_session() as session:
+            start = time.perf_counter()
+            await service.notify_users(ids, note, session)
+            timings.append(time.perf_counter() - start)
+
+    timings.sort()
+    print(f"{name:>10} {len(ids):>6} {timings[len(timings) // 2] * 1000:>10.1f} {timings[-1] * 1000:>10.1f} "
+          f"{counter.statements / repeats:>8.0f} {counter.commits / repeats:>8.0f} {counter.redis / repeats:>8.0f}")
+
+
+async def main(args: argparse.Namespace) -> None:
+    engine = session_manager.engine.sync_engine
+    counter = Counter()
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count_statement(*_):
+        counter.statements += 1
+
+    @event.listens_for(engine, "commit")
+    def count_commit(*_):
+        counter.commits += 1
+
+    incr_counters = redisService.incr_counters
+
+    async def count_incr(*args):
+        counter.redis += 1
+        return await incr_counters(*args)
+
+    redisService.incr_counters = count_incr
+
+    async with get_manual_session() as session:
+        await session.execute(text("""
+            INSERT INTO "user" (login, password, role, name, surname, patronym, created_at, updated_at)
+            SELECT 'seed_d' || g, 'x', 'DISPATCHER', 'Петр', 'Петров', 'Петрович', now(), now()
+            FROM generate_series(1, :users) g
+            ON CONFLICT (login) DO NOTHING
+        """), {"users": args.users})
+        await session.commit()
+        ids = list((await session.execute(text("SELECT id FROM \"user\" WHERE login LIKE 'seed_d%' ORDER BY id "
+                                               "LIMIT :users"), {"users": args.users})).scalars().all())
+
+    print(f"{'способ':>10} {'польз.':>6} {'p50, мс':>10} {'max, мс':>10} {'SQL':>8} {'COMMIT':>8} {'Redis':>8}")
+    await run("цикл", LegacyNotificationService(), ids, args.repeats, counter)
+    await run("пакет", NotificationService(), ids, args.repeats, counter)
+
+    async with get_manual_session() as session:
+        await session.execute(text("DELETE FROM notification WHERE text = :text"), {"text": TEXT})
+        await session.commit()
+    await session_manager.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=40)
+    parser.add_argument("--repeats", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
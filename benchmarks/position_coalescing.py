@@ -0,0 +1,66 @@
+# Координаты бригады для медленного клиента: все позиции в общей очереди против
+# слота "последняя позиция" с ограничением частоты отправки.
+# Позиции публикуются с частотой UPDATE_HZ, клиент принимает одно сообщение за SEND_DELAY секунд.
+# Измеряется число отправленных сообщений, отставание последней полученной позиции и остаток в очереди.
+# Запуск из корня проекта: python -m benchmarks.position_coalescing
+import asyncio
+import json
+import time
+
+from app.utils.ws_connection import ClientConnection, ws_stats
+
+UPDATE_HZ = 20
+SEND_DELAY = 0.1
+DURATION = 3.0
+TEAM_ID = 1
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.received: list[tuple[float, float]] = []
+
+    async def send_text(self, data: str) -> None:
+        await asyncio.sleep(SEND_DELAY)
+        self.received.append((time.perf_counter(), json.loads(data)["sent_at"]))
+
+    async def close(self) -> None:
+        pass
+
+
+async def run(coalesce: bool, rate_hz: float) -> None:
+    ws = FakeWebSocket()
+    connection = ClientConnection(ws, position_rate_hz=rate_hz)
+    connection.start()
+    coalesced_before = ws_stats.coalesced
+
+    start = time.perf_counter()
+    while time.perf_counter() - start < DURATION:
+        payload = json.dumps({"event": "move_team", "team_id": TEAM_ID, "sent_at": time.perf_counter()})
+        if coalesce:
+            connection.send_position(TEAM_ID, payload)
+        else:
+            connection.send(payload)
+        await asyncio.sleep(1 / UPDATE_HZ)
+
+    published_last = time.perf_counter()
+    backlog = len(connection.queue) + len(connection.positions)
+    staleness = [received - sent for received, sent in ws.received]
+    connection.stop()
+
+    name = "слот позиции" if coalesce else "общая очередь"
+    print(f"{name:>16} {rate_hz:>6.1f} {len(ws.received):>10} {backlog:>8} "
+          f"{max(staleness) * 1000:>12.0f} {(published_last - ws.received[-1][1]) * 1000:>14.0f} "
+          f"{ws_stats.coalesced - coalesced_before:>10}")
+
+
+async def main() -> None:
+    print(f"Публикаций: {int(DURATION * UPDATE_HZ)} за {DURATION} с, отправка клиенту {SEND_DELAY * 1000:.0f} мс")
+    print(f"{'режим':>16} {'Гц':>6} {'отправлено':>10} {'очередь':>8} {'max отст.,мс':>12} "
+          f"{'посл. отст.,мс':>14} {'замещено':>10}")
+    await run(coalesce=False, rate_hz=4.0)
+    await run(coalesce=True, rate_hz=4.0)
+    await run(coalesce=True, rate_hz=1.0)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
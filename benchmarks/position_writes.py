@@ -0,0 +1,81 @@
+# Нагрузка на таблицу team: синхронная запись каждой точки против буфера PositionService.
+# Моделируется минута движения бригад с тиком MOVEMENT_TICK_INTERVAL, запись в Redis и БД
+# подменяется счетчиком, поэтому сравнивается число UPDATE-запросов и строк.
+# Запуск из корня проекта: python -m benchmarks.position_writes
+import asyncio
+import random
+
+from app.services.position_service import PositionService, POSITIONS_KEY
+from app.settings import settings
+
+
+class MemoryHash:
+    """Хеш позиций в памяти вместо Redis."""
+
+    def __init__(self):
+        self.data: dict[str, str] = {}
+
+    async def set_hash(self, key: str, mapping: dict) -> None:
+        self.data.update({str(k): v for k, v in mapping.items()})
+
+    async def get_hash(self, key: str) -> dict[str, str]:
+        return dict(self.data)
+
+    async def del_hash_fields_if_equal(self, key: str, mapping: dict[str, str]) -> int:
+        equal = [k for k, v in mapping.items() if self.data.get(k) == v]
+        for k in equal:
+            del self.data[k]
+        return len(equal)
+
+
+class RecordingPositionService(PositionService):
+    def __init__(self):
+        super().__init__()
+        self.redisService = MemoryHash()
+        self.statements = 0
+        self.rows = 0
+        self.written: dict[int, tuple[float, float]] = {}
+
+    async def flush(self) -> int:
+        # Тот же порядок, что и в PositionService.flush, но UPDATE подменен счетчиком
+        stored = await self.redisService.get_hash(POSITIONS_KEY)
+        if not stored:
+            return 0
+        self.statements += 1
+        self.rows += len(stored)
+        self.written.update({int(k): tuple(map(float, v.split(","))) for k, v in stored.items()})
+        await self.redisService.del_hash_fields_if_equal(POSITIONS_KEY, stored)
+        return len(stored)
+
+
+async def run(teams: int, seconds: int) -> None:
+    service = RecordingPositionService()
+    last = {}
+
+    ticks = int(seconds / settings.MOVEMENT_TICK_INTERVAL)
+    ticks_per_flush = max(1, int(settings.POSITION_FLUSH_INTERVAL / settings.MOVEMENT_TICK_INTERVAL))
+    for tick in range(1, ticks + 1):
+        positions = {team_id: (random.uniform(59.8, 60.1), random.uniform(29.8, 30.6))
+                     for team_id in range(1, teams + 1)}
+        await service.set_many(positions)
+        last.update(positions)
+        if tick % ticks_per_flush == 0:
+            await service.flush()
+    await service.flush()
+
+    # В БД должна оказаться последняя позиция каждой бригады
+    assert service.written == last
+
+    direct = teams * ticks
+    print(f"{teams:>6} {direct:>12} {service.statements:>12} {service.rows:>12} {direct / service.statements:>12.0f}x")
+
+
+async def main() -> None:
+    print(f"Тик {settings.MOVEMENT_TICK_INTERVAL} с, сброс раз в {settings.POSITION_FLUSH_INTERVAL} с, 60 с движения")
+    print(f"{'бригад':>6} {'было UPDATE':>12} {'стало UPDATE':>12} {'строк':>12} {'выигрыш':>13}")
+    for teams in (10, 100, 1000):
+        await run(teams, seconds=60)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
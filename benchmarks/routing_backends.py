@@ -0,0 +1,102 @@
+# Пропускная способность локального маршрутизатора (A* по дорожному графу) и HTTP-бэкенда
+# с локальной заглушкой OSRM вместо внешнего сервиса.
+# Запуск из корня проекта: python -m benchmarks.routing_backends --grid 150 --queries 200
+import argparse
+import asyncio
+import json
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from app.schemas.team import CoordinatesSchema
+from app.utils.road_graph import RoadGraph
+from app.utils.routing import HttpRouteBackend, LocalRouteBackend, route_http_client
+from app.utils.team_locator import haversine_km
+
+LAT_MIN, LAT_MAX = 59.85, 60.05
+LON_MIN, LON_MAX = 30.1, 30.5
+
+
+def build_grid_graph(size: int) -> RoadGraph:
+    lat, lon = np.meshgrid(np.linspace(LAT_MIN, LAT_MAX, size), np.linspace(LON_MIN, LON_MAX, size), indexing="ij")
+    lat, lon = lat.ravel(), lon.ravel()
+    ids = np.arange(size * size).reshape(size, size)
+    pairs = np.concatenate([
+        np.column_stack([ids[:, :-1].ravel(), ids[:, 1:].ravel()]),
+        np.column_stack([ids[:-1, :].ravel(), ids[1:, :].ravel()]),
+    ])
+    sources = np.concatenate([pairs[:, 0], pairs[:, 1]])
+    targets = np.concatenate([pairs[:, 1], pairs[:, 0]])
+    # Длина ребра не меньше расстояния по прямой - эвристика A* остается допустимой
+    weights = np.array([haversine_km(lat[a], lon[a], lat[b], lon[b]) * 1000 for a, b in zip(sources, targets)])
+    weights *= np.random.uniform(1.0, 1.5, len(weights))
+    return RoadGraph.from_edges(lat, lon, sources, targets, weights)
+
+
+def random_point() -> CoordinatesSchema:
+    return CoordinatesSchema(lat=random.uniform(LAT_MIN, LAT_MAX), lon=random.uniform(LON_MIN, LON_MAX))
+
+
+async def start_osrm_stub() -> tuple[asyncio.Server, int]:
+    coordinates = [[LON_MIN + i * 0.001, LAT_MIN + i * 0.001] for i in range(300)]
+    body = json.dumps({"routes": [{"geometry": {"coordinates": coordinates}}]}).encode()
+    response = (b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                b"Content-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body)
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while await reader.readuntil(b"\r\n\r\n"):
+                writer.write(response)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1]
+
+
+async def measure(backend, queries: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+    pairs = [(random_point(), random_point()) for _ in range(queries)]
+
+    async def one(a: CoordinatesSchema, b: CoordinatesSchema) -> None:
+        async with semaphore:
+            await backend.get_route(a, b)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(a, b) for a, b in pairs))
+    return queries / (time.perf_counter() - start)
+
+
+async def main(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as path:
+        build_grid_graph(args.grid).save(path)
+        local = LocalRouteBackend(path)
+        load_start = time.perf_counter()
+        graph = local.load()
+        print(f"Граф {len(graph.lat)} вершин, {len(graph.indices)} ребер, "
+              f"загрузка (mmap) {(time.perf_counter() - load_start) * 1000:.1f} мс")
+
+        for concurrency in (1, 4):
+            qps = await measure(local, args.queries, concurrency)
+            print(f"local, параллельно {concurrency}: {qps:.1f} запросов/с")
+
+    server, port = await start_osrm_stub()
+    http = HttpRouteBackend()
+    http.api_url = f"http://127.0.0.1:{port}/route/v1/driving"
+    await route_http_client.start()
+    for concurrency in (1, 10):
+        qps = await measure(http, args.queries * 5, concurrency)
+        print(f"http (заглушка), параллельно {concurrency}: {qps:.1f} запросов/с")
+    print(f"Задержка HTTP: {route_http_client.stats.snapshot()}")
+    await route_http_client.close()
+    server.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--grid", type=int, default=150, help="Сторона синтетической сетки дорог")
+    parser.add_argument("--queries", type=int, default=200)
+    asyncio.run(main(parser.parse_args()))
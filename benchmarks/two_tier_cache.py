@@ -0,0 +1,44 @@
+# Чтение кэша через RedisService: только Redis (запрос по сети и json.loads) против локального LRU
+# перед Redis. Значение похоже на teams:full_info - список из 50 бригад.
+# Запуск из корня проекта (использует Redis из .env): python -m benchmarks.two_tier_cache --reads 20000
+import argparse
+import asyncio
+import time
+
+from app.redis import redisService
+
+KEY = "bench:two_tier"
+
+
+def make_teams(count: int) -> list[dict]:
+    return [{"id": i, "lat": 59.9 + i / 1000, "lon": 30.3 + i / 1000, "car_number": f"А{i:03d}МР78",
+             "worker1_fio": "Иванов И. И.", "worker2_fio": "Петров П. П.", "worker3_fio": "Сидоров С. С.",
+             "is_busy": bool(i % 2)} for i in range(count)]
+
+
+async def run(name: str, reads: int, local: bool) -> None:
+    start = time.perf_counter()
+    for _ in range(reads):
+        await redisService.get_cache(KEY, local=local)
+    elapsed = time.perf_counter() - start
+    print(f"{name:>12} {elapsed / reads * 1e6:>12.1f} {reads / elapsed:>12.0f}")
+
+
+async def main(args: argparse.Namespace) -> None:
+    await redisService.start()
+    await asyncio.sleep(0.1)
+    await redisService.set_cache(KEY, make_teams(50), 60)
+
+    print(f"{'режим':>12} {'мкс/чтение':>12} {'чтений/с':>12}")
+    await run("Redis", args.reads, local=False)
+    await run("локальный", args.reads, local=True)
+    print(redisService.stats.snapshot())
+
+    await redisService.del_cache(KEY)
+    await redisService.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--reads", type=int, default=20000)
+    asyncio.run(main(parser.parse_args()))
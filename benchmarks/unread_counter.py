@@ -0,0 +1,93 @@
+# Обновление значка непрочитанных: перезапрос страницы уведомлений против счетчика в Redis,
+# и время чтения страниц по курсору на разной глубине списка.
+# Запуск из корня проекта (использует БД и Redis из .env, пользователя с логином seed_d1):
+#   python -m benchmarks.unread_counter --notifications 5000 --repeats 50
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import text
+
+from app.db.dependencies import get_manual_session, session_manager
+from app.db.models.notification import NotificationType
+from app.db.models.user import UserRole
+from app.redis import redisService
+from app.schemas.notification import NotificationCreateSchema
+from app.services.notification_service import NotificationService
+
+TEXT = "seed_unread"
+
+
+async def measure(repeats: int, call) -> float:
+    timings = []
+    for _ in range(repeats):
+        async with get_manual_session() as session:
+            start = time.perf_counter()
+            await call(session)
+            timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2] * 1000
+
+
+async def main(args: argparse.Namespace) -> None:
+    service = NotificationService()
+    async with get_manual_session() as session:
+        await session.execute(text("""
+            INSERT INTO "user" (login, password, role, name, surname, patronym, created_at, updated_at)
+            VALUES ('seed_d1', 'x', 'DISPATCHER', 'Петр', 'Петров', 'Петрович', now(), now())
+            ON CONFLICT (login) DO NOTHING
+        """))
+        await session.commit()
+        user_id = (await session.execute(text("SELECT id FROM \"user\" WHERE login = 'seed_d1'"))).scalar_one()
+
+    for start in range(0, args.notifications, 1000):
+        async with get_manual_session() as session:
+            await service.notify_many([NotificationCreateSchema(notification_type=NotificationType.MESSAGE,
+                                                                text=TEXT,
+                                                                user_id=user_id if i % 2 else None,
+                                                                target_role=None if i % 2 else UserRole.DISPATCHER)
+                                       for i in range(start, min(start + 1000, args.notifications))], session)
+    await redisService.del_counter(f"notifications:unread:{user_id}")
+
+    async def first_page(session):
+        await service.get_user_notifications(user_id, session, role=UserRole.DISPATCHER)
+
+    async def unread(session):
+        await service.get_unread_count(user_id, session, role=UserRole.DISPATCHER)
+
+    print(f"{args.notifications} уведомлений, половина - рассылки роли")
+    print(f"{'способ':>24} {'p50, мс':>10}")
+    print(f"{'страница уведомлений':>24} {await measure(args.repeats, first_page):>10.2f}")
+    async with get_manual_session() as session:
+        start = time.perf_counter()
+        await unread(session)
+        print(f"{'счетчик (подсчет в БД)':>24} {(time.perf_counter() - start) * 1000:>10.2f}")
+    print(f"{'счетчик (Redis)':>24} {await measure(args.repeats, unread):>10.2f}")
+
+    print(f"{'страница':>24} {'p50, мс':>10}")
+    cursor = None
+    for page in range(1, args.pages + 1):
+        async with get_manual_session() as session:
+            start = time.perf_counter()
+            result = await service.get_user_notifications(user_id, session, role=UserRole.DISPATCHER,
+                                                          cursor=cursor, limit=50)
+            elapsed = (time.perf_counter() - start) * 1000
+        if page in (1, args.pages // 2, args.pages):
+            print(f"{page:>24} {elapsed:>10.2f}")
+        cursor = result.next_cursor
+        if cursor is None:
+            break
+
+    async with get_manual_session() as session:
+        await session.execute(text("DELETE FROM notification WHERE text = :text"), {"text": TEXT})
+        await session.commit()
+    await redisService.del_counter(f"notifications:unread:{user_id}")
+    await session_manager.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--notifications", type=int, default=5000)
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--pages", type=int, default=40)
+    asyncio.run(main(parser.parse_args()))
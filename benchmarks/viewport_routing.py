@@ -0,0 +1,79 @@
+# Рассылка диспетчерам с подписками на области карты: все события всем против индекса областей.
+# 100 диспетчеров смотрят на центр города, где происходят события, остальные - на случайные
+# небольшие области по всему городу. Время события должно зависеть от числа подходящих
+# подписчиков, а не от общего числа соединений.
+# Запуск из корня проекта: python -m benchmarks.viewport_routing
+import asyncio
+import random
+import time
+
+from app.schemas.websocket import CallAddedMessage, EventType, ViewportSchema
+from app.services.connection_service import ConnectionService
+from benchmarks.dispatcher_feed import make_call
+
+LOCAL = 100
+EVENTS = 500
+CENTER = (59.92, 30.28, 59.96, 30.36)
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.received = 0
+
+    async def send_text(self, data: str) -> None:
+        self.received += 1
+
+    async def close(self) -> None:
+        pass
+
+
+def random_bbox() -> tuple[float, float, float, float]:
+    lat, lon = random.uniform(59.75, 60.1), random.uniform(29.7, 30.7)
+    return lat, lon, lat + 0.04, lon + 0.08
+
+
+async def run(far: int, filtered: bool) -> None:
+    service = ConnectionService()
+    service.dispatcher_state.rebuild([], [], 0)
+    sockets = [FakeWebSocket() for _ in range(LOCAL + far)]
+    for i, ws in enumerate(sockets):
+        await service.handle_connect_dispatcher(ws, 0)
+        if filtered:
+            service.subscribe_dispatcher(ws, ViewportSchema(bbox=CENTER if i < LOCAL else random_bbox()))
+
+    calls = []
+    for i in range(EVENTS):
+        call = make_call(i + 1)
+        call.lat, call.lon = random.uniform(CENTER[0], CENTER[2]), random.uniform(CENTER[1], CENTER[3])
+        calls.append(call)
+    # Снимки при подписке уже отправлены, считаются только события
+    await asyncio.sleep(0.05)
+    before = sum(ws.received for ws in sockets)
+
+    elapsed = 0.0
+    for call in calls:
+        message = CallAddedMessage(event=EventType.CALL_ADDED, call=call)
+        start = time.perf_counter()
+        await service.notify_dispatchers(message)
+        elapsed += time.perf_counter() - start
+        await asyncio.sleep(0)
+
+    await asyncio.sleep(0.2)
+    delivered = sum(ws.received for ws in sockets) - before
+    for ws in sockets:
+        await service.handle_disconnect_dispatcher(ws)
+
+    name = "области" if filtered else "всем"
+    print(f"{name:>8} {LOCAL + far:>8} {delivered / EVENTS:>14.1f} {elapsed / EVENTS * 1e6:>14.1f}")
+
+
+async def main() -> None:
+    print(f"{EVENTS} событий в центре, {LOCAL} диспетчеров на центре")
+    print(f"{'режим':>8} {'соедин.':>8} {'получателей':>14} {'мкс/событие':>14}")
+    for far in (0, 1000, 5000):
+        await run(far, filtered=False)
+        await run(far, filtered=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
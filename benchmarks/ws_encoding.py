@@ -0,0 +1,62 @@
+# Кодирование WS-сообщения при рассылке N сокетам: model_dump + json.dumps на каждый сокет
+# (прежний send_json) против одного model_dump_json через MessageEncoder.
+# Запуск из корня проекта: python -m benchmarks.ws_encoding
+import json
+import timeit
+from datetime import datetime
+
+from app.db.models.call import CallStatus, CallType
+from app.schemas.call import CallModelSchema, CallAssignmentSchema
+from app.schemas.websocket import NewCallMessage, CallsAssignedMessage, EventType
+from app.utils.ws_encoding import MessageEncoder
+
+
+def new_call_message() -> NewCallMessage:
+    now = datetime.now()
+    return NewCallMessage(event=EventType.NEW_CALL,
+                          call=CallModelSchema(id=1,
+                                               reason="Боль в груди, затрудненное дыхание",
+                                               address="Невский проспект, 1",
+                                               date_time=now,
+                                               lat=59.93,
+                                               lon=30.31,
+                                               status=CallStatus.NEW,
+                                               type=CallType.CRITICAL,
+                                               patient_id=1,
+                                               team_id=None,
+                                               created_at=now,
+                                               updated_at=now))
+
+
+def calls_assigned_message() -> CallsAssignedMessage:
+    return CallsAssignedMessage(event=EventType.CALLS_ASSIGNED,
+                                assignments=[CallAssignmentSchema(call_id=i, team_id=i, distance_km=1.5)
+                                             for i in range(1, 51)])
+
+
+def main():
+    repeats = 20
+    print(f"{'сообщение':>16} {'сокетов':>8} {'было, мс':>10} {'стало, мс':>10} {'выигрыш':>9}")
+    for name, factory in (("new_call", new_call_message), ("calls_assigned", calls_assigned_message)):
+        message = factory()
+        assert json.loads(MessageEncoder().encode(message)) == message.model_dump(mode="json")
+
+        for sockets in (10, 100, 500):
+            def per_socket():
+                for _ in range(sockets):
+                    json.dumps(message.model_dump(mode="json"))
+
+            def once():
+                # Новый объект на каждую рассылку, как в сервисах
+                encoder = MessageEncoder()
+                fresh = factory()
+                for _ in range(sockets):
+                    encoder.encode(fresh)
+
+            old = timeit.timeit(per_socket, number=repeats) / repeats
+            new = timeit.timeit(once, number=repeats) / repeats
+            print(f"{name:>16} {sockets:>8} {old * 1000:>10.3f} {new * 1000:>10.3f} {old / new:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# Рассылка диспетчерам: последовательный send_json против очередей ClientConnection.
+# 500 сокетов-заглушек, часть из них медленные (каждая отправка занимает SLOW_SEND секунд).
+# Измеряется, сколько ждет вызывающий код (например, accept_call) и когда сообщение
+# доходит до быстрых клиентов.
+# Запуск из корня проекта: python -m benchmarks.ws_fanout
+import asyncio
+import json
+import time
+
+from app.schemas.websocket import CallAcceptedMessage, EventType
+from app.services.connection_service import ConnectionService
+from app.settings import settings
+
+SOCKETS = 500
+SLOW_SEND = 0.05
+BROADCASTS = 20
+
+
+class FakeWebSocket:
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.received: list[float] = []
+        self.closed = False
+
+    async def send_text(self, data: str) -> None:
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        else:
+            await asyncio.sleep(0)
+        self.received.append(time.perf_counter())
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+async def sequential_notify(sockets: list[FakeWebSocket], message: CallAcceptedMessage) -> None:
+    # Прежний notify_dispatchers: send_json кодирует результат model_dump через json.dumps
+    for ws in sockets:
+        await ws.send_text(json.dumps(message.model_dump(mode="json")))
+
+
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def run(slow: int, queued: bool) -> None:
+    sockets = [FakeWebSocket(SLOW_SEND if i < slow else 0.0) for i in range(SOCKETS)]
+    service = ConnectionService()
+    for ws in sockets:
+        await service.handle_connect_dispatcher(ws)
+
+    caller, delivery = [], []
+    for i in range(BROADCASTS):
+        message = CallAcceptedMessage(event=EventType.CALL_ACCEPTED, call_id=i + 1, team_id=1)
+        for ws in sockets:
+            ws.received.clear()
+
+        start = time.perf_counter()
+        if queued:
+            await service.notify_dispatchers(message)
+        else:
+            await sequential_notify(sockets, message)
+        caller.append(time.perf_counter() - start)
+
+        # Ожидание доставки всем быстрым клиентам
+        while any(not ws.received for ws in sockets[slow:]):
+            await asyncio.sleep(0.001)
+        delivery.extend(ws.received[0] - start for ws in sockets[slow:])
+
+    disconnected = sum(ws.closed for ws in sockets)
+    for ws in sockets:
+        await service.handle_disconnect_dispatcher(ws)
+
+    name = "очереди" if queued else "последовательно"
+    print(f"{name:>16} {slow:>6} {percentile(caller, 0.5) * 1000:>12.2f} {max(caller) * 1000:>12.2f} "
+          f"{percentile(delivery, 0.5) * 1000:>12.2f} {percentile(delivery, 0.95) * 1000:>12.2f} {disconnected:>9}")
+
+
+async def main() -> None:
+    print(f"{SOCKETS} диспетчеров, медленная отправка {SLOW_SEND * 1000:.0f} мс, "
+          f"очередь {settings.WS_SEND_QUEUE_SIZE}, {BROADCASTS} рассылок")
+    print(f"{'режим':>16} {'медл.':>6} {'вызов p50':>12} {'вызов max':>12} "
+          f"{'дост. p50':>12} {'дост. p95':>12} {'отключено':>9}")
+    for slow in (0, 5, 50):
+        await run(slow, queued=False)
+        await run(slow, queued=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,98 @@
+# Кодировки WS-сообщений: JSON, JSON + permessage-deflate, MessagePack, MessagePack + deflate.
+# Размер события считается по потоку однотипных сообщений через один контекст сжатия
+# (как у websockets с сохранением словаря между сообщениями), время - на рассылку SOCKETS клиентам:
+# JSON и MessagePack кодируются один раз, а deflate выполняется для каждого соединения отдельно.
+# Запуск из корня проекта: python -m benchmarks.ws_protocols
+import random
+import time
+import zlib
+from datetime import datetime
+
+from app.db.models.call import CallStatus, CallType
+from app.db.models.patient import PatientGender
+from app.schemas.call import CallFullInfoSchema
+from app.schemas.team import CoordinatesSchema
+from app.schemas.websocket import AssignedCallMessage, DispatcherSnapshotMessage, EventType, MoveTeamMessage, \
+    NewCallMessage
+from app.utils.event_bus import stamp
+from app.utils.ws_encoding import MessageEncoder
+from benchmarks.dispatcher_feed import make_call, make_team
+
+EVENTS = 200
+SOCKETS = 500
+
+
+def new_call(i: int) -> NewCallMessage:
+    return NewCallMessage(event=EventType.NEW_CALL, call=make_call(i + 1))
+
+
+def assigned_call(i: int) -> AssignedCallMessage:
+    now = datetime.now()
+    return AssignedCallMessage(event=EventType.ASSIGNED_CALL,
+                               call=CallFullInfoSchema(id=i + 1, reason="Боль в груди, затрудненное дыхание",
+                                                       address="Невский проспект, 1", date_time=now,
+                                                       status=CallStatus.ACCEPTED,
+                                                       type=random.choice(list(CallType)),
+                                                       patient_name="Иван", patient_surname="Иванов",
+                                                       patient_patronym="Иванович", patient_age=54,
+                                                       patient_gender=PatientGender.MALE,
+                                                       lat=random.uniform(59.8, 60.1),
+                                                       lon=random.uniform(29.8, 30.6),
+                                                       created_at=now, updated_at=now))
+
+
+def move_team(i: int) -> MoveTeamMessage:
+    return MoveTeamMessage(event=EventType.MOVE_TEAM,
+                           coordinates=CoordinatesSchema(lat=random.uniform(59.8, 60.1),
+                                                         lon=random.uniform(29.8, 30.6)))
+
+
+def snapshot(i: int) -> DispatcherSnapshotMessage:
+    return DispatcherSnapshotMessage(event=EventType.SNAPSHOT, seq=i,
+                                     calls=[make_call(c + 1) for c in range(200)],
+                                     teams=[make_team(t + 1) for t in range(100)])
+
+
+def deflate_stream(payloads: list[bytes]) -> list[bytes]:
+    # Параметры permessage-deflate в websockets: memLevel=5, хвост 00 00 ff ff не передается
+    compressor = zlib.compressobj(wbits=-15, memLevel=5)
+    return [(compressor.compress(p) + compressor.flush(zlib.Z_SYNC_FLUSH))[:-4] for p in payloads]
+
+
+def main() -> None:
+    print(f"Событий каждого типа: {EVENTS}, время рассылки {SOCKETS} клиентам")
+    print(f"{'сообщение':>14} {'кодировка':>16} {'байт/событие':>13} {'от JSON':>8} {'мс/рассылка':>12}")
+    for name, factory, count in (("new_call", new_call, EVENTS), ("assigned_call", assigned_call, EVENTS),
+                                 ("move_team", move_team, EVENTS), ("snapshot", snapshot, 5)):
+        texts = [stamp(i + 1, MessageEncoder().encode(factory(i))) for i in range(count)]
+        packed = [MessageEncoder().pack(text) for text in texts]
+        raw = [text.encode() for text in texts]
+        sizes = {
+            "json": sum(map(len, raw)),
+            "json+deflate": sum(map(len, deflate_stream(raw))),
+            "msgpack": sum(map(len, packed)),
+            "msgpack+deflate": sum(map(len, deflate_stream(packed))),
+        }
+
+        # Время рассылки одного события: кодирование один раз, сжатие - в контексте каждого клиента
+        sample = factory(0)
+        timings = {}
+        for encoding in sizes:
+            compressors = [zlib.compressobj(wbits=-15, memLevel=5) for _ in range(SOCKETS)] \
+                if encoding.endswith("deflate") else []
+            start = time.perf_counter()
+            encoder = MessageEncoder()
+            payload = stamp(1, encoder.encode(sample))
+            data = encoder.pack(payload) if encoding.startswith("msgpack") else payload.encode()
+            for compressor in compressors:
+                compressor.compress(data)
+                compressor.flush(zlib.Z_SYNC_FLUSH)
+            timings[encoding] = time.perf_counter() - start
+
+        for encoding, size in sizes.items():
+            print(f"{name:>14} {encoding:>16} {size / count:>13.0f} {size / sizes['json']:>7.0%} "
+                  f"{timings[encoding] * 1000:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
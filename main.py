@@ -1,3 +1,4 @@
+import asyncio
 import time
 from contextlib import asynccontextmanager
 
@@ -5,7 +6,7 @@ from fastapi import FastAPI, APIRouter, Request, Response
 from fastapi_limiter import FastAPILimiter
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.db.dependencies import session_manager
+from app.db.dependencies import session_manager, get_manual_session
 
 from app.routers.user import router as users_router
 from app.routers.patient import router as patients_router
@@ -16,8 +17,19 @@ from app.routers.auth import router as auth_router
 from app.routers.notifications import router as notifications_router
 from app.routers.reports import router as reports_router
 from app.routers.websocket import router as websockets_router
+from app.routers.metrics import router as metrics_router
 
 from app.redis import redisService
+from app.utils.routing import route_http_client, local_route_backend
+from app.settings import settings
+from app.services.call_service import CallService
+from app.services.team_service import TeamService
+from app.services.movement_service import movement_service
+from app.services.position_service import position_service
+from app.services.connection_service import connection_service
+from app.services.dispatcher_state_service import dispatcher_state_service
+from app.services.outbox_service import outbox_service
+from app.services.notification_retention_service import notification_retention_service
 
 from logger import logger
 
@@ -25,9 +37,34 @@ from logger import logger
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await FastAPILimiter.init(redisService.redis_client)
+    await redisService.start()
+    await route_http_client.start()
+    if settings.ROUTE_BACKEND == "local" or settings.ROUTE_FALLBACK_TO_LOCAL:
+        await asyncio.to_thread(local_route_backend.load)
+
+    await connection_service.start()
+    async with get_manual_session() as session:
+        await CallService().load_new_calls(session)
+        await TeamService().load_team_locator(session)
+        await dispatcher_state_service.load(session)
+
+    movement_service.start()
+    position_service.start()
+    dispatcher_state_service.start()
+    outbox_service.start()
+    notification_retention_service.start()
 
     yield
 
+    await notification_retention_service.stop()
+    await outbox_service.stop()
+    await dispatcher_state_service.stop()
+    await connection_service.stop()
+    await movement_service.stop()
+    await position_service.stop()
+
+    await redisService.stop()
+    await route_http_client.close()
     await session_manager.close()
 
 
@@ -63,6 +100,7 @@ api_router.include_router(auth_router)
 api_router.include_router(notifications_router)
 api_router.include_router(reports_router)
 api_router.include_router(websockets_router)
+api_router.include_router(metrics_router)
 
 app.include_router(api_router)
 
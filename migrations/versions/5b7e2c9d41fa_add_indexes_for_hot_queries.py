@@ -0,0 +1,51 @@
+"""add indexes for hot queries
+
+Revision ID: 5b7e2c9d41fa
+Revises: 2ca59d5037d2
+Create Date: 2026-10-18 12:04:11.532817
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b7e2c9d41fa'
+down_revision: Union[str, None] = '2ca59d5037d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_call_status_actual', 'call', ['status', 'type', 'date_time'], unique=False,
+                    postgresql_where=sa.text("status IN ('NEW', 'ACCEPTED')"))
+    op.create_index('ix_call_team_id_status', 'call', ['team_id', 'status'], unique=False)
+    op.create_index('ix_call_date_time', 'call', ['date_time'], unique=False)
+
+    op.create_index('ix_team_worker1_id_active', 'team', ['worker1_id'], unique=False,
+                    postgresql_where=sa.text('is_deleted = false'))
+    op.create_index('ix_team_worker2_id_active', 'team', ['worker2_id'], unique=False,
+                    postgresql_where=sa.text('is_deleted = false'))
+    op.create_index('ix_team_worker3_id_active', 'team', ['worker3_id'], unique=False,
+                    postgresql_where=sa.text('is_deleted = false'))
+
+    op.create_index('ix_car_number_active', 'car', ['number'], unique=False,
+                    postgresql_where=sa.text('is_deleted = false'))
+
+    op.create_index('ix_notification_user_id_created_at', 'notification', ['user_id', 'created_at'], unique=False)
+
+    op.create_index('ix_user_role', 'user', ['role'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_user_role', table_name='user')
+    op.drop_index('ix_notification_user_id_created_at', table_name='notification')
+    op.drop_index('ix_car_number_active', table_name='car')
+    op.drop_index('ix_team_worker3_id_active', table_name='team')
+    op.drop_index('ix_team_worker2_id_active', table_name='team')
+    op.drop_index('ix_team_worker1_id_active', table_name='team')
+    op.drop_index('ix_call_date_time', table_name='call')
+    op.drop_index('ix_call_team_id_status', table_name='call')
+    op.drop_index('ix_call_status_actual', table_name='call')
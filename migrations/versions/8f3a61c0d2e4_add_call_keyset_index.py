@@ -0,0 +1,28 @@
+"""add call keyset index
+
+Revision ID: 8f3a61c0d2e4
+Revises: 5b7e2c9d41fa
+Create Date: 2026-10-18 13:21:47.118402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f3a61c0d2e4'
+down_revision: Union[str, None] = '5b7e2c9d41fa'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_call_date_time_id', 'call', ['date_time', 'id'], unique=False)
+    op.drop_index('ix_call_date_time', table_name='call')
+
+
+def downgrade() -> None:
+    op.create_index('ix_call_date_time', 'call', ['date_time'], unique=False)
+    op.drop_index('ix_call_date_time_id', table_name='call')
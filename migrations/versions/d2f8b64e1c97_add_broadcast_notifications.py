@@ -0,0 +1,68 @@
+"""add broadcast notifications
+
+Revision ID: d2f8b64e1c97
+Revises: c91e5a7d3b20
+Create Date: 2026-10-18 20:32:05.274613
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2f8b64e1c97'
+down_revision: Union[str, None] = 'c91e5a7d3b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.alter_column('notification', 'user_id', existing_type=sa.Integer(), nullable=True)
+    op.add_column('notification', sa.Column('target_role',
+                                            postgresql.ENUM('DISPATCHER', 'WORKER', 'ADMIN', name='user_role',
+                                                            create_type=False),
+                                            nullable=True))
+    op.add_column('notification', sa.Column('target_team_id', sa.Integer(), nullable=True))
+    op.create_foreign_key('notification_target_team_id_fkey', 'notification', 'team',
+                          ['target_team_id'], ['id'], ondelete='CASCADE')
+    op.create_check_constraint('ck_notification_single_target', 'notification',
+                               'num_nonnulls(user_id, target_role, target_team_id) = 1')
+    op.create_index('ix_notification_target_role_created_at', 'notification', ['target_role', 'created_at'],
+                    unique=False, postgresql_where=sa.text('target_role IS NOT NULL'))
+    op.create_index('ix_notification_target_team_id_created_at', 'notification', ['target_team_id', 'created_at'],
+                    unique=False, postgresql_where=sa.text('target_team_id IS NOT NULL'))
+
+    op.create_table('notificationreceipt',
+    sa.Column('notification_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('is_read', sa.Boolean(), server_default=sa.text('false'), nullable=False),
+    sa.Column('is_dismissed', sa.Boolean(), server_default=sa.text('false'), nullable=False),
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['notification_id'], ['notification.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('notification_id', 'user_id', name='uq_notificationreceipt_notification_id_user_id')
+    )
+    op.create_index('ix_notificationreceipt_user_id', 'notificationreceipt', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_notificationreceipt_user_id', table_name='notificationreceipt')
+    op.drop_table('notificationreceipt')
+
+    # Рассылки не переносятся в персональные уведомления и удаляются
+    op.execute("DELETE FROM notification WHERE user_id IS NULL")
+    op.drop_index('ix_notification_target_team_id_created_at', table_name='notification',
+                  postgresql_where=sa.text('target_team_id IS NOT NULL'))
+    op.drop_index('ix_notification_target_role_created_at', table_name='notification',
+                  postgresql_where=sa.text('target_role IS NOT NULL'))
+    op.drop_constraint('ck_notification_single_target', 'notification', type_='check')
+    op.drop_constraint('notification_target_team_id_fkey', 'notification', type_='foreignkey')
+    op.drop_column('notification', 'target_team_id')
+    op.drop_column('notification', 'target_role')
+    op.alter_column('notification', 'user_id', existing_type=sa.Integer(), nullable=False)
@@ -0,0 +1,114 @@
+"""partition notification by month
+
+Revision ID: f4a7c2e9b815
+Revises: d2f8b64e1c97
+Create Date: 2026-10-18 22:14:37.905162
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4a7c2e9b815'
+down_revision: Union[str, None] = 'd2f8b64e1c97'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = "notification_type, text, user_id, target_role, target_team_id, id, created_at, updated_at"
+
+
+def create_indexes() -> None:
+    op.create_index('ix_notification_user_id_created_at', 'notification', ['user_id', 'created_at'], unique=False)
+    op.create_index('ix_notification_target_role_created_at', 'notification', ['target_role', 'created_at'],
+                    unique=False, postgresql_where=sa.text('target_role IS NOT NULL'))
+    op.create_index('ix_notification_target_team_id_created_at', 'notification', ['target_team_id', 'created_at'],
+                    unique=False, postgresql_where=sa.text('target_team_id IS NOT NULL'))
+
+
+def rename_old_table() -> None:
+    # Имена индексов общие для схемы, поэтому индексы старой таблицы удаляются, а ключ переименовывается
+    op.rename_table('notification', 'notification_old')
+    op.drop_index('ix_notification_user_id_created_at', table_name='notification_old')
+    op.drop_index('ix_notification_target_role_created_at', table_name='notification_old')
+    op.drop_index('ix_notification_target_team_id_created_at', table_name='notification_old')
+    op.execute("ALTER TABLE notification_old RENAME CONSTRAINT notification_pkey TO notification_old_pkey")
+    # Последовательность id переходит к новой таблице и не удаляется вместе со старой
+    op.execute("ALTER SEQUENCE notification_id_seq OWNED BY NONE")
+
+
+def upgrade() -> None:
+    # Внешний ключ на секционированную таблицу должен включать created_at, отметки очищаются приложением
+    op.drop_constraint('notificationreceipt_notification_id_fkey', 'notificationreceipt', type_='foreignkey')
+    rename_old_table()
+
+    op.execute("""
+        CREATE TABLE notification (
+            notification_type notification_type NOT NULL,
+            text VARCHAR NOT NULL,
+            user_id INTEGER,
+            target_role user_role,
+            target_team_id INTEGER,
+            id INTEGER NOT NULL DEFAULT nextval('notification_id_seq'),
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            updated_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            CONSTRAINT notification_pkey PRIMARY KEY (id, created_at),
+            CONSTRAINT ck_notification_single_target CHECK (num_nonnulls(user_id, target_role, target_team_id) = 1),
+            CONSTRAINT notification_user_id_fkey FOREIGN KEY (user_id) REFERENCES "user" (id) ON DELETE CASCADE,
+            CONSTRAINT notification_target_team_id_fkey FOREIGN KEY (target_team_id) REFERENCES team (id)
+                ON DELETE CASCADE
+        ) PARTITION BY RANGE (created_at)
+    """)
+    # Месячные секции от самого старого уведомления до двух месяцев вперед; дальше их создает приложение
+    op.execute("""
+        DO $$
+        DECLARE
+            month timestamp := date_trunc('month', COALESCE((SELECT min(created_at) FROM notification_old), now()));
+        BEGIN
+            WHILE month <= date_trunc('month', now()) + interval '2 months' LOOP
+                EXECUTE format('CREATE TABLE %I PARTITION OF notification FOR VALUES FROM (%L) TO (%L)',
+                               'notification_p' || to_char(month, 'YYYYMM'), month, month + interval '1 month');
+                month := month + interval '1 month';
+            END LOOP;
+        END $$
+    """)
+    op.execute("CREATE TABLE notification_default PARTITION OF notification DEFAULT")
+    create_indexes()
+
+    op.execute(f"INSERT INTO notification ({COLUMNS}) SELECT {COLUMNS} FROM notification_old")
+    op.drop_table('notification_old')
+    op.execute("ALTER SEQUENCE notification_id_seq OWNED BY notification.id")
+
+
+def downgrade() -> None:
+    rename_old_table()
+
+    op.execute("""
+        CREATE TABLE notification (
+            notification_type notification_type NOT NULL,
+            text VARCHAR NOT NULL,
+            user_id INTEGER,
+            target_role user_role,
+            target_team_id INTEGER,
+            id INTEGER NOT NULL DEFAULT nextval('notification_id_seq'),
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            updated_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            CONSTRAINT notification_pkey PRIMARY KEY (id),
+            CONSTRAINT ck_notification_single_target CHECK (num_nonnulls(user_id, target_role, target_team_id) = 1),
+            CONSTRAINT notification_user_id_fkey FOREIGN KEY (user_id) REFERENCES "user" (id) ON DELETE CASCADE,
+            CONSTRAINT notification_target_team_id_fkey FOREIGN KEY (target_team_id) REFERENCES team (id)
+                ON DELETE CASCADE
+        )
+    """)
+    create_indexes()
+
+    op.execute(f"INSERT INTO notification ({COLUMNS}) SELECT {COLUMNS} FROM notification_old")
+    op.drop_table('notification_old')
+    op.execute("ALTER SEQUENCE notification_id_seq OWNED BY notification.id")
+
+    op.execute("DELETE FROM notificationreceipt r WHERE NOT EXISTS "
+               "(SELECT 1 FROM notification n WHERE n.id = r.notification_id)")
+    op.create_foreign_key('notificationreceipt_notification_id_fkey', 'notificationreceipt', 'notification',
+                          ['notification_id'], ['id'], ondelete='CASCADE')
@@ -0,0 +1,28 @@
+import asyncio
+
+import pytest
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.settings import settings
+
+
+def create_client() -> Redis:
+    return Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT, password=settings.REDIS_PASSWORD,
+                 decode_responses=True, socket_connect_timeout=1)
+
+
+@pytest.fixture(scope="session")
+def redis_available() -> None:
+    # Тесты с Redis (REDIS_HOST/REDIS_PORT из окружения) пропускаются, если он недоступен
+    async def ping() -> None:
+        client = create_client()
+        try:
+            await client.ping()
+        finally:
+            await client.aclose()
+
+    try:
+        asyncio.run(ping())
+    except (RedisError, OSError) as e:
+        pytest.skip(f"Redis недоступен: {e!r}")
@@ -0,0 +1,102 @@
+# get_or_compute: одна загрузка на промах в процессе и между процессами, выдача устаревшего значения
+# с обновлением в фоне и отказ от записи значения, ключ которого удалили во время загрузки.
+# Нужен Redis (REDIS_HOST/REDIS_PORT из окружения), без него тесты пропускаются.
+import asyncio
+import json
+import time
+import uuid
+
+from app.redis import RedisService
+
+
+class CountingLoader:
+    def __init__(self, value, delay: float = 0.1):
+        self.value = value
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return self.value
+
+
+def unique_key() -> str:
+    return f"test:{uuid.uuid4().hex}"
+
+
+async def run_services(scenario, count: int = 1) -> None:
+    services = [RedisService() for _ in range(count)]
+    try:
+        await scenario(*services)
+    finally:
+        for service in services:
+            await service.redis_client.aclose()
+
+
+def test_concurrent_misses_share_one_load(redis_available):
+    async def scenario(service: RedisService) -> None:
+        key = unique_key()
+        loader = CountingLoader([1, 2, 3])
+        results = await asyncio.gather(*(service.get_or_compute(key, loader, ttl=60) for _ in range(10)))
+
+        assert results == [[1, 2, 3]] * 10
+        assert loader.calls == 1
+        assert service.stats.coalesced == 9
+        # Следующий запрос берет значение из Redis
+        assert await service.get_or_compute(key, loader, ttl=60) == [1, 2, 3]
+        assert loader.calls == 1
+
+    asyncio.run(run_services(scenario))
+
+
+def test_processes_share_one_load_through_redis_lock(redis_available):
+    async def scenario(a: RedisService, b: RedisService) -> None:
+        key = unique_key()
+        loader = CountingLoader({"v": 1}, delay=0.3)
+        results = await asyncio.gather(a.get_or_compute(key, loader, ttl=60), b.get_or_compute(key, loader, ttl=60))
+
+        assert results == [{"v": 1}, {"v": 1}]
+        assert loader.calls == 1
+        assert a.stats.coalesced + b.stats.coalesced == 1
+
+    asyncio.run(run_services(scenario, count=2))
+
+
+def test_stale_value_is_served_while_refreshing(redis_available):
+    async def scenario(service: RedisService) -> None:
+        key = unique_key()
+        await service.redis_client.set(f"cache:{key}", json.dumps({"value": "old", "expires_at": time.time() - 1}),
+                                       ex=60)
+        loader = CountingLoader("new")
+
+        # Устаревшее значение отдается сразу, обновление идет одной фоновой загрузкой
+        assert await service.get_or_compute(key, loader, ttl=60, stale_ttl=60) == "old"
+        assert await service.get_or_compute(key, loader, ttl=60, stale_ttl=60) == "old"
+        assert service.stats.stale_served == 2
+        await service.inflight[key]
+
+        assert loader.calls == 1
+        assert await service.get_or_compute(key, loader, ttl=60, stale_ttl=60) == "new"
+
+    asyncio.run(run_services(scenario))
+
+
+def test_value_invalidated_during_load_is_not_stored(redis_available):
+    async def scenario(service: RedisService) -> None:
+        key = unique_key()
+
+        async def loader():
+            # Данные изменились и ключ удален, пока загрузка читала старое состояние
+            await service.del_cache(key)
+            return "old"
+
+        assert await service.get_or_compute(key, loader, ttl=60) == "old"
+        assert service.stats.stale_discarded == 1
+        assert await service.redis_client.get(f"cache:{key}") is None
+
+        # Загрузка после удаления записывается как обычно
+        assert await service.get_or_compute(key, CountingLoader("new"), ttl=60) == "new"
+        assert await service.get_cache(key, local=False) is not None
+
+    asyncio.run(run_services(scenario))
@@ -0,0 +1,94 @@
+# Индекс новых вызовов: порядок выдачи и синхронизация событиями канала диспетчеров с номерами.
+from datetime import datetime, timedelta
+
+from app.db.models.call import CallStatus, CallType
+from app.schemas.call import CallModelSchema
+from app.schemas.websocket import EventType
+from app.utils.call_queue import CallQueue
+
+START = datetime(2026, 1, 1, 12, 0)
+
+
+def make_call(call_id: int,
+              call_type: CallType = CallType.COMMON,
+              minutes: int = 0,
+              status: CallStatus = CallStatus.NEW) -> CallModelSchema:
+    return CallModelSchema(id=call_id, reason="Боль", address="Невский пр., 1",
+                           date_time=START + timedelta(minutes=minutes),
+                           lat=59.93, lon=30.33, status=status, type=call_type,
+                           patient_id=1, team_id=None, created_at=START, updated_at=START)
+
+
+def call_event(event: EventType, call: CallModelSchema) -> dict:
+    return {"event": event, "call": call.model_dump(mode="json")}
+
+
+def ids(queue: CallQueue) -> list[int]:
+    return [c.id for c in queue.get_all()]
+
+
+def test_order_is_priority_then_newest_first():
+    queue = CallQueue()
+    queue.rebuild([make_call(1, CallType.COMMON, 0),
+                   make_call(2, CallType.CRITICAL, 0),
+                   make_call(3, CallType.COMMON, 5),
+                   make_call(4, CallType.IMPORTANT, 1)])
+    assert ids(queue) == [2, 4, 3, 1]
+
+    queue.push(make_call(5, CallType.CRITICAL, 10))
+    queue.remove(4)
+    queue.remove(42)
+    assert ids(queue) == [5, 2, 3, 1]
+    assert len(queue) == 4
+
+
+def test_push_replaces_changed_call():
+    queue = CallQueue()
+    queue.rebuild([make_call(1, CallType.COMMON), make_call(2, CallType.IMPORTANT)])
+    queue.push(make_call(1, CallType.CRITICAL))
+    assert ids(queue) == [1, 2]
+    assert len(queue) == 2
+
+
+def test_events_in_seq_order_are_applied():
+    queue = CallQueue()
+    queue.rebuild([make_call(1), make_call(2), make_call(3)], seq=10)
+
+    queue.apply(11, call_event(EventType.CALL_ADDED, make_call(4, CallType.CRITICAL)))
+    queue.apply(12, {"event": EventType.CALL_ACCEPTED, "call_id": 1, "team_id": 7})
+    queue.apply(13, call_event(EventType.CALL_CHANGED, make_call(2, status=CallStatus.REJECTED)))
+    queue.apply(14, {"event": EventType.CALLS_ASSIGNED,
+                     "assignments": [{"call_id": 3, "team_id": 8, "distance_km": 1.0}]})
+    queue.apply(15, {"event": EventType.TEAM_BUSY, "team_id": 7})
+
+    assert ids(queue) == [4]
+    assert queue.seq == 15
+    assert queue.is_loaded
+
+
+def test_duplicate_event_is_ignored():
+    queue = CallQueue()
+    queue.rebuild([make_call(1)], seq=10)
+    queue.apply(11, call_event(EventType.CALL_ADDED, make_call(2)))
+    # Событие, уже учтенное снимком или полученное повторно, не применяется второй раз
+    queue.apply(11, {"event": EventType.CALL_REMOVED, "call_id": 2})
+    queue.apply(9, {"event": EventType.CALL_REMOVED, "call_id": 1})
+    assert sorted(ids(queue)) == [1, 2]
+    assert queue.seq == 11
+
+
+def test_seq_gap_invalidates_queue():
+    queue = CallQueue()
+    queue.rebuild([make_call(1)], seq=10)
+    queue.apply(12, call_event(EventType.CALL_ADDED, make_call(2)))
+    assert not queue.is_loaded
+    assert ids(queue) == [1]
+
+    # До перестроения события не применяются
+    queue.apply(13, {"event": EventType.CALL_REMOVED, "call_id": 1})
+    assert ids(queue) == [1]
+
+    queue.rebuild([make_call(2)], seq=13)
+    queue.apply(14, {"event": EventType.CALL_REMOVED, "call_id": 2})
+    assert queue.is_loaded
+    assert ids(queue) == []
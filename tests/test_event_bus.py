@@ -0,0 +1,150 @@
+# Доставка WS-событий между процессами API через Redis pub/sub: два экземпляра ConnectionService
+# со своими подключениями к одному Redis (REDIS_HOST/REDIS_PORT из окружения).
+# Без доступного Redis эти тесты пропускаются; обработка ошибок обработчика проверяется без Redis.
+import asyncio
+import json
+
+import pytest
+from redis.asyncio import Redis
+
+from app.schemas.websocket import CallAcceptedMessage, MoveFinishedMessage, EventType
+from app.services.connection_service import ConnectionService
+from app.utils.event_bus import RedisEventBus, InMemoryEventBus, DISPATCHERS_CHANNEL, CHANNEL_PREFIX
+from tests.conftest import create_client
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.received: list[str] = []
+        self.event = asyncio.Event()
+
+    async def send_text(self, data: str) -> None:
+        self.received.append(data)
+        self.event.set()
+
+    async def close(self) -> None:
+        pass
+
+
+def create_instance() -> ConnectionService:
+    service = ConnectionService()
+    service.event_bus = RedisEventBus(create_client(), service._deliver)
+    return service
+
+
+async def wait_all(sockets: list[FakeWebSocket], count: int) -> None:
+    while any(len(ws.received) < count for ws in sockets):
+        await asyncio.wait_for(asyncio.gather(*(ws.event.wait() for ws in sockets)), timeout=5)
+        for ws in sockets:
+            if len(ws.received) < count:
+                ws.event.clear()
+
+
+async def run_instances(scenario) -> None:
+    a, b = create_instance(), create_instance()
+    await a.start()
+    await b.start()
+    try:
+        await scenario(a, b)
+    finally:
+        await a.stop()
+        await b.stop()
+
+
+def test_dispatcher_events_reach_both_instances_in_seq_order(redis_available):
+    async def scenario(a: ConnectionService, b: ConnectionService) -> None:
+        dispatcher_a, dispatcher_b = FakeWebSocket(), FakeWebSocket()
+        await a.handle_connect_dispatcher(dispatcher_a)
+        await b.handle_connect_dispatcher(dispatcher_b)
+        start = await a.event_bus.last_seq(DISPATCHERS_CHANNEL)
+
+        # События публикуют оба экземпляра вперемешку
+        for i in range(50):
+            await (a if i % 2 else b).notify_dispatchers(CallAcceptedMessage(event=EventType.CALL_ACCEPTED,
+                                                                             call_id=i,
+                                                                             team_id=7))
+        await wait_all([dispatcher_a, dispatcher_b], 50)
+
+        assert dispatcher_a.received == dispatcher_b.received
+        events = [json.loads(text) for text in dispatcher_a.received]
+        assert [e["seq"] for e in events] == list(range(start + 1, start + 51))
+        assert [e["call_id"] for e in events] == list(range(50))
+
+    asyncio.run(run_instances(scenario))
+
+
+def test_team_events_reach_only_team_sockets_on_other_instance(redis_available):
+    async def scenario(a: ConnectionService, b: ConnectionService) -> None:
+        worker_b, other_team_worker = FakeWebSocket(), FakeWebSocket()
+        await b.handle_connect_worker(worker_b, worker_id=1, team_id=7)
+        await a.handle_connect_worker(other_team_worker, worker_id=2, team_id=8)
+
+        await a.notify_workers(7, MoveFinishedMessage(event=EventType.MOVE_FINISHED))
+        await wait_all([worker_b], 1)
+        # Порядок доставки сохраняется: чужое событие бригады 7 пришло бы раньше этого
+        await a.notify_workers(8, MoveFinishedMessage(event=EventType.MOVE_FINISHED))
+        await wait_all([other_team_worker], 1)
+
+        assert json.loads(worker_b.received[0])["event"] == EventType.MOVE_FINISHED
+        assert len(worker_b.received) == 1
+        assert len(other_team_worker.received) == 1
+
+    asyncio.run(run_instances(scenario))
+
+
+class FakePubSub:
+    def __init__(self, texts: list[str]):
+        self.texts = texts
+        self.closed = False
+
+    async def listen(self):
+        for text in self.texts:
+            yield {"type": "pmessage", "channel": f"{CHANNEL_PREFIX}{DISPATCHERS_CHANNEL}", "data": text}
+        # Дальше соединение просто ждет новых сообщений
+        await asyncio.Event().wait()
+
+    async def aclose(self) -> None:
+        self.closed = True
+
+
+def test_handler_error_does_not_stop_redis_listener():
+    received = []
+
+    def handler(channel: str, seq: int, text: str) -> None:
+        event = json.loads(text)
+        received.append(event["call_id"])
+
+    async def scenario() -> None:
+        bus = RedisEventBus(Redis(), handler)
+        pubsub = FakePubSub(['{"seq":1,"event":"call_accepted","call_id":1}',
+                             '{"seq":2,"event":"call_accepted"}',
+                             'not json',
+                             '{"seq":4,"event":"call_accepted","call_id":4}'])
+        task = asyncio.create_task(bus._run(pubsub))
+        while len(received) < 2 and not task.done():
+            await asyncio.sleep(0.01)
+        assert not task.done()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert pubsub.closed
+
+    asyncio.run(scenario())
+    assert received == [1, 4]
+
+
+def test_handler_error_does_not_reach_publisher():
+    received = []
+
+    def handler(channel: str, seq: int, text: str) -> None:
+        if seq == 1:
+            raise KeyError("call")
+        received.append(seq)
+
+    async def scenario() -> None:
+        bus = InMemoryEventBus(handler)
+        await bus.publish(DISPATCHERS_CHANNEL, '{"event":"call_accepted"}')
+        await bus.publish(DISPATCHERS_CHANNEL, '{"event":"call_accepted"}')
+
+    asyncio.run(scenario())
+    assert received == [2]
@@ -0,0 +1,113 @@
+# Локальный уровень кэша: вытеснение по объему в порядке LRU, срок жизни записей и epoch удалений.
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.redis import RedisService
+from app.utils import local_cache
+from app.utils.local_cache import LocalCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    clock = FakeClock()
+    monkeypatch.setattr(local_cache, "time", clock)
+    return clock
+
+
+def test_lru_eviction_by_bytes(clock):
+    cache = LocalCache(max_bytes=100)
+    cache.set("a", 1, 40, ttl=60)
+    cache.set("b", 2, 40, ttl=60)
+    # Обращение делает "a" самой свежей, вытесняется "b"
+    assert cache.get("a") == 1
+    cache.set("c", 3, 40, ttl=60)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.size == 80
+    assert cache.evictions == 1
+
+
+def test_eviction_frees_enough_bytes(clock):
+    cache = LocalCache(max_bytes=100)
+    for key in "abcde":
+        cache.set(key, key, 20, ttl=60)
+    cache.set("big", "big", 70, ttl=60)
+
+    assert list(cache.entries) == ["e", "big"]
+    assert cache.size == 90
+    assert cache.evictions == 4
+
+
+def test_oversized_value_is_not_stored(clock):
+    cache = LocalCache(max_bytes=100)
+    cache.set("a", 1, 40, ttl=60)
+    cache.set("huge", 2, 101, ttl=60)
+    assert cache.get("huge") is None
+    assert cache.get("a") == 1
+
+
+def test_replacing_key_updates_size(clock):
+    cache = LocalCache(max_bytes=100)
+    cache.set("a", 1, 40, ttl=60)
+    cache.set("a", 2, 10, ttl=60)
+    assert cache.get("a") == 2
+    assert cache.size == 10
+
+
+def test_expired_entry_is_dropped(clock):
+    cache = LocalCache(max_bytes=100)
+    cache.set("a", 1, 40, ttl=5)
+    clock.now += 4.9
+    assert cache.get("a") == 1
+    clock.now += 0.1
+    assert cache.get("a") is None
+    assert cache.size == 0
+
+
+def test_delete_and_clear_advance_epoch(clock):
+    cache = LocalCache(max_bytes=100)
+    cache.set("a", 1, 40, ttl=60)
+    epoch = cache.epoch
+    # Удаление отсутствующего ключа тоже сдвигает epoch: значение могло читаться из Redis в этот момент
+    cache.delete("missing")
+    assert cache.epoch == epoch + 1
+    cache.delete("a")
+    assert cache.get("a") is None
+    cache.set("b", 2, 40, ttl=60)
+    cache.clear()
+    assert cache.epoch == epoch + 3
+    assert cache.size == 0
+    assert cache.get("b") is None
+
+
+def test_value_read_before_invalidation_is_not_cached_locally():
+    # Удаление приходит, пока get_cache ждет ответ Redis: прочитанное значение уже устарело
+    service = RedisService()
+    service.local_enabled = True
+
+    async def get(name: str) -> str:
+        service.local.delete("teams")
+        return '{"v": 1}'
+
+    service.redis_client = SimpleNamespace(get=get)
+    assert asyncio.run(service.get_cache("teams")) == {"v": 1}
+    assert service.local.get("teams") is None
+
+    async def plain_get(name: str) -> str:
+        return '{"v": 2}'
+
+    service.redis_client = SimpleNamespace(get=plain_get)
+    assert asyncio.run(service.get_cache("teams")) == {"v": 2}
+    assert service.local.get("teams") == {"v": 2}
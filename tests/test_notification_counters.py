@@ -0,0 +1,80 @@
+# Курсор страниц уведомлений и счетчики непрочитанных в Redis. Тесты счетчиков используют Redis
+# (REDIS_HOST/REDIS_PORT из окружения) и без него пропускаются.
+import asyncio
+import json
+import uuid
+from datetime import datetime
+
+import pytest
+
+from app.exceptions.pagination import InvalidCursorException
+from app.redis import RedisService
+from app.services.notification_service import NotificationService
+from app.utils.pagination import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    moment = datetime(2026, 3, 1, 12, 30, 15, 123456)
+    cursor = encode_cursor(moment, 42)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (moment, 42)
+
+
+@pytest.mark.parametrize("cursor", ["", "не курсор", encode_cursor(datetime(2026, 1, 1), 1)[:-3], "WzFd"])
+def test_invalid_cursor_is_rejected(cursor):
+    with pytest.raises(InvalidCursorException):
+        decode_cursor(cursor)
+
+
+class CapturingConnectionService:
+    def __init__(self):
+        self.published: list[tuple[str, dict]] = []
+
+    async def publish(self, channel: str, text: str) -> None:
+        self.published.append((channel, json.loads(text)))
+
+
+async def run_service(scenario) -> None:
+    redis_service = RedisService()
+    service = NotificationService()
+    service.redisService = redis_service
+    service.connection_service = CapturingConnectionService()
+    prefix = f"test:{uuid.uuid4().hex}:"
+    try:
+        await scenario(service, redis_service, prefix)
+    finally:
+        await redis_service.del_counters(prefix)
+        await redis_service.redis_client.aclose()
+
+
+def test_only_existing_counters_change(redis_available):
+    async def scenario(service: NotificationService, redis_service: RedisService, prefix: str) -> None:
+        assert await redis_service.init_counter(f"{prefix}1", 3, ex=60) == 3
+        # Параллельный запрос уже посчитал значение: оно не перезаписывается
+        assert await redis_service.init_counter(f"{prefix}1", 10, ex=60) == 3
+
+        changed = await redis_service.incr_counters({f"{prefix}1": 2, f"{prefix}2": 1}, ex=60)
+        assert changed == {f"{prefix}1": 5}
+        # Счетчик без значения пересчитается по БД при чтении, а не начнется с дельты
+        assert await redis_service.get_counter(f"{prefix}2") is None
+
+        assert await redis_service.incr_counters({f"{prefix}1": -10}, ex=60) == {f"{prefix}1": 0}
+        assert await redis_service.get_counter(f"{prefix}1") == 0
+
+    asyncio.run(run_service(scenario))
+
+
+def test_change_unread_publishes_new_values(redis_available):
+    async def scenario(service: NotificationService, redis_service: RedisService, prefix: str) -> None:
+        user_id = int(uuid.uuid4().int % 10 ** 9)
+        key = f"notifications:unread:{user_id}"
+        await redis_service.init_counter(key, 4, ex=60)
+        try:
+            await service.change_unread({user_id: -1, user_id + 1: 1, user_id + 2: 0})
+        finally:
+            await redis_service.del_counter(key)
+
+        assert service.connection_service.published == [
+            ("unread", {"event": "unread_counts", "counts": {str(user_id): 3}})]
+
+    asyncio.run(run_service(scenario))
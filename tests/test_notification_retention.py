@@ -0,0 +1,75 @@
+# Создание месячной секции notification, когда ее строки уже лежат в секции по умолчанию.
+# Таблица создается в отдельной схеме PostgreSQL (POSTGRES_* из окружения); без доступной БД тест пропускается.
+import asyncio
+import uuid
+from datetime import datetime
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.services.notification_retention_service import (
+    DEFAULT_PARTITION,
+    NotificationRetentionService,
+    partition_name,
+)
+from app.settings import settings
+
+SCHEMA = f"test_retention_{uuid.uuid4().hex[:8]}"
+
+
+async def create_schema(engine) -> None:
+    async with engine.begin() as connection:
+        await connection.execute(text(f'CREATE SCHEMA "{SCHEMA}"'))
+        await connection.execute(text(f'SET search_path TO "{SCHEMA}"'))
+        await connection.execute(text("CREATE TABLE notification (id INTEGER NOT NULL, text VARCHAR NOT NULL, "
+                                      "created_at TIMESTAMP NOT NULL, PRIMARY KEY (id, created_at)) "
+                                      "PARTITION BY RANGE (created_at)"))
+        await connection.execute(text(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF notification DEFAULT"))
+        await connection.execute(text("CREATE INDEX ix_notification_created_at ON notification (created_at)"))
+        await connection.execute(text("INSERT INTO notification VALUES "
+                                      "(1, 'a', '2025-03-05'), (2, 'b', '2025-03-31 23:59'), (3, 'c', '2025-04-01')"))
+
+
+@pytest.fixture(scope="module")
+def engine():
+    # Каждый asyncio.run работает в своем цикле событий, поэтому соединения не переиспользуются
+    engine = create_async_engine(settings.get_db_url(), poolclass=NullPool,
+                                 connect_args={"timeout": 2, "server_settings": {"search_path": SCHEMA}})
+    try:
+        asyncio.run(create_schema(engine))
+    except (DBAPIError, OSError) as e:
+        pytest.skip(f"PostgreSQL недоступен: {e!r}")
+    yield engine
+
+    async def drop() -> None:
+        async with engine.begin() as connection:
+            await connection.execute(text(f'DROP SCHEMA "{SCHEMA}" CASCADE'))
+        await engine.dispose()
+
+    asyncio.run(drop())
+
+
+def test_partition_is_created_from_default_rows(engine):
+    async def scenario() -> None:
+        async with AsyncSession(engine) as session:
+            months = await NotificationRetentionService._default_months(session)
+            assert months == {datetime(2025, 3, 1), datetime(2025, 4, 1)}
+
+            name = await NotificationRetentionService._create_partition(session, datetime(2025, 3, 1), True)
+            await session.commit()
+
+            assert name == partition_name(datetime(2025, 3, 1))
+            partitions = await NotificationRetentionService._partitions(session)
+            assert list(partitions) == [name]
+            moved = (await session.execute(text(f'SELECT id FROM "{name}" ORDER BY id'))).scalars().all()
+            left = (await session.execute(text(f"SELECT id FROM {DEFAULT_PARTITION}"))).scalars().all()
+            assert moved == [1, 2]
+            assert left == [3]
+            # Секция по умолчанию снова присоединена и принимает строки без своей секции
+            await session.execute(text("INSERT INTO notification VALUES (4, 'd', '2030-01-01')"))
+            assert (await session.execute(text("SELECT count(*) FROM notification"))).scalar() == 4
+
+    asyncio.run(scenario())
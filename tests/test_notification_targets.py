@@ -0,0 +1,46 @@
+# Адресаты уведомлений при fan-out on read: личные, рассылки роли и бригады.
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.db.models.notification import Notification
+from app.db.models.user import UserRole
+from app.services.notification_service import NotificationService
+
+
+def notification(user_id: int | None = None,
+                 target_role: UserRole | None = None,
+                 target_team_id: int | None = None) -> Notification:
+    return Notification(id=1, text="Назначен вызов", user_id=user_id,
+                        target_role=target_role, target_team_id=target_team_id)
+
+
+@pytest.mark.parametrize("note, user_id, role, team_id, expected", [
+    # Личное уведомление видит только его владелец, роль и бригада не важны
+    (notification(user_id=5), 5, None, None, True),
+    (notification(user_id=5), 6, UserRole.DISPATCHER, 3, False),
+    # Рассылка роли
+    (notification(target_role=UserRole.DISPATCHER), 6, UserRole.DISPATCHER, None, True),
+    (notification(target_role=UserRole.DISPATCHER), 6, UserRole.ADMIN, None, False),
+    (notification(target_role=UserRole.DISPATCHER), 6, None, None, False),
+    # Рассылка бригаде
+    (notification(target_team_id=3), 7, UserRole.WORKER, 3, True),
+    (notification(target_team_id=3), 7, UserRole.WORKER, 4, False),
+    (notification(target_team_id=3), 7, UserRole.WORKER, None, False),
+])
+def test_is_target(note, user_id, role, team_id, expected):
+    assert NotificationService._is_target(note, user_id, role, team_id) is expected
+
+
+def test_targets_cover_only_known_scopes():
+    assert len(NotificationService._targets(5, None, None)) == 1
+    assert len(NotificationService._targets(5, UserRole.DISPATCHER, None)) == 2
+    assert len(NotificationService._targets(5, UserRole.WORKER, 3)) == 3
+
+
+def test_broadcast_targets_skip_dismissed():
+    personal, role, team = NotificationService._targets(5, UserRole.WORKER, 3)
+    compiled = [" ".join(str(c.compile(dialect=postgresql.dialect())) for c in branch)
+                for branch in (personal, role, team)]
+    # Личное уведомление удаляется, а не скрывается, поэтому отметки проверяются только для рассылок
+    assert "notificationreceipt" not in compiled[0]
+    assert all("NOT (EXISTS" in branch and "is_dismissed" in branch for branch in compiled[1:])
@@ -0,0 +1,93 @@
+# Сеточный поиск ближайших бригад и синхронизация индекса свободных бригад событиями с номерами.
+import random
+
+from app.schemas.websocket import EventType
+from app.utils.team_locator import SpatialIndex, TeamLocator, haversine_km
+
+
+def brute_force(points: dict[int, tuple[float, float]], lat: float, lon: float, k: int) -> list[tuple[float, int]]:
+    return sorted((haversine_km(lat, lon, p_lat, p_lon), item_id) for item_id, (p_lat, p_lon) in points.items())[:k]
+
+
+def test_ring_search_matches_brute_force():
+    rng = random.Random(7)
+    index = SpatialIndex(cell_size=0.01)
+    points = {}
+    for item_id in range(300):
+        # Часть точек собрана в плотное скопление, часть разбросана по городу
+        if item_id % 3:
+            lat, lon = rng.uniform(59.7, 60.2), rng.uniform(29.6, 30.9)
+        else:
+            lat, lon = rng.gauss(59.93, 0.01), rng.gauss(30.33, 0.02)
+        points[item_id] = (lat, lon)
+        index.upsert(item_id, lat, lon)
+
+    for _ in range(200):
+        lat, lon, k = rng.uniform(59.6, 60.3), rng.uniform(29.5, 31.0), rng.randint(1, 10)
+        assert index.nearest(lat, lon, k) == brute_force(points, lat, lon, k)
+
+
+def test_far_query_and_large_k():
+    index = SpatialIndex(cell_size=0.01)
+    index.upsert(1, 59.93, 30.33)
+    index.upsert(2, 59.94, 30.34)
+    # Запрос далеко от всех точек и k больше их числа: обход колец заканчивается на всех точках
+    assert [item_id for _, item_id in index.nearest(60.2, 29.6, 5)] == [2, 1]
+    assert index.nearest(59.93, 30.33, 0) == []
+
+
+def test_upsert_moves_between_cells_and_remove():
+    index = SpatialIndex(cell_size=0.01)
+    index.upsert(1, 59.931, 30.331)
+    index.upsert(1, 59.932, 30.332)
+    index.upsert(1, 59.991, 30.391)
+    assert len(index) == 1
+    assert sum(len(bucket) for bucket in index.cells.values()) == 1
+    assert index.nearest(59.99, 30.39, 1)[0][1] == 1
+
+    index.remove(1)
+    index.remove(1)
+    assert len(index) == 0
+    assert not index.cells
+
+
+def test_only_free_teams_are_indexed():
+    locator = TeamLocator()
+    locator.rebuild([(1, 59.93, 30.33, False, True),
+                     (2, 59.931, 30.331, True, True),
+                     (3, 59.932, 30.332, False, False)])
+    assert [team_id for _, team_id in locator.nearest_free(59.93, 30.33, 3)] == [1]
+
+    locator.set_busy(1, True)
+    locator.set_busy(2, False)
+    locator.set_car_ok(3, True)
+    assert [team_id for _, team_id in locator.nearest_free(59.93, 30.33, 3)] == [2, 3]
+
+    # Позиция неизвестной бригады не добавляет ее в индекс
+    locator.set_position(9, 59.93, 30.33)
+    assert not locator.is_free(9)
+
+
+def test_events_in_seq_order_are_applied():
+    locator = TeamLocator()
+    locator.rebuild([(1, 59.93, 30.33, False, True), (2, 60.1, 30.5, False, True)], seq=5)
+
+    locator.apply(6, {"event": EventType.TEAM_BUSY, "team_id": 1})
+    locator.apply(7, {"event": EventType.TEAM_POSITIONS,
+                      "positions": [{"team_id": 2, "lat": 59.931, "lon": 30.331}]})
+    locator.apply(7, {"event": EventType.TEAM_FREE, "team_id": 1})
+
+    assert locator.seq == 7
+    assert [team_id for _, team_id in locator.nearest_free(59.93, 30.33, 2)] == [2]
+
+
+def test_seq_gap_and_teams_changed_invalidate_locator():
+    locator = TeamLocator()
+    locator.rebuild([(1, 59.93, 30.33, False, True)], seq=5)
+    locator.apply(7, {"event": EventType.TEAM_BUSY, "team_id": 1})
+    assert not locator.is_loaded
+    assert locator.is_free(1)
+
+    locator.rebuild([(1, 59.93, 30.33, False, True)], seq=7)
+    locator.apply(8, {"event": EventType.TEAMS_CHANGED})
+    assert not locator.is_loaded
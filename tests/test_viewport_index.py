@@ -0,0 +1,36 @@
+# Подписки диспетчеров на области карты: ограничение bbox зоной обслуживания и размера области в индексе.
+import pytest
+from pydantic import ValidationError
+
+from app.schemas.websocket import ViewportSchema
+from app.utils.viewport_index import Area, ViewportIndex
+
+
+def test_bbox_is_clamped_to_service_area():
+    viewport = ViewportSchema(bbox=(-90, -180, 90, 180))
+    assert viewport.bbox == (59.7, 29.6, 60.2, 30.9)
+
+
+def test_bbox_outside_service_area_is_rejected():
+    with pytest.raises(ValidationError):
+        ViewportSchema(bbox=(0, 0, 1, 1))
+
+
+def test_too_large_area_is_not_indexed():
+    index = ViewportIndex(cell_size=0.02, max_cells=100)
+    assert not index.subscribe("big", Area((59.7, 29.6, 60.2, 30.9)))
+    assert "big" not in index.areas
+    assert not index.cells
+
+
+def test_match_finds_only_containing_areas():
+    index = ViewportIndex(cell_size=0.02)
+    assert index.subscribe("center", Area((59.9, 30.2, 59.95, 30.35)))
+    assert index.subscribe("north", Area((60.1, 30.2, 60.15, 30.35)))
+
+    assert index.match([(59.93, 30.3)]) == {"center"}
+    assert index.match([(59.93, 30.3), (60.12, 30.25)]) == {"center", "north"}
+    assert index.match([(59.8, 30.0)]) == set()
+
+    index.unsubscribe("center")
+    assert index.match([(59.93, 30.3)]) == set()
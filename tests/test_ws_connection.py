@@ -0,0 +1,94 @@
+# Очередь отправки WS-клиента: последняя позиция бригады заменяет неотправленную, координаты уходят
+# не чаще заданной частоты и перед следующим обычным сообщением, медленный клиент отключается.
+import asyncio
+import json
+
+from app.settings import settings
+from app.utils.ws_connection import ClientConnection
+
+
+class FakeWebSocket:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.received: list[str] = []
+        self.closed = False
+
+    async def send_text(self, data: str) -> None:
+        await asyncio.sleep(self.delay)
+        self.received.append(data)
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+def position(team_id: int, lat: float) -> str:
+    return json.dumps({"event": "move_team", "team_id": team_id, "lat": lat})
+
+
+def test_latest_position_wins():
+    async def scenario() -> FakeWebSocket:
+        ws = FakeWebSocket()
+        connection = ClientConnection(ws, position_rate_hz=100)
+        for lat in (59.91, 59.92, 59.93):
+            connection.send_position(1, position(1, lat))
+        connection.send_position(2, position(2, 60.0))
+        connection.start()
+        await asyncio.sleep(0.05)
+        connection.stop()
+        return ws
+
+    ws = asyncio.run(scenario())
+    assert ws.received == [position(1, 59.93), position(2, 60.0)]
+
+
+def test_pending_positions_go_before_next_message():
+    async def scenario() -> FakeWebSocket:
+        ws = FakeWebSocket()
+        connection = ClientConnection(ws, position_rate_hz=100)
+        connection.send_position(1, position(1, 59.91))
+        connection.send('{"event":"move_finished"}')
+        connection.start()
+        await asyncio.sleep(0.05)
+        connection.stop()
+        return ws
+
+    ws = asyncio.run(scenario())
+    assert ws.received == [position(1, 59.91), '{"event":"move_finished"}']
+
+
+def test_positions_are_rate_limited():
+    async def scenario() -> tuple[FakeWebSocket, float]:
+        ws = FakeWebSocket()
+        connection = ClientConnection(ws, position_rate_hz=5)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        connection.start()
+        # 50 обновлений примерно за полсекунды при 5 Гц: не больше одной позиции в 0.2 с
+        for i in range(50):
+            connection.send_position(1, position(1, 59.9 + i / 1000))
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.25)
+        connection.stop()
+        return ws, loop.time() - started
+
+    ws, elapsed = asyncio.run(scenario())
+    assert 2 <= len(ws.received) <= elapsed * 5 + 1
+    assert ws.received[-1] == position(1, 59.949)
+
+
+def test_slow_consumer_is_disconnected():
+    forgotten = []
+
+    async def scenario() -> FakeWebSocket:
+        ws = FakeWebSocket(delay=10)
+        connection = ClientConnection(ws, on_close=forgotten.append)
+        connection.start()
+        for i in range(settings.WS_SEND_QUEUE_SIZE + settings.WS_MAX_DROPPED + 2):
+            connection.send(f'{{"event":"call_removed","call_id":{i}}}')
+        assert connection.is_closed
+        await asyncio.sleep(0)
+        return ws
+
+    ws = asyncio.run(scenario())
+    assert forgotten == [ws]
+    assert ws.closed
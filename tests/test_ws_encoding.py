@@ -0,0 +1,72 @@
+# Кодировки WS: выбор по подпротоколу или параметру запроса, кэш JSON и MessagePack на рассылку.
+import asyncio
+import json
+from types import SimpleNamespace
+
+import msgpack
+
+from app.schemas.websocket import CallAcceptedMessage, EventType, WSEncoding
+from app.utils.ws_connection import ClientConnection
+from app.utils.ws_encoding import MessageEncoder, negotiate_encoding
+
+
+def accepted(call_id: int) -> CallAcceptedMessage:
+    return CallAcceptedMessage(event=EventType.CALL_ACCEPTED, call_id=call_id, team_id=7)
+
+
+def test_subprotocol_takes_precedence_over_query():
+    ws = SimpleNamespace(scope={"subprotocols": ["v1.chat", "msgpack"]})
+    assert negotiate_encoding(ws, WSEncoding.JSON) == (WSEncoding.MSGPACK, "msgpack")
+
+    ws = SimpleNamespace(scope={"subprotocols": ["v1.chat"]})
+    assert negotiate_encoding(ws, WSEncoding.MSGPACK) == (WSEncoding.MSGPACK, None)
+    assert negotiate_encoding(SimpleNamespace(scope={}), WSEncoding.JSON) == (WSEncoding.JSON, None)
+
+
+def test_message_is_encoded_once_per_object():
+    encoder = MessageEncoder(size=2)
+    message = accepted(1)
+    text = encoder.encode(message)
+    assert encoder.encode(message) is text
+    # Равное по содержанию, но другое сообщение кодируется заново
+    assert encoder.encode(accepted(1)) == text
+    assert json.loads(text) == {"event": "call_accepted", "call_id": 1, "team_id": 7}
+
+
+def test_encoder_cache_is_bounded():
+    encoder = MessageEncoder(size=2)
+    messages = [accepted(i) for i in range(5)]
+    for message in messages:
+        encoder.encode(message)
+        encoder.pack(encoder.encode(message))
+    assert len(encoder.cache) == 2
+    assert len(encoder.packed) == 2
+
+
+def test_pack_round_trips_to_same_data():
+    encoder = MessageEncoder()
+    text = '{"seq":3,"event":"call_accepted","call_id":1,"team_id":7}'
+    packed = encoder.pack(text)
+    assert encoder.pack(text) is packed
+    assert msgpack.unpackb(packed) == json.loads(text)
+
+
+def test_msgpack_client_receives_bytes():
+    sent = []
+
+    class FakeWebSocket:
+        async def send_bytes(self, data: bytes) -> None:
+            sent.append(data)
+
+        async def send_text(self, data: str) -> None:
+            raise AssertionError("клиенту MessagePack отправлен текст")
+
+    async def scenario() -> None:
+        connection = ClientConnection(FakeWebSocket(), encoding=WSEncoding.MSGPACK)
+        connection.send('{"seq":1,"event":"move_finished"}')
+        connection.start()
+        await asyncio.sleep(0.05)
+        connection.stop()
+
+    asyncio.run(scenario())
+    assert [msgpack.unpackb(data) for data in sent] == [{"seq": 1, "event": "move_finished"}]